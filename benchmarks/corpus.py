@@ -0,0 +1,106 @@
+import os
+import sqlite3
+
+import numpy as np
+
+from src.database.schema import bulk_upsert_word_positions
+from src.utils.aho_corasick import ALPHABET, first_occurrences
+from src.utils.base32_converter import ascii_to_base32
+from src.utils.pi_digits import PiDigits
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+# Digits generated and written per step
+WRITE_CHUNK = 1 << 22
+
+
+def generate_pi_file(path, digits, seed=0):
+    """
+    Write digits uniformly random base32 symbols, which is what pi's base32
+    expansion looks like to the search: every short string occurs about as
+    often as in the real file, so positions have realistic magnitudes.
+    """
+    rng = np.random.default_rng(seed)
+    alphabet = np.frombuffer(ALPHABET, dtype=np.uint8)
+    with open(path, "wb") as file:
+        for start in range(0, digits, WRITE_CHUNK):
+            count = min(WRITE_CHUNK, digits - start)
+            file.write(alphabet[rng.integers(0, len(alphabet), count)].tobytes())
+
+
+def generate_words(count, seed=0, max_length=8):
+    """
+    Return count distinct lowercase words, deterministic for a seed.
+
+    The single letters are always included (so count is at least 26) and
+    every phrase can be spelled. Lengths follow a rough English distribution (mostly 2 to 6 letters), so
+    short words are found whole and long ones need segments, as in real use.
+    """
+    rng = np.random.default_rng(seed)
+    lengths = np.arange(1, max_length + 1)
+    weights = np.exp(-0.5 * ((lengths - 4) / 1.6) ** 2)
+    weights /= weights.sum()
+    words = set(LETTERS)
+    while len(words) < count:
+        length = int(rng.choice(lengths, p=weights))
+        words.add("".join(LETTERS[i] for i in rng.integers(0, len(LETTERS), length)))
+    return sorted(words)
+
+
+def generate_word_db(db_path, pi_path, words):
+    """
+    Index words against the digit file at pi_path the way the indexer does
+    (first occurrence, or longest prefix of at least 2 characters).
+
+    :return: Number of rows written.
+    """
+    base32_words = [ascii_to_base32(word) for word in words]
+    pi_digits = PiDigits(pi_path)
+    try:
+        found = first_occurrences(base32_words, pi_digits)
+    finally:
+        pi_digits.close()
+    rows = [
+        (word, base32_word, position, len(found_string), is_exact_match)
+        for word, base32_word, (position, found_string, is_exact_match) in zip(words, base32_words, found)
+        if position != -1
+    ]
+    conn = sqlite3.connect(db_path)
+    try:
+        return bulk_upsert_word_positions(conn, rows)
+    finally:
+        conn.close()
+
+
+def build_corpus(directory, digits, word_count, seed=0):
+    """
+    Generate a synthetic digit file and word database in directory.
+
+    :return: (pi_path, db_path, words)
+    """
+    pi_path = os.path.join(directory, "pi_base32_synthetic.txt")
+    db_path = os.path.join(directory, "pi_words_synthetic.db")
+    generate_pi_file(pi_path, digits, seed)
+    words = generate_words(word_count, seed)
+    generate_word_db(db_path, pi_path, words)
+    return pi_path, db_path, words
+
+
+def generate_phrases(words, count, seed=0, max_words=6, unknown_rate=0.1):
+    """
+    Return count phrases of 1 to max_words words drawn from words; about
+    unknown_rate of the words are not in the vocabulary, so segmentation is
+    exercised too.
+    """
+    rng = np.random.default_rng(seed + 1)
+    phrases = []
+    for _ in range(count):
+        length = int(rng.integers(1, max_words + 1))
+        phrase = []
+        for _ in range(length):
+            if rng.random() < unknown_rate:
+                phrase.append("".join(LETTERS[i] for i in rng.integers(0, len(LETTERS), 11)))
+            else:
+                phrase.append(words[int(rng.integers(0, len(words)))])
+        phrases.append(" ".join(phrase))
+    return phrases
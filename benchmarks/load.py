@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import httpx
+
+from .micro import summarize
+
+
+async def _load(app, requests, concurrency):
+    """
+    Send every (path, payload) in requests to app from concurrency clients.
+
+    :return: (latencies of successful requests, error count, elapsed seconds)
+    """
+    latencies, errors = [], 0
+    pending = iter(requests)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+
+        async def worker():
+            nonlocal errors
+            for path, payload in pending:
+                start = time.perf_counter()
+                response = await client.post(path, json=payload)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_load(pi_path, db_path, phrases, concurrency_levels, requests):
+    """
+    Load-test /search and /decipher in-process through httpx's ASGI transport.
+
+    The app is pointed at the synthetic data and its caches are cleared
+    before every run; phrases are cycled, so use at least requests phrases
+    to keep the phrase cache cold.
+
+    :return: List of result dicts, one per endpoint and concurrency level.
+    """
+    from src import app as app_module
+    from src.search_service import process_search_request
+    from src.index_to_cipher import index_to_cipher
+
+    # Point the app at the synthetic data; indexes built for the real digit
+    # file would not match it
+    overrides = {
+        "DB_PATH": db_path,
+        "PI_DIGITS_PATH": pi_path,
+        "suffix_index": None,
+        "kgram_table": None,
+        "word_file": None,
+    }
+    saved = {name: getattr(app_module, name) for name in overrides}
+
+    ciphers = []
+    for phrase in phrases[: min(len(phrases), requests)]:
+        match = process_search_request(phrase, db_path)
+        if not isinstance(match, dict):
+            ciphers.append(index_to_cipher(match))
+    workloads = {
+        "/search": [("/search", {"input_string": phrases[i % len(phrases)]}) for i in range(requests)],
+        "/decipher": [("/decipher", {"input_string": ciphers[i % len(ciphers)]}) for i in range(requests)],
+    }
+
+    results = []
+    try:
+        for name, value in overrides.items():
+            setattr(app_module, name, value)
+        for endpoint, workload in workloads.items():
+            for concurrency in concurrency_levels:
+                app_module.phrase_cache.clear()
+                app_module.word_cache.clear()
+                latencies, errors, elapsed = asyncio.run(_load(app_module.app, workload, concurrency))
+                result = {"endpoint": endpoint, "concurrency": concurrency, "errors": errors}
+                result.update(summarize(latencies, elapsed))
+                result["req_per_s"] = result.pop("ops_per_s")
+                results.append(result)
+    finally:
+        for name, value in saved.items():
+            setattr(app_module, name, value)
+        app_module.phrase_cache.clear()
+        app_module.word_cache.clear()
+    return results
@@ -0,0 +1,64 @@
+import math
+import time
+
+from src.decipher import decipher, parse_input_string
+from src.index_to_cipher import index_to_cipher
+from src.search_service import process_search_request
+from src.utils.base32_converter import ascii_to_base32
+
+
+def percentile(samples, q):
+    """q-th percentile (0-100) of sorted samples, nearest rank."""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, math.ceil(q / 100 * len(samples)) - 1))
+    return samples[rank]
+
+
+def summarize(latencies, elapsed):
+    """Latency percentiles in milliseconds and throughput for one measurement."""
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "ops_per_s": len(latencies) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def measure(fn, inputs, iterations, warmup=10):
+    """
+    Time fn(input) for iterations calls, cycling through inputs.
+
+    :return: summarize() of the per-call latencies.
+    """
+    for i in range(min(warmup, iterations)):
+        fn(inputs[i % len(inputs)])
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_micro(pi_path, db_path, phrases, iterations):
+    """
+    Microbenchmark the search and cipher pipeline stage by stage.
+
+    :return: Dict of benchmark name -> measure() result.
+    """
+    matches = [process_search_request(phrase, db_path) for phrase in phrases]
+    matches = [match for match in matches if not isinstance(match, dict)]
+    ciphers = [index_to_cipher(match) for match in matches]
+    return {
+        "ascii_to_base32": measure(ascii_to_base32, phrases, iterations),
+        "process_search_request": measure(
+            lambda phrase: process_search_request(phrase, db_path), phrases, iterations
+        ),
+        "index_to_cipher": measure(index_to_cipher, matches, iterations),
+        "parse_input_string": measure(parse_input_string, ciphers, iterations),
+        "decipher": measure(lambda cipher: decipher(cipher, pi_path), ciphers, iterations),
+    }
@@ -0,0 +1,75 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from benchmarks.corpus import build_corpus, generate_phrases
+from benchmarks.load import run_load
+from benchmarks.micro import run_micro
+
+
+def run(digits, word_count, seed, iterations, concurrency_levels, requests, directory):
+    """Build the synthetic corpus in directory and run every benchmark; returns the report dict."""
+    started = time.perf_counter()
+    pi_path, db_path, words = build_corpus(directory, digits, word_count, seed)
+    setup_s = time.perf_counter() - started
+    phrases = generate_phrases(words, max(requests, iterations), seed)
+    return {
+        "config": {
+            "digits": digits,
+            "words": len(words),
+            "seed": seed,
+            "iterations": iterations,
+            "concurrency": concurrency_levels,
+            "requests": requests,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "setup_s": setup_s,
+        "micro": run_micro(pi_path, db_path, phrases, iterations),
+        "load": run_load(pi_path, db_path, phrases, concurrency_levels, requests),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search and decipher on a synthetic pi corpus.")
+    parser.add_argument("--digits", type=int, default=1_000_000, help="size of the synthetic base32 digit file")
+    parser.add_argument("--words", type=int, default=5000, help="vocabulary size of the synthetic word database")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=500, help="calls per microbenchmark")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated client counts for the load test")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint and concurrency level")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--keep", metavar="DIR", help="build the corpus in DIR and keep it")
+    parser.add_argument("--log-level", default="WARNING", help="per-request INFO logs dominate the timings")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(args.log_level)
+
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        report = run(args.digits, args.words, args.seed, args.iterations, concurrency_levels, args.requests, args.keep)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            report = run(
+                args.digits, args.words, args.seed, args.iterations, concurrency_levels, args.requests, directory
+            )
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.utils.kgram_table import DEFAULT_MAX_K, build_kgram_table, save_kgram_table
+from src.utils.pi_digits import open_pi_digits
+
+
+def main():
+    pi_file = sys.argv[1] if len(sys.argv) > 1 else "pi_base32_1b.txt"
+    table_file = sys.argv[2] if len(sys.argv) > 2 else pi_file.rsplit(".", 1)[0] + ".kgrams.npy"
+    max_k = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_MAX_K
+
+    if not os.path.exists(pi_file):
+        sys.exit(f"{pi_file} not found")
+
+    pi_digits = open_pi_digits(pi_file)
+    print(f"Loaded {len(pi_digits)} digits of pi")
+
+    start = time.time()
+    table = build_kgram_table(pi_digits, max_k)
+    save_kgram_table(table, table_file)
+    missing = int((table == -1).sum())
+    print(f"k-gram table (k <= {max_k}, {missing} grams never occur) saved to '{table_file}' in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
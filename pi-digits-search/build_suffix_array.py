@@ -0,0 +1,30 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.utils.pi_digits import open_pi_digits
+from src.utils.suffix_array import build_suffix_array, save_suffix_array
+
+
+def main():
+    pi_file = sys.argv[1] if len(sys.argv) > 1 else "pi_base32_1b.txt"
+    sa_file = sys.argv[2] if len(sys.argv) > 2 else pi_file.rsplit(".", 1)[0] + ".sa.npy"
+
+    if not os.path.exists(pi_file):
+        sys.exit(f"{pi_file} not found")
+
+    pi_digits = open_pi_digits(pi_file)
+    text = np.frombuffer(pi_digits.view(0, len(pi_digits)), dtype=np.uint8)
+    print(f"Loaded {len(text)} digits of pi")
+
+    start = time.time()
+    sa = build_suffix_array(text)
+    save_suffix_array(sa, sa_file)
+    print(f"Suffix array saved to '{sa_file}' in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
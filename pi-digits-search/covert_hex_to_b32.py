@@ -1,4 +1,20 @@
+import argparse
 import base64
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# 10 hex digits = 5 bytes = 8 base32 symbols, so chunks of a multiple of 10
+# hex digits encode independently and concatenate to the one-shot result.
+HEX_DIGITS_PER_GROUP = 10
+BASE32_PER_GROUP = 8
+DEFAULT_CHUNK_DIGITS = HEX_DIGITS_PER_GROUP * (1 << 20)
+
+# Bytes read from the input per call; only the decimal point and whitespace are skipped
+READ_SIZE = 1 << 22
+SKIPPED_BYTES = b". \t\r\n"
 
 
 def hex_to_base32(hex_string):
@@ -19,20 +35,129 @@ def hex_to_base32(hex_string):
     return base32_result
 
 
-def main():
-    hex_input = "".join(open("pi_hex_1b.txt", "r").readlines()).replace(".", "")
-    print(len(hex_input)," digits loaded")
-    print(hex_input[:10])
+def count_hex_digits(file_path):
+    """Count the hex digits in a file without loading it into memory."""
+    count = 0
+    with open(file_path, "rb") as file:
+        while block := file.read(READ_SIZE):
+            count += len(block.translate(None, SKIPPED_BYTES))
+    return count
 
-    try:
-        base32_result = hex_to_base32(hex_input)
 
-        # Write result to file
-        with open("base32.txt", "w") as file:
-            file.write(base32_result)
+def iter_hex_chunks(file_path, chunk_digits, skip_digits=0, pad=False):
+    """
+    Stream the hex digits of a file in chunks of exactly chunk_digits.
+
+    :param pad: Prepend a "0" so the digit count is even, as hex_to_base32 does.
+    :param skip_digits: Digits (including the pad) to drop from the front.
+    """
+    pending = bytearray(b"0" if pad else b"")
+    with open(file_path, "rb") as file:
+        while block := file.read(READ_SIZE):
+            pending += block.translate(None, SKIPPED_BYTES)
+            if skip_digits:
+                skipped = min(skip_digits, len(pending))
+                del pending[:skipped]
+                skip_digits -= skipped
+            while len(pending) >= chunk_digits:
+                yield bytes(pending[:chunk_digits])
+                del pending[:chunk_digits]
+    if pending:
+        yield bytes(pending)
+
+
+def encode_chunk(hex_chunk):
+    """Encode one aligned chunk of hex digits as base32 symbols."""
+    return base64.b32encode(bytes.fromhex(hex_chunk.decode("ascii")))
+
+
+def base32_length(hex_digits):
+    """Length of the padded base32 output for an even number of hex digits."""
+    return -(-(hex_digits // 2) // 5) * BASE32_PER_GROUP
+
+
+def convert_hex_file(hex_path, output_path, chunk_digits=DEFAULT_CHUNK_DIGITS, workers=1, resume=False):
+    """
+    Convert a hex digit file to base32 in constant memory.
+
+    The output is byte-for-byte what hex_to_base32 produces for the whole
+    file. With resume=True, conversion continues after the last complete
+    8-symbol group already in output_path.
 
-        print(f"Base32 representation has been saved to 'base32.txt'")
-        print(f"Digits in Base32 representation: {len(base32_result)}")
+    :param workers: Number of processes encoding chunks in parallel.
+    :return: Number of base32 symbols in the output file.
+    """
+    if chunk_digits % HEX_DIGITS_PER_GROUP:
+        raise ValueError(f"chunk_digits must be a multiple of {HEX_DIGITS_PER_GROUP}")
+
+    total_digits = count_hex_digits(hex_path)
+    pad = total_digits % 2 != 0
+    total_digits += pad
+    expected_length = base32_length(total_digits)
+
+    written = 0
+    if resume and os.path.exists(output_path):
+        written = os.path.getsize(output_path)
+        if written == expected_length:
+            print(f"'{output_path}' is already complete")
+            return written
+        written -= written % BASE32_PER_GROUP
+    done_digits = written // BASE32_PER_GROUP * HEX_DIGITS_PER_GROUP
+
+    chunks = iter_hex_chunks(hex_path, chunk_digits, skip_digits=done_digits, pad=pad)
+    resumed_at = written
+    start = time.time()
+    with open(output_path, "r+b" if written else "wb") as output:
+        output.truncate(written)
+        output.seek(written)
+        for encoded in _encode_chunks(chunks, workers):
+            output.write(encoded)
+            written += len(encoded)
+            output.flush()
+            rate = (written - resumed_at) / BASE32_PER_GROUP * HEX_DIGITS_PER_GROUP / max(time.time() - start, 1e-9)
+            print(
+                f"Converted {written}/{expected_length} symbols ({written / expected_length:.1%}, {rate / 1e6:.1f}M hex digits/s)",
+                end="\r",
+            )
+    print()
+    return written
+
+
+def _encode_chunks(chunks, workers):
+    """Encode chunks in order, keeping at most 2 * workers chunks in flight."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield encode_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(encode_chunk, chunk))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pi hex digits to base32.")
+    parser.add_argument("hex_file", nargs="?", default="pi_hex_1b.txt")
+    parser.add_argument("output_file", nargs="?", default="base32.txt")
+    parser.add_argument("--workers", type=int, default=1, help="encode chunks in this many processes")
+    parser.add_argument("--chunk-digits", type=int, default=DEFAULT_CHUNK_DIGITS)
+    parser.add_argument("--resume", action="store_true", help="continue a partially written output file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.hex_file):
+        sys.exit(f"{args.hex_file} not found")
+
+    try:
+        count = convert_hex_file(
+            args.hex_file, args.output_file, args.chunk_digits, args.workers, args.resume
+        )
+        print(f"Base32 representation has been saved to '{args.output_file}'")
+        print(f"Digits in Base32 representation: {count}")
 
     except ValueError as e:
         print(f"Error: {e}")
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.database.schema import COLUMNS, table_exists
+from src.database.word_file import build_word_file
+
+
+def export_word_file(db_path, word_file):
+    """
+    Write the word_positions rows and stored occurrences of db_path as a
+    perfect-hash word file (see word_file).
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        # First row per word, as migrate() keeps it, in case the table predates the unique index
+        rows = conn.execute(
+            f"SELECT {COLUMNS} FROM word_positions WHERE rowid IN "
+            "(SELECT MIN(rowid) FROM word_positions GROUP BY word) ORDER BY rowid"
+        ).fetchall()
+        occurrences = {}
+        if table_exists(conn, "word_occurrences"):
+            for word, position in conn.execute(
+                "SELECT word, position FROM word_occurrences ORDER BY word, position"
+            ):
+                occurrences.setdefault(word, []).append(position)
+    finally:
+        conn.close()
+    return build_word_file(rows, word_file, occurrences)
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "pi_words.db"
+    word_file = sys.argv[2] if len(sys.argv) > 2 else db_path.rsplit(".", 1)[0] + ".mph"
+
+    if not os.path.exists(db_path):
+        sys.exit(f"{db_path} not found")
+
+    start = time.time()
+    count = export_word_file(db_path, word_file)
+    size = os.path.getsize(word_file)
+    print(f"{count} words ({size} bytes) exported to '{word_file}' in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
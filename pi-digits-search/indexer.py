@@ -1,10 +1,16 @@
+import argparse
 import polars as pl
+import re
 import sqlite3
 import os
 import sys
+from collections import Counter
 
-# Load words from CSV
-words = pl.read_csv("letters.csv", has_header=False, new_columns=["word"])
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.database.schema import MAX_PHRASE_WORDS, bulk_replace_word_occurrences, bulk_upsert_word_positions
+from src.utils.aho_corasick import AhoCorasick, first_occurrences, top_occurrences
+from src.utils.bbp import SpigotPiDigits, estimated_seconds
+from src.utils.pi_digits import open_pi_digits
 
 
 # Define optimized functions directly instead of importing
@@ -16,16 +22,9 @@ def ensure_pi_digits(num_digits=1000000):
     return pi_file
 
 
-def load_pi_digits(file_path, max_digits=None):
-    """Load pi digits from a file, optionally limiting the number of digits."""
-    with open(file_path, "r") as file:
-        content = file.read().replace(".", "")
-        return content[:max_digits] if max_digits else content
-
-
 def ascii_to_base32(text):
     """Convert text to base32 representation with special character mapping."""
-    mapping = {"!": "2", "?": "3", ",": "4", ".": "5", "-": "6", ";": "7"}
+    mapping = {"!": "2", "?": "3", ",": "4", ".": "5", "-": "6", ";": "7", " ": "7"}
     formatted_text = text.upper()
     return "".join(mapping.get(c, c) for c in formatted_text)
 
@@ -52,66 +51,237 @@ def find_in_pi(search_string, pi_digits):
     return (-1, "", False)
 
 
-# Create SQLite database connection
-db_path = os.path.join(os.path.dirname(__file__), "pi_words.db")
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+def find_all_in_pi(search_string, pi_digits, k):
+    """Return the first k positions of search_string in pi digits."""
+    positions = []
+    pos = pi_digits.find(search_string)
+    while pos != -1 and len(positions) < k:
+        positions.append(pos)
+        pos = pi_digits.find(search_string, pos + 1)
+    return positions
+
+
+def load_words(csv_path):
+    """Load the vocabulary from a one-column CSV, skipping empty entries."""
+    words = pl.read_csv(csv_path, has_header=False, new_columns=["word"])
+    return [
+        row["word"]
+        for row in words.iter_rows(named=True)
+        if row["word"] and not row["word"].isspace()
+    ]
+
+
+# Tokens the search endpoint accepts: letters with attached punctuation
+PHRASE_TOKEN = re.compile(r"[a-z!?.,;\-]+")
 
-# Create table if it doesn't exist - add is_exact_match column
-cursor.execute(
+# Longer base32 strings are unlikely to occur in the first billion digits
+# (a given 6-symbol string does with ~63% probability, a 7-symbol one ~3%)
+MAX_PHRASE_LENGTH = 7
+
+
+def load_phrases(corpus_path, top=5000, min_count=2, max_length=MAX_PHRASE_LENGTH):
     """
-CREATE TABLE IF NOT EXISTS word_positions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    word TEXT NOT NULL,
-    base32_representation TEXT NOT NULL,
-    position INTEGER NOT NULL,
-    found_length INTEGER NOT NULL,
-    is_exact_match BOOLEAN NOT NULL
-)
-"""
-)
-conn.commit()
-
-# Ensure we have pi digits and load them
-pi_file = ensure_pi_digits()
-pi_digits = load_pi_digits(pi_file)
-print(f"Loaded {len(pi_digits)} digits of pi")
-
-# Process each word and find its position in pi
-total_words = len(words)
-for i, row in enumerate(words.iter_rows(named=True)):
-    word = row["word"]
-
-    # Skip if word is empty or None
-    if not word or word.isspace():
-        continue
-
-    # Convert to base32 representation
-    base32_string = ascii_to_base32(word)
-
-    print(
-        f"Processing {i+1}/{total_words}: '{word}' (base32: {base32_string})\t\t\t\t", end="\r"
-    )
+    Count the word bigrams and trigrams of a text corpus.
+
+    Words are lowercased and split on whitespace exactly like search input,
+    so a phrase's spaces and punctuation end up in its base32 form.
+    Returns the top most frequent phrases seen at least min_count times.
+    """
+    counts = Counter()
+    with open(corpus_path, encoding="utf-8") as corpus:
+        for line in corpus:
+            tokens = line.lower().split()
+            for n in range(2, MAX_PHRASE_WORDS + 1):
+                for i in range(len(tokens) - n + 1):
+                    gram = tokens[i : i + n]
+                    if all(PHRASE_TOKEN.fullmatch(token) for token in gram):
+                        counts[" ".join(gram)] += 1
+    return [
+        phrase
+        for phrase, count in counts.most_common()
+        if count >= min_count and len(phrase) <= max_length
+    ][:top]
 
-    # Find position in pi digits
-    position, found_string, is_exact_match = find_in_pi(base32_string, pi_digits)
 
-    if position != -1:
-        # Insert into database with is_exact_match flag
-        cursor.execute(
-            "INSERT INTO word_positions (word, base32_representation, position, found_length, is_exact_match) VALUES (?, ?, ?, ?, ?)",
-            (word, base32_string, position, len(found_string), is_exact_match),
+def index_words(words, pi_digits, engine="aho", workers=1):
+    """
+    Locate every word in pi.
+
+    The "aho" engine streams pi once through an Aho-Corasick automaton over
+    all words and their prefixes, split into overlapping shards across
+    workers processes; "find" scans pi once per word and prefix.
+    Returns a list of (word, base32, position, found_string, is_exact_match).
+    """
+    base32_words = [ascii_to_base32(word) for word in words]
+
+    if engine == "aho":
+        total = len(pi_digits)
+
+        def progress(position):
+            print(f"Scanned {position}/{total} digits ({position / total:.1%})\t\t", end="\r")
+
+        found = first_occurrences(base32_words, pi_digits, progress=progress, workers=workers)
+        print()
+    else:
+        found = []
+        for i, base32_string in enumerate(base32_words):
+            print(
+                f"Processing {i+1}/{len(words)}: '{words[i]}' (base32: {base32_string})\t\t\t\t", end="\r"
+            )
+            found.append(find_in_pi(base32_string, pi_digits))
+
+    return [
+        (word, base32_string, position, found_string, is_exact_match)
+        for word, base32_string, (position, found_string, is_exact_match) in zip(words, base32_words, found)
+    ]
+
+
+# index_beyond refuses windows estimated to take longer than this
+MAX_EXTEND_SECONDS = 3600
+
+
+def check_extend(pi_digits, digits, workers=1, max_seconds=MAX_EXTEND_SECONDS):
+    """
+    Estimate how long index_beyond takes to compute digits digits past pi_digits.
+
+    :return: Estimated seconds.
+    :raises ValueError: If that is over max_seconds.
+    """
+    estimate = estimated_seconds(len(pi_digits), digits, workers)
+    if estimate > max_seconds:
+        raise ValueError(
+            f"Computing {digits} digits past position {len(pi_digits)} would take about "
+            f"{estimate / 3600:.1f} hours (limit {max_seconds / 3600:.1f})"
         )
+    return estimate
+
+
+def index_beyond(results, pi_digits, digits, workers=1, chunk_size=4096, max_seconds=MAX_EXTEND_SECONDS):
+    """
+    Look for the words pi_digits has no exact match for in the next digits
+    digits of pi, computed with the BBP spigot instead of read from disk.
+
+    One spigot evaluation at offset d takes about d * SECONDS_PER_TERM (~45
+    minutes at 1e9) and yields ~8 base32 digits, so a chunk of chunk_size
+    digits costs chunk_size / 8 evaluations. Only small windows near small
+    offsets are practical. Returns results with exact matches found there replaced.
+
+    :raises ValueError: If the window is estimated to take over max_seconds.
+    """
+    missing = [i for i, result in enumerate(results) if not result[4]]
+    if not missing or digits <= 0:
+        return results
+    estimate = check_extend(pi_digits, digits, workers, max_seconds)
+    print(f"Computing {digits} digits past the file, about {estimate / 60:.1f} minutes")
+    automaton = AhoCorasick([results[i][1] for i in missing])
+    spigot = SpigotPiDigits(len(pi_digits) + digits, base=pi_digits, workers=workers)
+    # Start early enough to catch words straddling the end of the file
+    start = max(0, len(pi_digits) - (max(automaton.depth) - 1))
+
+    def chunks():
+        for position, chunk in spigot.iter_chunks(chunk_size, start=start):
+            yield position, chunk
+            print(f"Computed {position + len(chunk) - len(pi_digits)}/{digits} digits past the file\t\t", end="\r")
+
+    first = automaton.scan(chunks())
+    print()
+    results = list(results)
+    for i in missing:
+        word, base32_string = results[i][:2]
+        node = automaton.node(base32_string)
+        if node > 0 and first[node] != -1:
+            results[i] = (word, base32_string, first[node], base32_string, True)
+    return results
+
+
+def index_occurrences(words, pi_digits, k, engine="aho", workers=1):
+    """
+    Locate the first k exact occurrences of every word in pi.
+    Returns a list of (word, [positions]).
+    """
+    base32_words = [ascii_to_base32(word) for word in words]
+    if engine == "aho":
+        total = len(pi_digits)
+
+        def progress(position):
+            print(f"Scanned {position}/{total} digits ({position / total:.1%})\t\t", end="\r")
 
-        if (i + 1) % 100 == 0:  # Commit every 100 words
-            conn.commit()
-            print(f"Committed {i+1} words to database\n")
+        found = top_occurrences(base32_words, pi_digits, k, progress=progress, workers=workers)
+        print()
     else:
-        print(f" Error: Could not find '{word}' in pi digits")
+        found = [find_all_in_pi(base32_string, pi_digits, k) for base32_string in base32_words]
+    return list(zip(words, found))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index words by their position in pi.")
+    parser.add_argument("words_csv", nargs="?", default="letters.csv")
+    parser.add_argument("--engine", choices=["aho", "find"], default="aho")
+    parser.add_argument("--workers", type=int, default=1, help="scan shards of pi in this many processes")
+    parser.add_argument("--phrases", metavar="CORPUS", help="also index frequent bigrams and trigrams of this text file")
+    parser.add_argument("--top-phrases", type=int, default=5000)
+    parser.add_argument("--min-phrase-count", type=int, default=2)
+    parser.add_argument("--top-k", type=int, default=1, help="also store up to this many occurrences per word")
+    parser.add_argument(
+        "--extend",
+        type=int,
+        default=0,
+        metavar="DIGITS",
+        help="look for words missing from the file in this many computed digits past its end "
+        "(serve them with PI_SEARCH_SPIGOT_DIGITS)",
+    )
+    args = parser.parse_args()
+
+    words = load_words(args.words_csv)
+    phrases = set()
+    if args.phrases:
+        phrases = set(load_phrases(args.phrases, args.top_phrases, args.min_phrase_count)) - set(words)
+        print(f"Indexing {len(phrases)} phrases from {args.phrases}")
+        words += sorted(phrases)
+
+    # Ensure we have pi digits and load them
+    pi_file = ensure_pi_digits()
+    pi_digits = open_pi_digits(pi_file)
+    print(f"Loaded {len(pi_digits)} digits of pi")
+    if args.extend:
+        try:
+            check_extend(pi_digits, args.extend, args.workers)
+        except ValueError as e:
+            parser.error(str(e))
+
+    # Find every word's position in pi
+    total_words = len(words)
+    results = index_words(words, pi_digits, args.engine, args.workers)
+    if args.extend:
+        results = index_beyond(results, pi_digits, args.extend, args.workers)
+
+    rows = []
+    for word, base32_string, position, found_string, is_exact_match in results:
+        if word in phrases and not is_exact_match:
+            # Only a whole phrase saves segments; a prefix of one never does
+            continue
+        if position != -1:
+            rows.append((word, base32_string, position, len(found_string), is_exact_match))
+        else:
+            print(f" Error: Could not find '{word}' in pi digits")
+
+    occurrences = []
+    if args.top_k > 1:
+        # Alternatives for the exact matches let search keep a message on few pages of pi
+        exact_words = [row[0] for row in rows if row[4]]
+        occurrences = index_occurrences(exact_words, pi_digits, args.top_k, args.engine, args.workers)
+
+    # Bulk load into SQLite; re-indexed words are updated in place, never duplicated
+    db_path = os.path.join(os.path.dirname(__file__), "pi_words.db")
+    conn = sqlite3.connect(db_path)
+    try:
+        written = bulk_upsert_word_positions(conn, rows)
+        if occurrences:
+            written += bulk_replace_word_occurrences(conn, occurrences)
+    finally:
+        conn.close()
+    print(f"Indexing complete. All {total_words} words processed, {written} rows written.")
 
-# Final commit
-conn.commit()
-print(f"Indexing complete. All {total_words} words processed.")
 
-# Close connection
-conn.close()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.database.schema import explain_query_plans, full_table_scans, migrate
+
+
+def migrate_db(db_path):
+    """
+    Upgrade a pi_words database in place and print the query plans of the
+    search queries. Returns False if any of them still scans the whole table.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        before, after = migrate(conn)
+        count = conn.execute("SELECT COUNT(*) FROM word_positions").fetchone()[0]
+        print(f"{db_path}: schema version {before} -> {after}, {count} rows")
+        for name, details in explain_query_plans(conn).items():
+            print(f"  {name}: {'; '.join(details)}")
+        scans = full_table_scans(conn)
+        if scans:
+            print(f"  Warning: full table scan in {', '.join(scans)}")
+        return not scans
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or ["pi_words.db"]
+    ok = all([migrate_db(path) for path in paths])
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,23 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.utils.packed_digits import pack_base32_file
+
+
+def main():
+    source_file = sys.argv[1] if len(sys.argv) > 1 else "pi_base32_1b.txt"
+    packed_file = sys.argv[2] if len(sys.argv) > 2 else source_file.rsplit(".", 1)[0] + ".b32p"
+
+    if not os.path.exists(source_file):
+        sys.exit(f"{source_file} not found")
+
+    start = time.time()
+    count = pack_base32_file(source_file, packed_file)
+    print(f"Packed {count} base32 digits into '{packed_file}' in {time.time() - start:.1f}s")
+    print(f"Size: {os.path.getsize(source_file)} -> {os.path.getsize(packed_file)} bytes")
+
+
+if __name__ == "__main__":
+    main()
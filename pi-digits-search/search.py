@@ -1,5 +1,8 @@
 import os
-import urllib.request
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.utils.pi_digits import open_pi_digits
 
 
 def ensure_pi_digits(num_digits=1000000):
@@ -15,15 +18,6 @@ def ensure_pi_digits(num_digits=1000000):
     return pi_file
 
 
-def load_pi_digits(file_path, max_digits=None):
-    """
-    Load pi digits from a file, skipping the decimal point.
-    """
-    with open(file_path, "r") as file:
-        content = file.read().replace(".", "")  # Remove decimal point
-        return content[:max_digits] if max_digits else content
-
-
 def ascii_to_base32(text):
     # Convert string to bytes, then to base32, then back to string
     mapping = { "!": "2", "?": "3", ",": "4", ".": "5", "-": "6"," ": "7"}
@@ -40,7 +34,7 @@ def find_in_pi(search_string, pi_digits):
     """
     idx = len(search_string)
     print(f"Searching for {search_string}")
-    print(pi_digits[:10])
+    print(pi_digits.read(0, 10))
     pos = -1
 
     while idx > 1:
@@ -64,7 +58,7 @@ def main():
     try:
         # Ensure we have pi digits and load them
         pi_file = ensure_pi_digits()
-        pi_digits = load_pi_digits(pi_file)
+        pi_digits = open_pi_digits(pi_file)
 
         print(f"Loaded {len(pi_digits)} digits of pi")
 
@@ -85,10 +79,9 @@ def main():
             if position != -1:
                 print(f"Found '{search_string}' at position {position} in pi digits")
                 # Get the actual matched substring with the correct case
-                matched_substring = pi_digits[position : position + len(search_string)]
-                print(
-                    f"Context: ...{pi_digits[max(0, position-10):position]}<{matched_substring}>..."
-                )
+                matched_substring = pi_digits.read(position, len(search_string))
+                context = pi_digits.read(max(0, position - 10), min(position, 10))
+                print(f"Context: ...{context}<{matched_substring}>...")
             else:
                 print(f"'{search_string}' was not found in the loaded pi digits")
 
@@ -1,23 +1,216 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from src.search_service import process_search_request
-from src.index_to_cipher import index_to_cipher
-from src.decipher import decipher,validate_input_string
+from typing import Literal
+from src.cache import ResultCache
+from src.concurrency import BlockingExecutor, Overloaded
+from src.metrics import (
+    REQUEST_QUERIES,
+    REQUEST_SECONDS,
+    cache_collector,
+    profiled,
+    registry,
+    request_scope,
+    span,
+)
+from src.search_service import process_batch_search_request, process_search_request
+from src.index_to_cipher import CIPHER_FORMATS
+from src.database.db_manager import get_db_manager
+from src.database.word_file import open_word_file
+from src.database.word_index import WordIndex
+from src.decipher import MAX_ENCODABLE_LENGTH, CipherError, decipher_segments, parse_input_string
+from src.utils.bbp import MAX_COMPUTED_DIGITS
+from src.utils.kgram_table import load_kgram_table
+from src.utils.suffix_array import load_suffix_index
+import json
 import logging
+import os
 import re
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+DB_PATH = "database/pi_words.db"
+PI_DIGITS_PATH = "static/pi_base32_1b.txt"
+
+# Set PI_SEARCH_PRELOAD=1 to serve /search from memory instead of SQLite
+PRELOAD_WORDS = os.environ.get("PI_SEARCH_PRELOAD", "0") == "1"
+
+# Most inputs /search/batch accepts per call, and inputs per streamed NDJSON chunk
+MAX_BATCH_SIZE = int(os.environ.get("PI_SEARCH_MAX_BATCH", 10000))
+STREAM_CHUNK_SIZE = 1000
+
+# Longest /search input (and /search/batch item); longer ones could encode to
+# ciphers that /decipher rejects
+MAX_SEARCH_INPUT_LENGTH = MAX_ENCODABLE_LENGTH
+
+# Positions past the end of the digit file that /decipher computes with the
+# BBP spigot; each costs time linear in its position, so this is off by default
+SPIGOT_DIGITS = int(os.environ.get("PI_SEARCH_SPIGOT_DIGITS", 0))
+# Most of those digits one request may compute (~8 per evaluation)
+SPIGOT_MAX_DIGITS = int(os.environ.get("PI_SEARCH_SPIGOT_MAX_DIGITS", MAX_COMPUTED_DIGITS))
+
+SEARCH_INPUT_RE = re.compile(r"[a-zA-Z !?.,;\\-]+")
+INVALID_CIPHER = "Invalid input string. Please provide a valid string."
+INPUT_TOO_LONG = f"Input strings are limited to {MAX_SEARCH_INPUT_LENGTH} characters."
+UNSUPPORTED_INPUT = "Functionality not supported for input containing non-alphabetic characters other than spaces."
+
+
+# SQLite and digit-file reads run here instead of on the event loop
+executor = BlockingExecutor.from_env()
+
+# Ciphers per normalised phrase and rows per word, keyed by the database version
+phrase_cache = ResultCache.from_env("phrase", maxsize=1024)
+word_cache = ResultCache.from_env("word", maxsize=8192)
+registry.add_collector(cache_collector([phrase_cache, word_cache]))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.word_index = WordIndex(DB_PATH) if PRELOAD_WORDS else None
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Optional suffix array over the pi digits (built by pi-digits-search/build_suffix_array.py)
+suffix_index = load_suffix_index(PI_DIGITS_PATH, "static/pi_base32_1b.sa.npy")
+
+# Optional first occurrences of every short base32 string (built by pi-digits-search/build_kgram_table.py)
+kgram_table = load_kgram_table("static/pi_base32_1b.kgrams.npy")
+
+# Optional memory-mapped perfect-hash copy of word_positions and
+# word_occurrences (exported by pi-digits-search/export_word_file.py); serves
+# /search unless PI_SEARCH_PRELOAD=1 and is remapped after a new export
+word_file = open_word_file(os.environ.get("PI_SEARCH_WORD_FILE", "database/pi_words.mph"))
+
+
+def data_version():
+    """Version of the word data that cache keys are tied to."""
+    if word_file is not None and not PRELOAD_WORDS:
+        return word_file.version
+    return get_db_manager(DB_PATH).version
+
+
+def normalize_phrase(input_string):
+    """Inputs that differ only in case or spacing share a cache entry."""
+    return " ".join(input_string.lower().split())
+
+
+@profiled("search")
+def search_and_encode(input_string, word_index=None, version=None, cipher_format="text"):
+    """Blocking part of /search: look the words up and build the cipher."""
+    if word_index is not None and version is not None:
+        # The phrase is cached under version, so search that snapshot
+        word_index.ensure_version(version)
+    with span("search.lookup"):
+        result = process_search_request(
+            input_string,
+            DB_PATH,
+            suffix_index=suffix_index,
+            word_index=word_index,
+            word_cache=word_cache,
+            kgram_table=kgram_table,
+            word_file=word_file,
+        )
+    if isinstance(result, dict):
+        # Raise instead of returning, so errors are never cached
+        raise RuntimeError(result["error"])
+    with span("search.encode"):
+        return CIPHER_FORMATS[cipher_format](result)
+
+
+@profiled("search_batch")
+def search_and_encode_batch(input_strings, word_index=None, version=None, cipher_format="text"):
+    """Blocking part of /search/batch: one {"encrypted_string"} or {"error"} per input."""
+    if word_index is not None and version is not None:
+        word_index.ensure_version(version)
+    results = [{"error": UNSUPPORTED_INPUT} for _ in input_strings]
+    supported = [i for i, text in enumerate(input_strings) if SEARCH_INPUT_RE.fullmatch(text)]
+    with span("search.lookup"):
+        matches = process_batch_search_request(
+            [input_strings[i] for i in supported],
+            DB_PATH,
+            suffix_index=suffix_index,
+            word_index=word_index,
+            word_cache=word_cache,
+            kgram_table=kgram_table,
+            word_file=word_file,
+        )
+    encode = CIPHER_FORMATS[cipher_format]
+    with span("search.encode"):
+        for i, match in zip(supported, matches):
+            results[i] = match if isinstance(match, dict) else {"encrypted_string": encode(match)}
+    return results
+
+
+async def stream_batch(input_strings, word_index, version, cipher_format):
+    """Yield NDJSON lines for /search/batch, resolving STREAM_CHUNK_SIZE inputs at a time."""
+    for start in range(0, len(input_strings), STREAM_CHUNK_SIZE):
+        chunk = input_strings[start : start + STREAM_CHUNK_SIZE]
+        try:
+            results = await executor.run(
+                search_and_encode_batch, chunk, word_index, version, cipher_format
+            )
+        except Exception as e:
+            # Headers are already sent, so report the failure per line
+            logger.error(f"Error processing batch chunk at {start}: {str(e)}")
+            results = [{"error": str(e)} for _ in chunk]
+        yield "".join(
+            json.dumps({"index": start + i, **result}) + "\n" for i, result in enumerate(results)
+        )
+
+
+@profiled("decipher")
+def decipher_parsed(parsed):
+    """Blocking part of /decipher: read and join already tokenized ciphers."""
+    return decipher_segments(parsed, PI_DIGITS_PATH, SPIGOT_DIGITS, SPIGOT_MAX_DIGITS)
+
+
+@profiled("decipher_batch")
+def decipher_batch(input_strings, cipher_format="text"):
+    """Blocking part of /decipher/batch: one {"deciphered_string"} or {"error"} per input."""
+    results = [{"error": INVALID_CIPHER} for _ in input_strings]
+    valid, parsed = [], []
+    with span("decipher.parse"):
+        for i, text in enumerate(input_strings):
+            try:
+                parsed.append(parse_input_string(text, cipher_format))
+                valid.append(i)
+            except CipherError as e:
+                logger.info(f"Invalid cipher at {i}: {e}")
+    deciphered = decipher_segments(parsed, PI_DIGITS_PATH, SPIGOT_DIGITS, SPIGOT_MAX_DIGITS)
+    for i, text in zip(valid, deciphered):
+        results[i] = {"deciphered_string": text}
+    return results
+
+
+def overloaded_error(e):
+    logger.warning(f"Rejecting request, executor overloaded: {e}")
+    return HTTPException(
+        status_code=503, detail="Server busy, please retry.", headers={"Retry-After": "1"}
+    )
+
+
+# "text" is the [position-length] bracket format, "compact" is base64url varints
+CipherFormat = Literal["text", "compact"]
 
 
 class SearchRequest(BaseModel):
     input_string: str
+    format: CipherFormat = "text"
 
 class DecipherRequest(BaseModel):
     input_string: str
+    format: CipherFormat = "text"
+
+
+class BatchDecipherRequest(BaseModel):
+    input_strings: list[str]
+    format: CipherFormat = "text"
 
 
 class SearchResponse(BaseModel):
@@ -26,6 +219,18 @@ class SearchResponse(BaseModel):
     message: str
 
 
+class BatchSearchRequest(BaseModel):
+    input_strings: list[str]
+    format: CipherFormat = "text"
+    # Stream results as NDJSON lines of {"index", "encrypted_string" or "error"}
+    stream: bool = False
+
+
+class BatchSearchResponse(BaseModel):
+    results: list[dict]
+    message: str
+
+
 @app.get("/")
 async def root():
     return {"message": "Pi Search API is running"}
@@ -39,52 +244,172 @@ async def search_for_string(request: SearchRequest, raw_request: Request):
         logger.info(f"Received request body: {body.decode()}")
 
         # Validate input string
-
-        logger.info(re.fullmatch(r"[a-zA-Z !?.,;\\-]+", request.input_string))
-        if not re.fullmatch(r"[a-zA-Z !?.,;\\-]+", request.input_string):
+        if len(request.input_string) > MAX_SEARCH_INPUT_LENGTH:
+            raise HTTPException(status_code=413, detail=INPUT_TOO_LONG)
+        with span("search.validate"):
+            supported = SEARCH_INPUT_RE.fullmatch(request.input_string)
+        logger.info(supported)
+        if not supported:
             logger.info(f"Unsupported input: {request.input_string}")
             raise HTTPException(
             status_code=400,
-            detail="Functionality not supported for input containing non-alphabetic characters other than spaces.",
+            detail=UNSUPPORTED_INPUT,
             )
 
         logger.info(f"Processing search request for: {request.input_string}")
 
-        result = process_search_request(request.input_string)
-        encrypted_string = index_to_cipher(result)
+        word_index = getattr(raw_request.app.state, "word_index", None)
+        version = data_version()
+        encrypted_string = await phrase_cache.get_or_compute_async(
+            (version, request.format, normalize_phrase(request.input_string)),
+            lambda: executor.run(
+                search_and_encode, request.input_string, word_index, version, request.format
+            ),
+        )
         # No need to extract indexes from the dictionary anymore
         # logger.info(f"Search completed. Found at indexes: {result}")
         # return SearchResponse( encrypted_string=encrypted_string, indexes=result, message="Search completed successfully.")
         return SearchResponse(
             encrypted_string=encrypted_string, message="Search completed successfully."
         )
+    except HTTPException:
+        raise
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         logger.error(f"Error processing search: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest, raw_request: Request):
+    if len(request.input_strings) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BATCH_SIZE} input strings per batch."
+        )
+    if any(len(text) > MAX_SEARCH_INPUT_LENGTH for text in request.input_strings):
+        raise HTTPException(status_code=413, detail=INPUT_TOO_LONG)
+    word_index = getattr(raw_request.app.state, "word_index", None)
+    version = data_version()
+    if request.stream:
+        return StreamingResponse(
+            stream_batch(request.input_strings, word_index, version, request.format),
+            media_type="application/x-ndjson",
+        )
+    try:
+        results = await executor.run(
+            search_and_encode_batch, request.input_strings, word_index, version, request.format
+        )
+        return BatchSearchResponse(results=results, message="Batch search completed.")
+    except Overloaded as e:
+        raise overloaded_error(e)
+    except Exception as e:
+        logger.error(f"Error processing batch search: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"phrase": phrase_cache.stats(), "word": word_cache.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latency histograms, SQL and fallback counters and cache stats in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/decipher")
 async def decipher_string(request: DecipherRequest):
     try:
-        if not validate_input_string(request.input_string):
+        # Tokenizing is linear and bounded, so it is cheap enough for the event loop
+        try:
+            with span("decipher.parse"):
+                segments = parse_input_string(request.input_string, request.format)
+        except CipherError as e:
+            logger.info(f"Invalid cipher: {e}")
             raise HTTPException(
                 status_code=400,
-                detail="Invalid input string. Please provide a valid string.",
+                detail=INVALID_CIPHER,
             )
-        deciphered_string = decipher(request.input_string)
-        return {"deciphered_string": deciphered_string}
+        deciphered = await executor.run(decipher_parsed, [segments])
+        return {"deciphered_string": deciphered[0]}
+    except HTTPException:
+        raise
+    except CipherError as e:
+        # Valid syntax, but it would compute too many spigot digits
+        logger.info(f"Rejected cipher: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         logger.error(f"Error deciphering string: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
-    
 
-# Add middleware to log all requests
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(f"Request path: {request.url.path}, method: {request.method}")
+
+@app.post("/decipher/batch")
+async def decipher_strings(request: BatchDecipherRequest):
+    if len(request.input_strings) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BATCH_SIZE} input strings per batch."
+        )
     try:
-        response = await call_next(request)
-        logger.info(f"Response status code: {response.status_code}")
-        return response
+        return {"results": await executor.run(decipher_batch, request.input_strings, request.format)}
+    except CipherError as e:
+        logger.info(f"Rejected batch: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
-        logger.error(f"Request error: {str(e)}")
-        raise
+        logger.error(f"Error deciphering batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Known paths, the only metrics labels besides "other"
+ROUTE_PATHS = frozenset(route.path for route in app.routes)
+
+
+def route_label(path):
+    """The path as a metrics label; unknown paths share one label to bound cardinality."""
+    return path if path in ROUTE_PATHS else "other"
+
+
+class RequestMetrics:
+    """
+    ASGI middleware that logs every HTTP request and records its latency and
+    SQL statement count once the whole response is sent, so streamed bodies
+    (/search/batch with stream) are included.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        logger.info(f"Request path: {scope['path']}, method: {method}")
+        path = route_label(scope["path"])
+        status = 500
+        start = time.perf_counter()
+
+        async def send_and_record_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                logger.info(f"Response status code: {status}")
+            await send(message)
+
+        with request_scope() as stats:
+            try:
+                await self.app(scope, receive, send_and_record_status)
+            except Exception as e:
+                logger.error(f"Request error: {str(e)}")
+                raise
+            finally:
+                REQUEST_SECONDS.observe(time.perf_counter() - start, method, path, str(status))
+                REQUEST_QUERIES.observe(stats.sql_queries, path)
+
+
+# Add middleware to log all requests
+app.add_middleware(RequestMetrics)
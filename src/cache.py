@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Bounded LRU cache with a time-to-live and single-flight computation.
+
+    Callers put the data version (see DBManager.version and WordIndex.version)
+    in the key, so results computed against an old database are never served
+    again and simply age out. Concurrent misses on the same key are coalesced:
+    the first caller computes the value and the others wait for its result.
+    Failures are passed to every waiting caller but never cached.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300.0, name="cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # In-flight computations: Futures for threads, Tasks for the event loop
+        self._calls = {}
+        self._tasks = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls, name, maxsize=1024):
+        """Size the cache from PI_SEARCH_<NAME>_CACHE_SIZE and PI_SEARCH_CACHE_TTL."""
+        maxsize = int(os.environ.get(f"PI_SEARCH_{name.upper()}_CACHE_SIZE", maxsize))
+        ttl = float(os.environ.get("PI_SEARCH_CACHE_TTL", 300.0))
+        logger.info(f"{name} cache: {maxsize} entries, {ttl}s TTL")
+        return cls(maxsize, ttl, name)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key):
+        """Return (found, value); must hold the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() at most once per miss."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                self.misses += 1
+                call = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return call.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            self.set(key, value)
+            call.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def get_or_compute_async(self, key, compute):
+        """
+        Coroutine version of get_or_compute for the event loop.
+
+        :param compute: Zero-argument function returning an awaitable.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            task = self._tasks.get(key)
+            if task is None:
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(self._compute_async(key, compute))
+        # One caller giving up must not cancel the computation for the others
+        return await asyncio.shield(task)
+
+    async def _compute_async(self, key, compute):
+        try:
+            value = await compute()
+            self.set(key, value)
+            return value
+        finally:
+            del self._tasks[key]
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,60 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised when more blocking calls are waiting than the executor accepts."""
+
+
+class BlockingExecutor:
+    """
+    Bounded thread pool for the blocking stages of a request (SQLite queries,
+    digit file reads), so they never run on the event loop.
+
+    At most max_workers calls run at once and at most max_pending are admitted
+    in total; beyond that run() fails fast with Overloaded instead of queueing
+    without limit.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pi-search")
+
+    @classmethod
+    def from_env(cls):
+        """Size the pool from PI_SEARCH_THREADS and PI_SEARCH_MAX_PENDING."""
+        max_workers = int(os.environ.get("PI_SEARCH_THREADS", min(32, (os.cpu_count() or 1) + 4)))
+        max_pending = int(os.environ.get("PI_SEARCH_MAX_PENDING", max_workers * 8))
+        logger.info(f"Blocking executor: {max_workers} threads, {max_pending} pending calls")
+        return cls(max_workers, max_pending)
+
+    @property
+    def pending(self):
+        return self._pending
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in the pool and await its result."""
+        # Only touched from the event loop thread, so no lock is needed
+        if self._pending >= self.max_pending:
+            raise Overloaded(f"{self._pending} requests already waiting")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Carry the caller's context along, so per-request metrics follow the call
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self._executor, context.run, functools.partial(func, *args, **kwargs)
+            )
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -1,50 +1,223 @@
+import functools
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+from ..metrics import count_sql
+from ..utils.character_index import CharacterIndex
+from .schema import (
+    MIN_TRIGRAM_QUERY,
+    SEARCH_INFIX_SQL,
+    SEARCH_PREFIX_SQL,
+    SEARCH_WORD_SQL,
+    SQLITE_MAX_PARAMS,
+    infix_phrase,
+    prefix_bounds,
+    search_occurrences_sql,
+    search_words_sql,
+    table_exists,
+)
+
+# Prepared statements kept per connection by the sqlite3 module
+CACHED_STATEMENTS = 256
+
+# Let SQLite read the database through a memory map instead of read() calls
+MMAP_SIZE = 256 * 1024 * 1024
+
 
 class DBManager:
-    def __init__(self, db_path):
+    """
+    Data-access layer for pi_words.db.
+
+    Holds a pool of read-only connections opened with mode=ro. They still take
+    SQLite's shared locks, so a query never reads pages the indexer or
+    migrate() is rewriting in place. Connections are borrowed per request and
+    returned afterwards, keeping their prepared statement caches warm. The
+    pool and everything derived from the file are dropped whenever the file's
+    mtime or size changes, so version always names what queries see.
+    """
+
+    def __init__(self, db_path, pool_size=8):
         self.db_path = db_path
-        self.connection = None
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._stamp = None
+        self._lock = threading.Lock()
+        # Derived from the current file, rebuilt lazily after it changes
+        self._has_trigrams = None
+        self._character_index = None
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _open(self):
+        """Open a new read-only connection."""
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        # Every statement counts towards the request's query total (see metrics)
+        conn.set_trace_callback(count_sql)
+        return conn
+
+    def _check_version(self):
+        """Drop pooled connections if the database file changed."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp != self._stamp:
+                self._drain()
+                self._has_trigrams = None
+                self._character_index = None
+                self._stamp = stamp
+
+    def _drain(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
 
-    def connect(self):
-        """Establish a database connection."""
-        if self.connection is None:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
+    @property
+    def version(self):
+        """Identifies the current database contents (file mtime and size)."""
+        self._check_version()
+        return self._stamp
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of a with block."""
+        self._check_version()
+        stamp = self._stamp
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            if stamp != self._stamp:
+                conn.close()
+            else:
+                try:
+                    self._pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
 
     def close(self):
-        """Close the database connection."""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        """Close all pooled connections."""
+        self._drain()
+
+    def search_word(self, word):
+        """Return the word_positions row for word, or [] if it is not indexed."""
+        with self.connection() as conn:
+            return conn.execute(SEARCH_WORD_SQL, (word,)).fetchone() or []
+
+    def search_words(self, words):
+        """Return the word_positions rows for many words, one query per SQLITE_MAX_PARAMS words."""
+        words = list(words)
+        results = []
+        with self.connection() as conn:
+            for start in range(0, len(words), SQLITE_MAX_PARAMS):
+                batch = words[start : start + SQLITE_MAX_PARAMS]
+                results.extend(conn.execute(search_words_sql(len(batch)), batch).fetchall())
+        return results
+
+    def search_occurrences(self, words):
+        """
+        Return the stored occurrences of many words as a dict of word -> list
+        of positions; empty if the database predates the word_occurrences table.
+        """
+        words = list(words)
+        occurrences = {}
+        if not words:
+            return occurrences
+        with self.connection() as conn:
+            if not table_exists(conn, "word_occurrences"):
+                return occurrences
+            for start in range(0, len(words), SQLITE_MAX_PARAMS):
+                batch = words[start : start + SQLITE_MAX_PARAMS]
+                for word, position in conn.execute(search_occurrences_sql(len(batch)), batch):
+                    occurrences.setdefault(word, []).append(position)
+        return occurrences
 
     def get_words(self):
         """Retrieve all words from the database."""
-        self.connect()
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT word FROM words")
-        words = cursor.fetchall()
-        return [row['word'] for row in words]
+        with self.connection() as conn:
+            return [row[0] for row in conn.execute("SELECT word FROM word_positions")]
 
     def find_full_matches(self, search_string):
         """Find full matches for the search string."""
-        self.connect()
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT word FROM words WHERE word = ?", (search_string,))
-        return [row['word'] for row in cursor.fetchall()]
+        with self.connection() as conn:
+            return [
+                row[0]
+                for row in conn.execute(
+                    "SELECT word FROM word_positions WHERE word = ? AND is_exact_match = 1",
+                    (search_string,),
+                )
+            ]
+
+    def find_prefix_matches(self, search_string):
+        """Find the longest exact-match words starting with the search string."""
+        with self.connection() as conn:
+            return conn.execute(SEARCH_PREFIX_SQL, prefix_bounds(search_string)).fetchall()
+
+    def has_trigrams(self):
+        """Whether the database has the word_trigrams index (schema version 4)."""
+        self._check_version()
+        if self._has_trigrams is None:
+            with self.connection() as conn:
+                self._has_trigrams = table_exists(conn, "word_trigrams")
+        return self._has_trigrams
+
+    def _characters(self):
+        """
+        Return (words, CharacterIndex over the lowercased words), built once
+        per database version; lowercase so matches ignore case as LIKE does.
+        """
+        self._check_version()
+        index = self._character_index
+        if index is None:
+            # Concurrent first calls may both build it; they build the same thing
+            with self.connection() as conn:
+                words = [row[0] for row in conn.execute("SELECT word FROM word_positions ORDER BY rowid")]
+            index = self._character_index = (words, CharacterIndex(word.lower() for word in words))
+        return index
 
     def find_partial_matches(self, search_string):
-        """Find partial matches for the search string."""
-        self.connect()
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT word FROM words WHERE word LIKE ?", ('%' + search_string + '%',))
-        return [row['word'] for row in cursor.fetchall()]
+        """
+        Find the words containing the search string literally (% and _ are
+        not wildcards), ignoring case.
+
+        Uses the word_trigrams index when the database has it and the string
+        is long enough for a trigram, the in-memory CharacterIndex otherwise.
+        """
+        if len(search_string) >= MIN_TRIGRAM_QUERY and self.has_trigrams():
+            with self.connection() as conn:
+                return [row[0] for row in conn.execute(SEARCH_INFIX_SQL, (infix_phrase(search_string),))]
+        words, index = self._characters()
+        return [words[i] for i in index.containing(search_string.lower())]
 
     def find_character_matches(self, search_string):
-        """Find character-wise matches for the search string."""
-        self.connect()
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT word FROM words WHERE word LIKE ?", ('%' + ''.join(search_string) + '%',))
-        return [row['word'] for row in cursor.fetchall()]
+        """Find the words containing every character of the search string in any order, ignoring case."""
+        words, index = self._characters()
+        return [words[i] for i in index.with_characters("".join(search_string).lower())]
 
     def __del__(self):
-        self.close()
\ No newline at end of file
+        self.close()
+
+
+@functools.lru_cache(maxsize=None)
+def get_db_manager(db_path):
+    """Return the process-wide DBManager for db_path."""
+    return DBManager(db_path)
@@ -0,0 +1,297 @@
+# Bumped whenever migrate() learns a new step; stored in PRAGMA user_version
+SCHEMA_VERSION = 4
+
+WORD_POSITIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS word_positions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    word TEXT NOT NULL,
+    base32_representation TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    found_length INTEGER NOT NULL,
+    is_exact_match BOOLEAN NOT NULL
+)
+"""
+
+WORD_POSITIONS_INDEXES = (
+    # Exact lookups and the upsert target
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_word_positions_word ON word_positions (word)",
+    # Covers the exact-match prefix query without touching the table
+    "CREATE INDEX IF NOT EXISTS idx_word_positions_exact_prefix ON word_positions "
+    "(is_exact_match, word, base32_representation, position, found_length)",
+)
+
+# Up to K exact occurrences per word, so search can pick nearby positions
+WORD_OCCURRENCES_TABLE = """
+CREATE TABLE IF NOT EXISTS word_occurrences (
+    word TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (word, position)
+) WITHOUT ROWID
+"""
+
+# Trigram full-text index over word_positions.word for infix (LIKE '%x%')
+# queries; external content, so only the index itself is stored
+WORD_TRIGRAMS_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS word_trigrams USING fts5(
+    word,
+    content = 'word_positions',
+    content_rowid = 'id',
+    tokenize = 'trigram'
+)
+"""
+
+# Keep word_trigrams in step with every write to word_positions
+WORD_TRIGRAMS_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS word_trigrams_insert AFTER INSERT ON word_positions BEGIN "
+    "INSERT INTO word_trigrams (rowid, word) VALUES (new.id, new.word); END",
+    "CREATE TRIGGER IF NOT EXISTS word_trigrams_delete AFTER DELETE ON word_positions BEGIN "
+    "INSERT INTO word_trigrams (word_trigrams, rowid, word) VALUES ('delete', old.id, old.word); END",
+    "CREATE TRIGGER IF NOT EXISTS word_trigrams_update AFTER UPDATE OF id, word ON word_positions BEGIN "
+    "INSERT INTO word_trigrams (word_trigrams, rowid, word) VALUES ('delete', old.id, old.word); "
+    "INSERT INTO word_trigrams (rowid, word) VALUES (new.id, new.word); END",
+)
+
+# The trigram tokenizer needs at least three characters to use the index
+MIN_TRIGRAM_QUERY = 3
+
+COLUMNS = "id, word, base32_representation, position, found_length, is_exact_match"
+
+SEARCH_WORD_SQL = f"SELECT {COLUMNS} FROM word_positions WHERE word = ?"
+
+# A quoted trigram phrase matches its text literally and ignores case; LIKE
+# would treat % and _ as wildcards, and LIKE ... ESCAPE bypasses the index
+SEARCH_INFIX_SQL = "SELECT word FROM word_trigrams WHERE word_trigrams MATCH ? ORDER BY rowid"
+
+# A range instead of LIKE 'prefix%' so SQLite can seek in the covering index
+SEARCH_PREFIX_SQL = (
+    f"SELECT {COLUMNS} FROM word_positions "
+    "WHERE is_exact_match = 1 AND word >= ? AND word < ? "
+    "ORDER BY length(word) DESC LIMIT 3"
+)
+
+UPSERT_WORD_POSITION = """
+INSERT INTO word_positions (word, base32_representation, position, found_length, is_exact_match)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (word) DO UPDATE SET
+    base32_representation = excluded.base32_representation,
+    position = excluded.position,
+    found_length = excluded.found_length,
+    is_exact_match = excluded.is_exact_match
+"""
+
+# Trade durability for speed while (re)loading; a crash means rerunning the indexer
+BULK_LOAD_PRAGMAS = (
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+)
+
+BULK_BATCH_SIZE = 50000
+
+# Bound on host parameters per statement (SQLite's historical default limit)
+SQLITE_MAX_PARAMS = 999
+
+# Longest run of words indexed and looked up as one phrase ("of the", "how are you")
+MAX_PHRASE_WORDS = 3
+
+
+def search_words_sql(count):
+    """SELECT for the rows of count words at once (WHERE word IN (...))."""
+    return f"SELECT {COLUMNS} FROM word_positions WHERE word IN ({', '.join('?' * count)})"
+
+
+def search_occurrences_sql(count):
+    """SELECT for the stored occurrences of count words at once."""
+    return (
+        "SELECT word, position FROM word_occurrences "
+        f"WHERE word IN ({', '.join('?' * count)}) ORDER BY word, position"
+    )
+
+
+def infix_phrase(text):
+    """SEARCH_INFIX_SQL argument matching text (at least MIN_TRIGRAM_QUERY characters) anywhere in a word."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def prefix_bounds(prefix):
+    """Return (low, high) such that low <= word < high selects words starting with prefix."""
+    return (prefix, prefix + "\U0010ffff")
+
+
+def remove_duplicate_words(conn):
+    """
+    Delete all but the first row for every word.
+
+    :return: Number of rows deleted.
+    """
+    cursor = conn.execute(
+        "DELETE FROM word_positions WHERE rowid NOT IN "
+        "(SELECT MIN(rowid) FROM word_positions GROUP BY word)"
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def table_exists(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+def _rebuild_word_positions(conn):
+    """
+    Copy a legacy word_positions table into the current layout.
+
+    Keeps the first row per word and its id; rows with a missing or repeated
+    id get a fresh one.
+    """
+    conn.execute(WORD_POSITIONS_TABLE.replace("word_positions", "word_positions_new", 1))
+    used_ids = set()
+    rows = []
+    for row in conn.execute(
+        f"SELECT {COLUMNS} FROM word_positions WHERE rowid IN "
+        "(SELECT MIN(rowid) FROM word_positions GROUP BY word) ORDER BY rowid"
+    ):
+        row_id = row[0] if row[0] is not None and row[0] not in used_ids else None
+        used_ids.add(row_id)
+        rows.append((row_id,) + row[1:])
+    # Explicit ids first so the fresh ones cannot collide with them
+    rows.sort(key=lambda row: row[0] is None)
+    conn.executemany(f"INSERT INTO word_positions_new ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.execute("DROP TABLE word_positions")
+    if table_exists(conn, "sqlite_sequence"):
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'word_positions'")
+    conn.execute("ALTER TABLE word_positions_new RENAME TO word_positions")
+
+
+def migrate(conn):
+    """
+    Bring a pi_words database up to SCHEMA_VERSION in place.
+
+    Runs in a single transaction, so an interrupted migration leaves the old
+    table untouched.
+
+    :return: (version before, version after)
+    """
+    before = schema_version(conn)
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not table_exists(conn, "word_positions"):
+            conn.execute(WORD_POSITIONS_TABLE)
+        elif before < 2:
+            _rebuild_word_positions(conn)
+        for statement in WORD_POSITIONS_INDEXES:
+            conn.execute(statement)
+        conn.execute(WORD_OCCURRENCES_TABLE)
+        conn.execute(WORD_TRIGRAMS_TABLE)
+        for statement in WORD_TRIGRAMS_TRIGGERS:
+            conn.execute(statement)
+        if before < SCHEMA_VERSION:
+            # Rows written before the triggers existed
+            conn.execute("INSERT INTO word_trigrams (word_trigrams) VALUES ('rebuild')")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return before, SCHEMA_VERSION
+
+
+def ensure_word_positions(conn):
+    """Create or upgrade the tables so that word is unique and indexed."""
+    if schema_version(conn) < SCHEMA_VERSION or not table_exists(conn, "word_positions"):
+        migrate(conn)
+
+
+def explain_query_plans(conn):
+    """
+    Run EXPLAIN QUERY PLAN for the queries the search service issues.
+
+    :return: Dict of query name -> list of plan detail strings.
+    """
+    queries = {
+        "search_word": (SEARCH_WORD_SQL, ("the",)),
+        "search_prefix": (SEARCH_PREFIX_SQL, prefix_bounds("th")),
+    }
+    return {
+        name: [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        for name, (sql, params) in queries.items()
+    }
+
+
+def full_table_scans(conn):
+    """Return the names of search queries that would scan the whole table."""
+    return [
+        name
+        for name, details in explain_query_plans(conn).items()
+        if any(detail.startswith("SCAN word_positions") for detail in details)
+    ]
+
+
+def bulk_upsert_word_positions(conn, rows, batch_size=BULK_BATCH_SIZE):
+    """
+    Insert or update word_positions rows in large executemany transactions.
+
+    :param rows: Iterable of (word, base32_representation, position,
+                 found_length, is_exact_match) tuples.
+    :return: Number of rows written.
+    """
+    # Pragmas such as synchronous cannot change inside an open transaction
+    conn.commit()
+    for pragma in BULK_LOAD_PRAGMAS:
+        conn.execute(pragma)
+    ensure_word_positions(conn)
+
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with conn:
+                conn.executemany(UPSERT_WORD_POSITION, batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        with conn:
+            conn.executemany(UPSERT_WORD_POSITION, batch)
+        written += len(batch)
+    return written
+
+
+def bulk_replace_word_occurrences(conn, occurrences, batch_size=BULK_BATCH_SIZE):
+    """
+    Replace the stored occurrences of every given word.
+
+    :param occurrences: Iterable of (word, [positions]) pairs.
+    :return: Number of occurrence rows written.
+    """
+    conn.commit()
+    for pragma in BULK_LOAD_PRAGMAS:
+        conn.execute(pragma)
+    ensure_word_positions(conn)
+
+    written = 0
+    words, rows = [], []
+
+    def flush():
+        with conn:
+            conn.executemany("DELETE FROM word_occurrences WHERE word = ?", [(w,) for w in words])
+            conn.executemany("INSERT OR IGNORE INTO word_occurrences (word, position) VALUES (?, ?)", rows)
+
+    for word, positions in occurrences:
+        words.append(word)
+        rows.extend((word, position) for position in positions)
+        if len(rows) >= batch_size:
+            flush()
+            written += len(rows)
+            words, rows = [], []
+    if words:
+        flush()
+        written += len(rows)
+    return written
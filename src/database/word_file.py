@@ -0,0 +1,380 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PIWORDS\x00"
+FORMAT_VERSION = 2
+
+# magic, format version, keys, buckets, bytes of key text, stored occurrences
+HEADER = struct.Struct("<8sIIIQQ")
+
+# Average keys per hash bucket; larger buckets mean a smaller seed array but
+# a slower build
+BUCKET_SIZE = 4
+
+# Seed values with this bit set hold the slot of a one-key bucket directly
+DIRECT_SLOT = 1 << 31
+
+# Most displacements tried for one bucket before the build gives up, and
+# how many are tried at once
+MAX_DISPLACEMENT = 1 << 24
+SEED_BATCH = 256
+
+NO_ID = -1
+
+# Seconds between checks of the file for a new export
+RELOAD_CHECK_INTERVAL = 2.0
+
+MASK64 = (1 << 64) - 1
+
+# (typecode, item size) of every array in file order, after the header
+ARRAYS = (
+    ("seeds", "I", 4),
+    ("ids", "q", 8),
+    ("positions", "q", 8),
+    ("offsets", "Q", 8),
+    ("lengths", "H", 2),
+    ("exact", "B", 1),
+    ("occurrence_offsets", "Q", 8),
+    ("occurrences", "q", 8),
+)
+
+
+def _hashes(key):
+    """(bucket hash, slot hash) of key bytes."""
+    x = int.from_bytes(hashlib.blake2b(key, digest_size=12).digest(), "little")
+    return x & 0xFFFFFFFF, x >> 32
+
+
+def _slot(slot_hash, seed, count):
+    """Slot of a key under seed: a splitmix64 finalizer over its hash and the seed."""
+    x = (slot_hash ^ (seed * 0x9E3779B97F4A7C15)) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return (x ^ (x >> 31)) % count
+
+
+def _slots(slot_hashes, seeds, count):
+    """_slot for every key (rows) under every seed (columns), in wrapping uint64 arithmetic."""
+    x = slot_hashes[:, None] ^ (seeds[None, :] * np.uint64(0x9E3779B97F4A7C15))
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return (x ^ (x >> np.uint64(31))) % np.uint64(count)
+
+
+def _items(name, count, buckets, occurrences):
+    """Number of items in array name."""
+    if name == "seeds":
+        return buckets
+    if name == "offsets":
+        return 2 * count + 1
+    if name == "occurrence_offsets":
+        return count + 1
+    if name == "occurrences":
+        return occurrences
+    return count
+
+
+def _layout(count, buckets, key_bytes, occurrences):
+    """Byte offset of every array, each 8-byte aligned, and the total file size."""
+    offsets = {}
+    position = HEADER.size
+    for name, _, size in ARRAYS:
+        position = -(-position // 8) * 8
+        offsets[name] = position
+        position += _items(name, count, buckets, occurrences) * size
+    offsets["keys"] = position
+    return offsets, position + key_bytes
+
+
+def _place(hashes, count, bucket_size):
+    """
+    Compress-hash-displace: assign every key a distinct slot in [0, count).
+
+    Buckets are placed largest first. A bucket's seed d maps its keys to
+    _slot(hash, d, count) and the smallest d hitting only free slots wins;
+    one-key buckets, placed last, take the remaining free slots directly.
+
+    :return: (seeds, slots) lists.
+    """
+    buckets = max(1, -(-count // bucket_size))
+    members = [[] for _ in range(buckets)]
+    for i, (bucket_hash, _) in enumerate(hashes):
+        members[bucket_hash % buckets].append(i)
+
+    seeds = [0] * buckets
+    slots = [0] * count
+    taken = np.zeros(count, dtype=bool)
+    slot_hashes = np.array([slot_hash for _, slot_hash in hashes], dtype=np.uint64)
+    order = sorted(range(buckets), key=lambda b: -len(members[b]))
+    singles = []
+    with np.errstate(over="ignore"):
+        for bucket in order:
+            keys = members[bucket]
+            if len(keys) <= 1:
+                if keys:
+                    singles.append(bucket)
+                continue
+            for first in range(0, MAX_DISPLACEMENT, SEED_BATCH):
+                candidates = np.arange(first, first + SEED_BATCH, dtype=np.uint64)
+                chosen = _slots(slot_hashes[keys], candidates, count).astype(np.int64)
+                ordered = np.sort(chosen, axis=0)
+                ok = ~taken[chosen].any(axis=0) & (np.diff(ordered, axis=0) != 0).all(axis=0)
+                if ok.any():
+                    column = int(np.argmax(ok))
+                    break
+            else:
+                raise ValueError(f"No displacement found for a bucket of {len(keys)} keys")
+            seeds[bucket] = first + column
+            for i, slot in zip(keys, chosen[:, column].tolist()):
+                slots[i] = slot
+            taken[chosen[:, column]] = True
+
+    free = iter(np.flatnonzero(~taken).tolist())
+    for bucket in singles:
+        slot = next(free)
+        seeds[bucket] = DIRECT_SLOT | slot
+        slots[members[bucket][0]] = slot
+    return seeds, slots
+
+
+def build_word_file(rows, path, occurrences=None, bucket_size=BUCKET_SIZE):
+    """
+    Write word_positions rows as an immutable, memory-mappable word file.
+
+    The file holds a minimal perfect hash over the words plus packed arrays
+    of ids, positions, found lengths, exact-match flags and stored
+    occurrences, and the word and base32 texts for verifying lookups. It is
+    written next to path and renamed into place, so readers never see a
+    partial file.
+
+    :param rows: Iterable of (id, word, base32_representation, position,
+                 found_length, is_exact_match) tuples with distinct words.
+    :param occurrences: Dict of word -> sorted positions (see word_occurrences).
+    :return: Number of words written.
+    """
+    occurrences = occurrences or {}
+    rows = list(rows)
+    if len(rows) >= DIRECT_SLOT:
+        raise ValueError(f"At most {DIRECT_SLOT - 1} words per file")
+    keys = [row[1].encode("utf-8") for row in rows]
+    if len(set(keys)) != len(keys):
+        raise ValueError("Words must be distinct")
+    count = len(rows)
+    seeds, slots = _place([_hashes(key) for key in keys], count, bucket_size) if count else ([0], [])
+
+    ordered = [None] * count
+    for row, key, slot in zip(rows, keys, slots):
+        ordered[slot] = (row, key)
+    texts = bytearray()
+    offsets = [0]
+    positions = []
+    occurrence_offsets = [0]
+    for row, key in ordered:
+        texts += key
+        offsets.append(len(texts))
+        texts += row[2].encode("utf-8")
+        offsets.append(len(texts))
+        positions.extend(occurrences.get(row[1], ()))
+        occurrence_offsets.append(len(positions))
+
+    arrays = {
+        "seeds": seeds,
+        "ids": [NO_ID if row[0] is None else row[0] for row, _ in ordered],
+        "positions": [row[3] for row, _ in ordered],
+        "offsets": offsets,
+        "lengths": [row[4] for row, _ in ordered],
+        "exact": [1 if row[5] else 0 for row, _ in ordered],
+        "occurrence_offsets": occurrence_offsets,
+        "occurrences": positions,
+    }
+    layout, size = _layout(count, len(seeds), len(texts), len(positions))
+    buffer = bytearray(size)
+    HEADER.pack_into(buffer, 0, MAGIC, FORMAT_VERSION, count, len(seeds), len(texts), len(positions))
+    for name, typecode, _ in ARRAYS:
+        data = np.asarray(arrays[name], dtype=f"<{typecode}").tobytes()
+        buffer[layout[name] : layout[name] + len(data)] = data
+    buffer[layout["keys"] :] = texts
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(buffer)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote {count} words to {path} ({size} bytes)")
+    return count
+
+
+class WordFileSnapshot:
+    """
+    One memory-mapped export of the word file (see build_word_file).
+
+    A lookup hashes the word once and reads one seed, one slot and the
+    stored key straight from the mapping; nothing is loaded into the Python
+    heap, so every worker shares the same pages through the OS page cache
+    regardless of vocabulary size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, format_version, self._count, buckets, key_bytes, occurrences = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} word file")
+        layout, _ = _layout(self._count, buckets, key_bytes, occurrences)
+        for name, typecode, size in ARRAYS:
+            start = layout[name]
+            items = _items(name, self._count, buckets, occurrences)
+            setattr(self, f"_{name}", self._view[start : start + items * size].cast(typecode))
+        self._keys = self._view[layout["keys"] :]
+
+    def __len__(self):
+        return self._count
+
+    def _find(self, key):
+        """Slot of key bytes, or -1 if key is not in the file."""
+        if not self._count:
+            return -1
+        bucket_hash, slot_hash = _hashes(key)
+        seed = self._seeds[bucket_hash % len(self._seeds)]
+        if seed & DIRECT_SLOT:
+            slot = seed & ~DIRECT_SLOT
+        else:
+            slot = _slot(slot_hash, seed, self._count)
+        start, end = self._offsets[2 * slot], self._offsets[2 * slot + 1]
+        return slot if self._keys[start:end] == key else -1
+
+    def search_word(self, word):
+        """Return the word_positions row for word, or [] if it is not in the file."""
+        slot = self._find(word.encode("utf-8"))
+        if slot == -1:
+            return []
+        row_id = self._ids[slot]
+        base32 = bytes(self._keys[self._offsets[2 * slot + 1] : self._offsets[2 * slot + 2]])
+        return (
+            None if row_id == NO_ID else row_id,
+            word,
+            base32.decode("utf-8"),
+            self._positions[slot],
+            self._lengths[slot],
+            self._exact[slot],
+        )
+
+    def search_words(self, words):
+        """Return the rows of the words that are in the file, like DBManager.search_words."""
+        return [row for row in map(self.search_word, words) if row]
+
+    def search_occurrences(self, words):
+        """Return the stored occurrences of many words, like DBManager.search_occurrences."""
+        occurrences = {}
+        for word in words:
+            slot = self._find(word.encode("utf-8"))
+            if slot != -1:
+                start, end = self._occurrence_offsets[slot], self._occurrence_offsets[slot + 1]
+                if end > start:
+                    occurrences[word] = self._occurrences[start:end].tolist()
+        return occurrences
+
+    def close(self):
+        for name, _, _ in ARRAYS:
+            view = getattr(self, f"_{name}", None)
+            if view is not None:
+                view.release()
+        if getattr(self, "_keys", None) is not None:
+            self._keys.release()
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+
+class WordFile:
+    """
+    Word file that follows new exports (see build_word_file).
+
+    Exports replace the file atomically, so at most every check_interval
+    seconds the file's mtime and size are compared with the mapped snapshot
+    and a changed file is mapped afresh, as WordIndex reloads the database.
+    The previous mapping is not closed: requests still reading it keep a
+    consistent snapshot (see snapshot) and it is unmapped once unreferenced.
+    """
+
+    def __init__(self, path, check_interval=RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = WordFileSnapshot(path)
+        self._checked_at = time.monotonic()
+        self._reload_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    @property
+    def version(self):
+        """Identifies the mapped export (file mtime and size)."""
+        return self.snapshot().version
+
+    def snapshot(self):
+        """The current WordFileSnapshot; use one per request for consistent lookups."""
+        self.maybe_reload()
+        return self._snapshot
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def maybe_reload(self):
+        """Map the file again if it changed since it was mapped."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        # One thread checks and reloads; the others keep serving the current mapping
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._checked_at = now
+            if self._file_stamp() == self._snapshot.version:
+                return False
+            self._snapshot = WordFileSnapshot(self.path)
+            logger.info(f"Reloaded word file with {len(self._snapshot)} words from {self.path}")
+            return True
+        except (OSError, ValueError) as e:
+            logger.error(f"Keeping previous word file, reload failed: {e}")
+            return False
+        finally:
+            self._reload_lock.release()
+
+    def search_word(self, word):
+        """Return the word_positions row for word, or [] if it is not in the file."""
+        return self.snapshot().search_word(word)
+
+    def search_words(self, words):
+        """Return the rows of the words that are in the file, like DBManager.search_words."""
+        return self.snapshot().search_words(words)
+
+    def search_occurrences(self, words):
+        """Return the stored occurrences of many words, like DBManager.search_occurrences."""
+        return self.snapshot().search_occurrences(words)
+
+    def close(self):
+        self._snapshot.close()
+
+
+def open_word_file(path):
+    """Open the word file at path, or return None if there is none."""
+    if not os.path.exists(path):
+        return None
+    word_file = WordFile(path)
+    logger.info(f"Loaded word file with {len(word_file)} words from {path}")
+    return word_file
@@ -0,0 +1,115 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from ..utils.word_trie import WordTrie
+from .schema import COLUMNS, table_exists
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the database file for changes
+RELOAD_CHECK_INTERVAL = 2.0
+
+
+class WordIndex:
+    """
+    In-memory copy of the word_positions table keyed by word.
+
+    The table is small (about 20k rows), so holding it in a dict and a
+    WordTrie lets the search path answer every lookup without database I/O.
+    When the database file changes, both are rebuilt from a consistent
+    snapshot and swapped in with a single assignment, so readers never see a
+    partial table.
+    """
+
+    def __init__(self, db_path, check_interval=RELOAD_CHECK_INTERVAL):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self._snapshot = ({}, WordTrie(), {})
+        self._stamp = None
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+        self.reload()
+
+    def __len__(self):
+        return len(self._snapshot[0])
+
+    @property
+    def trie(self):
+        """WordTrie over the indexed words (see WordTrie.insert_row)."""
+        self.maybe_reload()
+        return self._snapshot[1]
+
+    @property
+    def version(self):
+        """Identifies the loaded snapshot (database file mtime and size)."""
+        return self._stamp
+
+    def ensure_version(self, stamp):
+        """Reload now, ignoring check_interval, unless the loaded snapshot matches stamp."""
+        if self._stamp == stamp:
+            return
+        with self._reload_lock:
+            if self._stamp != stamp:
+                self.reload()
+
+    def _file_stamp(self):
+        stat = os.stat(self.db_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self):
+        """Load the whole table and atomically replace the current copy."""
+        stamp = self._file_stamp()
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            rows = {row[1]: row for row in conn.execute(f"SELECT {COLUMNS} FROM word_positions")}
+            occurrences = {}
+            if table_exists(conn, "word_occurrences"):
+                for word, position in conn.execute(
+                    "SELECT word, position FROM word_occurrences ORDER BY word, position"
+                ):
+                    occurrences.setdefault(word, []).append(position)
+        finally:
+            conn.close()
+        self._snapshot = (rows, WordTrie(rows.values()), occurrences)
+        self._stamp = stamp
+        self._checked_at = time.monotonic()
+        logger.info(f"Loaded {len(rows)} word positions from {self.db_path}")
+
+    def maybe_reload(self):
+        """Reload if the database file changed since the last load."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        # One thread checks and reloads; the others keep serving the current copy
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._checked_at = now
+            if self._file_stamp() == self._stamp:
+                return False
+            self.reload()
+            return True
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Keeping previous word positions, reload failed: {e}")
+            return False
+        finally:
+            self._reload_lock.release()
+
+    def search_word(self, word):
+        """Return the word_positions row for word, or [] if it is not indexed."""
+        self.maybe_reload()
+        return self._snapshot[0].get(word, [])
+
+    def search_words(self, words):
+        """Return the rows of the words that are indexed, like DBManager.search_words."""
+        self.maybe_reload()
+        rows = self._snapshot[0]
+        return [rows[word] for word in words if word in rows]
+
+    def search_occurrences(self, words):
+        """Return the stored occurrences of many words, like DBManager.search_occurrences."""
+        occurrences = self._snapshot[2]
+        return {word: occurrences[word] for word in words if word in occurrences}
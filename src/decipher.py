@@ -1,227 +1,291 @@
+import base64
+import binascii
 import re
 
+from src.metrics import span
+from src.utils.bbp import MAX_COMPUTED_DIGITS, SpigotLimitError
+from src.utils.pi_digits import get_extended_pi_digits, get_pi_digits
+
+# Undo ascii_to_base32: digits 2-7 stand for punctuation and space
+REVERSE_MAPPING = str.maketrans("234567", "!?,.- ")
+
+# Explicit bounds so a hostile cipher cannot make us parse or read without limit
+MAX_CIPHER_LENGTH = 1 << 20
+MAX_SEGMENTS = 1 << 16
+MAX_READ_LENGTH = 1 << 12
+
+# Every segment spells at least one input character, and a one-character
+# segment costs at most 17 cipher characters: "[" + 12-digit position + "-1]"
+# plus its share of the two brackets of a two-segment group (compact
+# segments take fewer)
+MAX_CIPHER_CHARS_PER_INPUT_CHAR = 17
+# Longest search input whose cipher is guaranteed to parse within the bounds above
+MAX_ENCODABLE_LENGTH = min(MAX_SEGMENTS, MAX_CIPHER_LENGTH // MAX_CIPHER_CHARS_PER_INPUT_CHAR)
+
+# "index-length]" with bounded digit runs; anchored with match(), so no backtracking
+SEGMENT_BODY = re.compile(r"([0-9]{1,12})-([0-9]{1,6})\]")
+
+# Compact ciphers (see index_to_compact_cipher) are unpadded base64url
+COMPACT_ALPHABET = re.compile(r"[A-Za-z0-9_-]+")
+# Ten 7-bit groups cover any 64-bit value
+MAX_VARINT_BYTES = 10
+
+
 
 def get_characters_from_pi(file_path, indices_and_counts):
     """
     Reads characters from the pi_base_32_1b file at specified indices and counts.
 
-    :param file_path: Path to the pi_base_32_1b file.
+    :param file_path: Path to the pi_base_32_1b file (plain text or packed, see packed_digits).
     :param indices_and_counts: List of tuples [(i, n), ...] where i is the index and n is the number of characters to read.
     :return: List of strings, each containing n characters starting from index i.
     """
-    results = []
-    mapping = {"!": "2", "?": "3", ",": "4", ".": "5", "-": "6", " ": "7"}
-    reverse_mapping = {v: k for k, v in mapping.items()}
-    with open(file_path, "r") as file:
-        for i, n in indices_and_counts:
-            file.seek(i)
-            word = file.read(n)
-            for char in word:
-                if char in reverse_mapping:
-                    word = word.replace(char, reverse_mapping[char])
-            results.append(word)
-    return results
+    words = get_pi_digits(file_path).read_many(list(indices_and_counts))
+    return [word.translate(REVERSE_MAPPING) for word in words]
 
 
-def validate_input_string(input_string):
+class CipherError(ValueError):
+    """Raised for a cipher string that is malformed or exceeds the size limits."""
+
+
+def iter_segments(input_string):
     """
-    Validates that the input string matches the required format.
+    Tokenize a cipher in a single left-to-right pass.
 
-    :param input_string: The string to validate.
-    :return: True if the string is valid, False otherwise.
+    A cipher is a sequence of single segments "[i-n]" and groups
+    "[[i-n][i-n]...]]" whose segments spell one word together.
+
+    :param input_string: The cipher to tokenize.
+    :return: Generator of (i, n, group_id) tuples; group_id numbers the groups
+             from 0 and is None for single segments.
+    :raises CipherError: On the first malformed token or exceeded limit.
+    """
+    if len(input_string) > MAX_CIPHER_LENGTH:
+        raise CipherError(f"cipher longer than {MAX_CIPHER_LENGTH} characters")
+    if not input_string:
+        raise CipherError("empty cipher")
+
+    length = len(input_string)
+    pos = 0
+    group_id = 0
+    segments = 0
+    while pos < length:
+        grouped = input_string.startswith("[[", pos)
+        if not grouped and input_string[pos] != "[":
+            raise CipherError(f"expected '[' at {pos}")
+        pos += 2 if grouped else 1
+        while True:
+            match = SEGMENT_BODY.match(input_string, pos)
+            if match is None:
+                raise CipherError(f"malformed segment at {pos}")
+            segments += 1
+            if segments > MAX_SEGMENTS:
+                raise CipherError(f"more than {MAX_SEGMENTS} segments")
+            count = int(match.group(2))
+            if count > MAX_READ_LENGTH:
+                raise CipherError(f"segment at {pos} reads more than {MAX_READ_LENGTH} digits")
+            yield int(match.group(1)), count, group_id if grouped else None
+            pos = match.end()
+            if not grouped:
+                break
+            if input_string.startswith("]", pos):
+                pos += 1
+                group_id += 1
+                break
+            if not input_string.startswith("[", pos):
+                raise CipherError(f"unterminated group at {pos}")
+            pos += 1
+
+
+def _read_varint(data, pos):
+    """Decode an unsigned LEB128 varint at pos; return (value, next position)."""
+    value = 0
+    for shift in range(0, 7 * MAX_VARINT_BYTES, 7):
+        if pos >= len(data):
+            raise CipherError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+    raise CipherError(f"varint longer than {MAX_VARINT_BYTES} bytes")
+
+
+def iter_compact_segments(input_string):
     """
-    pattern = r"^(\[\d+-\d+\]|\[\[(\d+-\d+)(\]\[\d+-\d+)*\]\])+$"
-    return bool(re.fullmatch(pattern, input_string))
+    Tokenize a compact cipher (see index_to_cipher.index_to_compact_cipher).
 
+    Each segment is a zigzag varint position delta followed by a varint
+    (length << 2) | (starts_group << 1) | grouped.
 
-def find_closing_bracket(text, start_pos, open_bracket="[", close_bracket="]"):
+    :param input_string: The base64url cipher to tokenize.
+    :return: Generator of (i, n, group_id) tuples, as iter_segments yields.
+    :raises CipherError: On malformed input or exceeded limits.
     """
-    Find the matching closing bracket taking into account nested brackets.
+    if len(input_string) > MAX_CIPHER_LENGTH:
+        raise CipherError(f"cipher longer than {MAX_CIPHER_LENGTH} characters")
+    if not COMPACT_ALPHABET.fullmatch(input_string):
+        raise CipherError("compact cipher must be non-empty base64url")
+    try:
+        data = base64.urlsafe_b64decode(input_string + "=" * (-len(input_string) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise CipherError(f"invalid base64url: {e}")
+
+    pos = 0
+    position = 0
+    group_id = -1
+    in_group = False
+    segments = 0
+    while pos < len(data):
+        delta, pos = _read_varint(data, pos)
+        token, pos = _read_varint(data, pos)
+        segments += 1
+        if segments > MAX_SEGMENTS:
+            raise CipherError(f"more than {MAX_SEGMENTS} segments")
+        position += (delta >> 1) ^ -(delta & 1)
+        count, starts_group, grouped = token >> 2, bool(token & 2), bool(token & 1)
+        if position < 0:
+            raise CipherError(f"segment {segments} has a negative position")
+        if count > MAX_READ_LENGTH:
+            raise CipherError(f"segment {segments} reads more than {MAX_READ_LENGTH} digits")
+        if starts_group and not grouped:
+            raise CipherError(f"segment {segments} starts a group it is not in")
+        if grouped and not starts_group and not in_group:
+            raise CipherError(f"segment {segments} continues a group that never started")
+        if starts_group:
+            group_id += 1
+        in_group = grouped
+        yield position, count, group_id if grouped else None
+
+
+# Tokenizer per value of the "format" request field
+CIPHER_PARSERS = {
+    "text": iter_segments,
+    "compact": iter_compact_segments,
+}
 
-    :param text: The text to search in
-    :param start_pos: Position of the opening bracket
-    :param open_bracket: The opening bracket character
-    :param close_bracket: The closing bracket character
-    :return: Position of the matching closing bracket or -1 if not found
+
+def validate_input_string(input_string):
     """
-    count = 1  # We start with one opening bracket
-    i = start_pos + 1
-    while i < len(text) and count > 0:
-        if text[i] == open_bracket:
-            count += 1
-        elif text[i] == close_bracket:
-            count -= 1
-        i += 1
+    Validates that the input string matches the required format.
 
-    return i - 1 if count == 0 else -1
+    :param input_string: The string to validate.
+    :return: True if the string is valid, False otherwise.
+    """
+    try:
+        for _ in iter_segments(input_string):
+            pass
+    except CipherError:
+        return False
+    return True
 
 
-def parse_input_string(input_string):
+def parse_input_string(input_string, cipher_format="text"):
     """
     Parses the input string into a list of tuples (i, n, group_id).
     Group_id indicates which segments should be joined without spaces.
 
     :param input_string: The string to parse.
+    :param cipher_format: "text" for the bracket format, "compact" for base64url varints.
     :return: List of tuples [(i, n, group_id), ...].
+    :raises CipherError: If the string is not a valid cipher.
     """
-    all_segments = []
-    group_id = 0
+    parser = CIPHER_PARSERS.get(cipher_format)
+    if parser is None:
+        raise CipherError(f"unknown cipher format {cipher_format!r}")
+    return list(parser(input_string))
 
-    # Process the input character by character
-    i = 0
-    while i < len(input_string):
-        if input_string[i : i + 2] == "[[":  # Start of a group
-            # Find the matching closing brackets
-            closing_pos = find_closing_bracket(input_string, i + 1, "[", "]")
-            if (
-                closing_pos != -1
-                and input_string[closing_pos - 1 : closing_pos + 1] == "]]"
-            ):
-                group_content = input_string[i + 2 : closing_pos - 1]
-
-                # Extract all indices and counts from this group
-                segment_start = 0
-                while segment_start < len(group_content):
-                    if group_content[segment_start] == "[":
-                        segment_end = group_content.find("]", segment_start)
-                        if segment_end != -1:
-                            segment = group_content[segment_start : segment_end + 1]
-                            match = re.match(r"\[(\d+)-(\d+)\]", segment)
-                            if match:
-                                idx, count = match.groups()
-                                all_segments.append((int(idx), int(count), group_id))
-                            segment_start = segment_end + 1
-                        else:
-                            break
-                    else:
-                        segment_start += 1
-
-                i = closing_pos + 1  # Move past the closing brackets
-                group_id += 1
-            else:
-                i += 1
-        elif input_string[i] == "[" and (
-            i == 0 or input_string[i - 1] != "["
-        ):  # Start of a single segment
-            # Find the closing bracket
-            closing_pos = input_string.find("]", i)
-            if closing_pos != -1:
-                segment = input_string[i : closing_pos + 1]
-                match = re.match(r"\[(\d+)-(\d+)\]", segment)
-                if match:
-                    idx, count = match.groups()
-                    all_segments.append((int(idx), int(count), None))
-                i = closing_pos + 1
-            else:
-                i += 1
+
+def join_segments(segments, words):
+    """
+    Join deciphered segments back into words.
+
+    Consecutive segments of the same group form one word; every single
+    segment is a word of its own.
+
+    :param segments: List of (i, n, group_id) tuples.
+    :param words: The text read for each segment.
+    :return: List of words.
+    """
+    joined = []
+    previous_group = None
+    for (_, _, group_id), word in zip(segments, words):
+        if group_id is not None and group_id == previous_group:
+            joined[-1] += word
         else:
-            i += 1
-
-    print("Parsed segments (fixed method):", all_segments)
-
-    # Directly parse the input string as a simple backup method
-    # This ensures we at least get all the basic segments
-    direct_segments = [
-        (int(i), int(n), None) for i, n in re.findall(r"\[(\d+)-(\d+)\]", input_string)
-    ]
-
-    # Combine the two methods to ensure we don't miss anything
-    if len(all_segments) < len(direct_segments):
-        print("Warning: Using backup parsing method as primary method missed segments")
-        all_segments = direct_segments
-
-    return all_segments
-
-
-def smart_join(encrypted_string, results):
-    """
-    Intelligently join results based on the structure in the encrypted string.
-    
-    :param encrypted_string: The original encrypted string with structure info
-    :param results: List of individual strings from deciphering
-    :return: List of joined strings respecting the original grouping
-    """
-    final_results = []
-    
-    # Define patterns to look for in results
-    patterns = {
-        "WORLD!": ["WORLD", "!"],
-        "PI.": ["PI", "."],
-        "IRRATIONALS": ["IR", "R", "A", "T", "I", "O", "N", "A", "L", "S"]
-    }
-    
-    # Join consecutive elements that match our patterns
-    i = 0
-    while i < len(results):
-        found_pattern = False
-        
-        # Check each pattern
-        for word, parts in patterns.items():
-            # Check if we have enough elements left to match this pattern
-            if i + len(parts) <= len(results):
-                # Check if the sequence matches our pattern
-                matches = True
-                for j, part in enumerate(parts):
-                    if results[i + j] != part:
-                        matches = False
-                        break
-                
-                if matches:
-                    # Add the joined word
-                    final_results.append(word)
-                    i += len(parts)  # Skip all the matched parts
-                    found_pattern = True
-                    break
-        
-        if not found_pattern:
-            # If no pattern matched, just add the current element
-            final_results.append(results[i])
-            i += 1
-    
-    return final_results
-
-
-def decipher(input_string, file_path="static/pi_base32_1b.txt"):
+            joined.append(word)
+        previous_group = group_id
+    return joined
+
+
+def decipher(input_string, file_path="static/pi_base32_1b.txt", cipher_format="text"):
     """
     Deciphers the input string by reading characters from the pi_base_32_1b file.
 
     :param input_string: The string to decipher.
-    :param file_path: Path to the pi_base_32_1b file.
-    :return: List of strings, with grouped segments joined.
+    :param file_path: Path to the pi_base_32_1b file (plain text or packed, see packed_digits).
+    :param cipher_format: "text" or "compact", see parse_input_string.
+    :return: The deciphered words joined by spaces, grouped segments joined without.
+    :raises CipherError: If the string is not a valid cipher.
     """
-    # Parse the input string using our automated parser
-    indices_and_counts_with_groups = parse_input_string(input_string)
-
-    # Debug: print out parsed indices
-    print(f"Total segments: {len(indices_and_counts_with_groups)}")
-
-    # Get all characters from pi
-    raw_results = []
-    mapping = {"!": "2", "?": "3", ",": "4", ".": "5", "-": "6", " ": "7"}
-    reverse_mapping = {v: k for k, v in mapping.items()}
+    return decipher_many([input_string], file_path, cipher_format)[0]
 
-    with open(file_path, "r") as file:
-        for i, n, group_id in indices_and_counts_with_groups:
-            file.seek(i)
-            word = file.read(n)
 
-            # Apply the reverse mapping
-            for char in word:
-                if char in reverse_mapping:
-                    word = word.replace(char, reverse_mapping[char])
+def decipher_many(input_strings, file_path="static/pi_base32_1b.txt", cipher_format="text"):
+    """
+    Deciphers several input strings with one planned set of reads.
 
-            raw_results.append(word)
-            print(f"Read at {i}: '{word}' (group: {group_id})")  # Debug output
+    :param input_strings: List of strings to decipher.
+    :param file_path: Path to the pi_base_32_1b file (plain text or packed, see packed_digits).
+    :param cipher_format: "text" or "compact", see parse_input_string.
+    :return: List of deciphered strings, in input order.
+    :raises CipherError: If any input is not a valid cipher.
+    """
+    with span("decipher.parse"):
+        parsed = [parse_input_string(s, cipher_format) for s in input_strings]
+    return decipher_segments(parsed, file_path)
 
-    # Use smart joining to fix the grouping issues
-    results = smart_join(input_string, raw_results)
 
-    print("Final results:", results)  # Debug output
-    return " ".join(results)
+def decipher_segments(
+    parsed, file_path="static/pi_base32_1b.txt", spigot_digits=0, spigot_max_digits=MAX_COMPUTED_DIGITS
+):
+    """
+    Deciphers already tokenized ciphers.
+
+    The segments of all ciphers are sorted and nearby ones merged (see
+    read_planner), so a batch costs a few large reads instead of one per
+    segment.
+
+    :param parsed: List of segment lists as returned by parse_input_string.
+    :param file_path: Path to the pi_base_32_1b file (plain text or packed, see packed_digits).
+    :param spigot_digits: Also serve this many positions past the end of the
+                          file, computing them with the BBP spigot (see bbp).
+                          Each costs time linear in its position, so keep it small.
+    :param spigot_max_digits: Most of those digits one call may compute.
+    :return: List of deciphered strings, in order.
+    :raises CipherError: If the ciphers need more than spigot_max_digits computed digits.
+    """
+    # Shared memory-mapped store, opened once per process
+    ranges = [(i, n) for segments in parsed for i, n, _ in segments]
+    with span("decipher.read"):
+        try:
+            words = get_extended_pi_digits(file_path, spigot_digits, spigot_max_digits).read_many(ranges)
+        except SpigotLimitError as e:
+            raise CipherError(str(e))
+
+    with span("decipher.join"):
+        deciphered = []
+        offset = 0
+        for segments in parsed:
+            raw_results = [
+                word.translate(REVERSE_MAPPING) for word in words[offset : offset + len(segments)]
+            ]
+            offset += len(segments)
+            deciphered.append(" ".join(join_segments(segments, raw_results)))
+    return deciphered
 
 
 if __name__ == "__main__":
     file_path = "static/pi_base32_1b.txt"
     encrypted_string = "[1060582-5][[2353302-5][5-1]][479-2][51-2][[933-2][114-1]][7-1][0-2][28542-3][47128-3][75562-3][28542-3][4509770-5][[914-2][10-1][0-1][15-1][7-1][24-1][25-1][0-1][86-1][2-1][114-1]]"
-    results = decipher(encrypted_string)
-    print("Deciphered message:", " ".join(results))
+    print("Deciphered message:", decipher(encrypted_string, file_path))
@@ -1,32 +1,88 @@
+import base64
+
+
+def iter_cipher_segments(index_data):
+    """
+    Flatten index data into (position, length, grouped, starts_group) tuples.
+
+    Args:
+        index_data: Nested list of sequence data, as returned by process_search_request.
+    """
+    for item in index_data:
+        if not isinstance(item[0], (list, tuple)):  # Direct sequence entry like [2820,"hello","HELLO",1060582,5,1]
+            yield item[3], item[4], False, False
+        else:  # Nested list like [[987,"z","Z",35,1,1],[81,"c","C",19,1,1]]
+            for k, entry in enumerate(item):
+                yield entry[3], entry[4], True, k == 0
+
+
 def index_to_cipher(index_data):
     """
     Convert index data to cipher format.
-    
+
     Args:
         index_data: Nested list of sequence data.
-    
+
     Returns:
-        List with the same nesting structure but only containing position and length.
+        Cipher string such as "[1060582-5][[2353302-5][5-1]]": one [position-length]
+        per word, with the segments of a split word wrapped in an extra pair of brackets.
     """
-    result = []
-    
+    parts = []
     for item in index_data:
-        if isinstance(item[0], int):  # Direct sequence entry like [2820,"hello","HELLO",1060582,5,1]
-            position = item[3]
-            length = item[4]
-            result.append([position,'-', length])
-        else:  # Nested list like [[987,"z","Z",35,1,1],[81,"c","C",19,1,1]]
-            nested_result = []
-            for entry in item:
-                position = entry[3]
-                length = entry[4]
-                nested_result.append([position,'-', length])
-            result.append(nested_result)
-    
-    return str(result).replace("'", "").replace(" ", "").replace(",", "")[1:-1]
+        if not isinstance(item[0], (list, tuple)):
+            parts.append(f"[{item[3]}-{item[4]}]")
+        else:
+            parts.append("[" + "".join(f"[{entry[3]}-{entry[4]}]" for entry in item) + "]")
+    return "".join(parts)
+
+
+def _append_varint(buffer, value):
+    """Append an unsigned LEB128 varint."""
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def zigzag(value):
+    """Map a signed int to an unsigned one so small magnitudes stay small."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def index_to_compact_cipher(index_data):
+    """
+    Convert index data to the compact cipher format.
+
+    Every segment is two varints: the zigzag-encoded difference from the
+    previous segment's position, then (length << 2) | (starts_group << 1) |
+    grouped. The bytes are base64url-encoded without padding. decipher's
+    iter_compact_segments reverses this.
+
+    Args:
+        index_data: Nested list of sequence data.
+
+    Returns:
+        Cipher string of URL-safe base64 characters.
+    """
+    buffer = bytearray()
+    previous = 0
+    for position, length, grouped, starts_group in iter_cipher_segments(index_data):
+        _append_varint(buffer, zigzag(position - previous))
+        _append_varint(buffer, (length << 2) | (starts_group << 1) | grouped)
+        previous = position
+    return base64.urlsafe_b64encode(bytes(buffer)).rstrip(b"=").decode("ascii")
+
+
+# Encoder per value of the "format" request field
+CIPHER_FORMATS = {
+    "text": index_to_cipher,
+    "compact": index_to_compact_cipher,
+}
+
 
 # Example usage
 if __name__ == "__main__":
     sample_index = [[2820,"hello","HELLO",1060582,5,1],[[987,"z","Z",35,1,1],[81,"c","C",19,1,1]],[119,"world","WORLD",2353302,5,1]]
     result = index_to_cipher(sample_index)
-    print(result)  # Should output: [[2820, 5], [[987, 1], [81, 1]], [119, 5]]
+    print(result)  # Should output: [1060582-5][[35-1][19-1]][2353302-5]
+    print(index_to_compact_cipher(sample_index))
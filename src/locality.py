@@ -0,0 +1,64 @@
+from .utils.read_planner import READ_MERGE_GAP
+
+# Digits per page when clustering; the read planner merges reads this close
+PAGE_SIZE = READ_MERGE_GAP
+
+
+def _with_position(row, position):
+    return row[:3] + (position,) + tuple(row[4:])
+
+
+def cluster_positions(matches, occurrences, page_size=PAGE_SIZE):
+    """
+    Re-choose segment positions so a message touches as few pages of pi as possible.
+
+    Each exactly matched row may move to any stored occurrence of its word.
+    Pages that must be read anyway (segments with a single candidate) are
+    opened first; then the page holding candidates for the most remaining
+    segments is opened greedily, lower pages winning ties since they give
+    shorter positions. Within an open page a segment takes its smallest
+    position there.
+
+    :param matches: Matches as returned by process_search_request (rows and
+                    lists of rows).
+    :param occurrences: Dict of word -> sequence of positions (see word_occurrences).
+    :return: Matches of the same shape with positions replaced.
+    """
+    segments = []
+    for i, match in enumerate(matches):
+        rows = match if isinstance(match, list) else [match]
+        for j, row in enumerate(rows):
+            candidates = {row[3]}
+            if row[5] and row[4] == len(row[1]):
+                candidates.update(occurrences.get(row[1], ()))
+            pages = {}
+            for position in sorted(candidates):
+                pages.setdefault(position // page_size, position)
+            segments.append((i, j if isinstance(match, list) else None, row, pages))
+    if all(len(pages) == 1 for _, _, _, pages in segments):
+        return matches
+
+    chosen = [None] * len(segments)
+    open_pages = {next(iter(pages)) for _, _, _, pages in segments if len(pages) == 1}
+    while True:
+        for k, (_, _, _, pages) in enumerate(segments):
+            if chosen[k] is None:
+                usable = [pages[page] for page in open_pages if page in pages]
+                if usable:
+                    chosen[k] = min(usable)
+        counts = {}
+        for k, (_, _, _, pages) in enumerate(segments):
+            if chosen[k] is None:
+                for page in pages:
+                    counts[page] = counts.get(page, 0) + 1
+        if not counts:
+            break
+        open_pages.add(min(counts, key=lambda page: (-counts[page], page)))
+
+    result = [list(match) if isinstance(match, list) else match for match in matches]
+    for (i, j, row, _), position in zip(segments, chosen):
+        if j is None:
+            result[i] = _with_position(row, position)
+        else:
+            result[i][j] = _with_position(row, position)
+    return result
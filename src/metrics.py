@@ -0,0 +1,256 @@
+import bisect
+import contextvars
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds for request and stage latencies
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Upper bounds for SQL statements per request
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Set PI_SEARCH_PROFILE_RATE to e.g. 0.01 to cProfile that fraction of
+# profiled() calls; .prof files go to PI_SEARCH_PROFILE_DIR
+PROFILE_RATE = float(os.environ.get("PI_SEARCH_PROFILE_RATE", 0))
+PROFILE_DIR = os.environ.get("PI_SEARCH_PROFILE_DIR", "profiles")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label values."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name + _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label values, as Prometheus expects."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    def total(self, *labels):
+        state = self._values.get(labels)
+        return state[1] if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, ([*state[0]], state[1], state[2])) for labels, state in self._values.items())
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _format_value(float(bound))
+                yield self.name + "_bucket" + _format_labels(self.labelnames, labels, [("le", le)]), cumulative
+            yield self.name + "_sum" + _format_labels(self.labelnames, labels), total
+            yield self.name + "_count" + _format_labels(self.labelnames, labels), count
+
+
+class Registry:
+    """
+    Metrics of one process, rendered in the Prometheus text format.
+
+    Collectors are callables returning (name, kind, documentation, samples)
+    tuples at render time, for values owned elsewhere (cache counters).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        families = [(m.name, m.kind, m.documentation, m.samples()) for m in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{sample} {_format_value(value)}" for sample, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "pi_search_request_duration_seconds", "HTTP request latency.", ("method", "path", "status")
+)
+STAGE_SECONDS = registry.histogram(
+    "pi_search_stage_duration_seconds", "Latency of one stage of a request (see span).", ("stage",)
+)
+REQUEST_QUERIES = registry.histogram(
+    "pi_search_sql_queries_per_request", "SQL statements executed per HTTP request.", ("path",), QUERY_BUCKETS
+)
+SQL_QUERIES = registry.counter("pi_search_sql_queries_total", "SQL statements executed.")
+RESOLUTIONS = registry.counter(
+    "pi_search_word_resolutions_total",
+    "Words resolved, by how far resolve_word had to fall back.",
+    ("via",),
+)
+
+
+class RequestStats:
+    """Counters for the request being served; shared by every thread working on it."""
+
+    __slots__ = ("sql_queries",)
+
+    def __init__(self):
+        self.sql_queries = 0
+
+
+_request_stats = contextvars.ContextVar("pi_search_request_stats", default=None)
+
+
+@contextmanager
+def request_scope():
+    """Collect RequestStats for the code run in this context (and contexts copied from it)."""
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def count_sql(statement=None):
+    """Count one SQL statement; usable as a sqlite3 trace callback."""
+    SQL_QUERIES.inc()
+    stats = _request_stats.get()
+    if stats is not None:
+        # Increments from executor threads may race; a lost count is acceptable
+        stats.sql_queries += 1
+
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block into pi_search_stage_duration_seconds{stage}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+
+@contextmanager
+def profiled(name, rate=None):
+    """
+    cProfile the enclosed block for a sampled fraction of calls (PROFILE_RATE
+    by default) and dump the stats to PROFILE_DIR/<name>-<time>-<pid>-<thread>.prof.
+    """
+    rate = PROFILE_RATE if rate is None else rate
+    if rate <= 0 or random.random() >= rate:
+        yield
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is already active in this thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(
+            PROFILE_DIR, f"{name}-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}.prof"
+        )
+        profile.dump_stats(path)
+        logger.info(f"Wrote profile {path}")
+
+
+def cache_collector(caches):
+    """Collector exposing ResultCache.stats() of every cache as metrics."""
+
+    def collect():
+        stats = [(cache.name, cache.stats()) for cache in caches]
+        families = []
+        for key in ("hits", "misses", "coalesced", "evictions"):
+            families.append((
+                f"pi_search_cache_{key}_total",
+                "counter",
+                f"Cache {key}.",
+                [(f'pi_search_cache_{key}_total{{cache="{name}"}}', values[key]) for name, values in stats],
+            ))
+        families.append((
+            "pi_search_cache_entries",
+            "gauge",
+            "Entries currently cached.",
+            [(f'pi_search_cache_entries{{cache="{name}"}}', values["size"]) for name, values in stats],
+        ))
+        return families
+
+    return collect
@@ -1,10 +1,15 @@
-import os
 import sqlite3
 
 # for dev
 # from utils.base32_converter import ascii_to_base32
 
+from .database.db_manager import get_db_manager
+from .database.schema import MAX_PHRASE_WORDS
+from .database.word_index import WordIndex
+from .locality import cluster_positions
+from .metrics import RESOLUTIONS, span
 from .utils.base32_converter import ascii_to_base32
+from .utils.word_trie import WordTrie, segment
 import logging
 import pprint as p
 
@@ -12,111 +17,388 @@ import pprint as p
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Longest substring of an unindexed word worth looking up
+MAX_SEGMENT_LENGTH = 24
 
-def search_word_with_conn(cursor, base32_string):
+
+def relocatable_words(matches):
+    """Words of the exactly matched rows, the ones with alternative occurrences."""
+    return {
+        row[1]
+        for match in matches
+        for row in (match if isinstance(match, list) else [match])
+        if row[5] and row[4] == len(row[1])
+    }
+
+
+def substrings(word, max_length=MAX_SEGMENT_LENGTH, min_length=1):
+    """All distinct substrings of word with min_length to max_length characters."""
+    return {
+        word[start:end]
+        for start in range(len(word))
+        for end in range(start + min_length, min(len(word), start + max_length) + 1)
+    }
+
+
+def database_substrings(word, kgram_table=None):
+    """Substrings of word worth querying; those a kgram_table answers are skipped."""
+    if kgram_table is None:
+        return substrings(word)
+    return substrings(word, min_length=kgram_table.max_k + 1)
+
+
+def search_suffix_index(suffix_index, word, base32_word):
     """
-    Helper function to search for a word using an existing database cursor.
-    Returns only the first match found.
+    Helper function to find a word that is missing from word_positions directly
+    in the pi digits through the suffix array.
+    Returns a row shaped like word_positions, or [] if the word does not occur.
     """
-    cursor.execute("SELECT * FROM word_positions WHERE word = ?", (base32_string,))
-    result = cursor.fetchone()
-    logger.info(f"Found match: {result}")
-    return result if result else []
+    position = suffix_index.find(base32_word)
+    if position == -1:
+        return []
+    logger.info(f"Found {word} at {position} via suffix array")
+    return (None, word, base32_word, position, len(base32_word), 1)
 
 
-def search_partial_word_with_conn(cursor, base32_string):
+def search_kgram_table(kgram_table, word, base32_word):
     """
-    Helper function to search for partial word matches using an existing database cursor.
-    Returns matches that start with the given string, ordered by length (longest first).
+    Helper function to look a short word up in the k-gram first-occurrence table.
+    Returns a row shaped like word_positions, or [] if the word does not occur.
     """
-    cursor.execute(
-        "SELECT * FROM word_positions WHERE word  LIKE ? and is_exact_match = 1 ORDER BY length(word) DESC LIMIT 3",
-        (base32_string + "%",),
-    )
-    results = cursor.fetchall()
-    logger.info(f"{results} partial matches for: {base32_string}")
+    position = kgram_table.find(base32_word)
+    if position == -1:
+        return []
+    return (None, word, base32_word, position, len(base32_word), 1)
+
 
-    return results if results else []
+def kgram_trie(word, kgram_table):
+    """Build a trie of k-gram table rows for every short substring of word."""
+    overlay = WordTrie()
+    for fragment in substrings(word, kgram_table.max_k):
+        overlay.insert_row(search_kgram_table(kgram_table, fragment, ascii_to_base32(fragment)))
+    return overlay
 
 
+def fallback_trie(word, trie, suffix_index):
+    """
+    Build a small trie of suffix-array rows for the characters of word that the
+    indexed words cannot spell, so segmentation can still cover them.
+    """
+    overlay = WordTrie()
+    if suffix_index is None:
+        return overlay
+    for char in set(word):
+        if trie.get(char) is None:
+            overlay.insert_row(search_suffix_index(suffix_index, char, ascii_to_base32(char)))
+    return overlay
 
-def process_search_request(input_string, db_path="database/pi_words.db"):
+
+def resolve_word(word, trie, suffix_index=None, kgram_table=None):
+    """
+    Resolve one lowercased word to a word_positions row, or to a list of rows
+    that spell it in the fewest segments. A kgram_table (KGramTable) answers
+    words and segments of up to kgram_table.max_k characters directly.
+    """
+    match = trie.get(word)
+    if match is not None and match[4] == len(word):
+        RESOLUTIONS.inc("index")
+        return match
+
+    if kgram_table is not None and len(word) <= kgram_table.max_k:
+        match = search_kgram_table(kgram_table, word, ascii_to_base32(word))
+        if match:
+            RESOLUTIONS.inc("kgram_table")
+            return match
+
+    if suffix_index is not None:
+        # Not indexed as a whole word; look for it anywhere in pi instead
+        match = search_suffix_index(suffix_index, word, ascii_to_base32(word))
+        if match:
+            RESOLUTIONS.inc("suffix_array")
+            return match
+
+    tries = (trie,) if kgram_table is None else (trie, kgram_trie(word, kgram_table))
+    segments = segment(word, *tries)
+    via = "segments"
+    if segments is None:
+        segments = segment(word, *tries, fallback_trie(word, trie, suffix_index))
+        via = "fallback_segments"
+    if segments is None:
+        RESOLUTIONS.inc("unresolved")
+        raise ValueError(f"Cannot encode '{word}': some characters never occur in the index.")
+    RESOLUTIONS.inc(via)
+    logger.debug(f"no indexed full match for: {word}, {len(segments)} segments")
+    return segments[0] if len(segments) == 1 else segments
+
+
+def phrase_candidates(words, max_words=MAX_PHRASE_WORDS):
+    """Every run of 2 to max_words consecutive words, joined by single spaces."""
+    return {
+        " ".join(words[start:end])
+        for start in range(len(words))
+        for end in range(start + 2, min(len(words), start + max_words) + 1)
+    }
+
+
+def full_matches(rows):
+    """Map word -> row for the rows found in pi in full."""
+    return {row[1]: row for row in rows if row and row[4] == len(row[1])}
+
+
+def cover_words(words, matches, phrases, max_words=MAX_PHRASE_WORDS):
+    """
+    Spell a sequence of words in the fewest segments.
+
+    Dynamic programming over word boundaries: best[i] is the fewest segments
+    for words[:i], reached either by one word's own match or by an indexed
+    phrase covering up to max_words words in a single segment.
+
+    :param matches: Per word, its resolved match or the ValueError raised for it.
+    :param phrases: Dict of phrase -> word_positions row.
+    :return: List of matches, phrases appearing as single rows.
+    :raises ValueError: If a word that no phrase covers could not be resolved.
+    """
+    n = len(words)
+    best = [0] + [None] * n
+    back = [None] * (n + 1)
+    for start in range(n):
+        if best[start] is None:
+            continue
+        options = []
+        match = matches[start]
+        if not isinstance(match, Exception):
+            options.append((start + 1, len(match) if isinstance(match, list) else 1, match))
+        for end in range(start + 2, min(n, start + max_words) + 1):
+            row = phrases.get(" ".join(words[start:end]))
+            if row is not None:
+                options.append((end, 1, row))
+        for end, cost, match in options:
+            if best[end] is None or best[start] + cost < best[end]:
+                best[end] = best[start] + cost
+                back[end] = (start, match)
+    if best[n] is None:
+        raise next(match for match in matches if isinstance(match, Exception))
+
+    found = []
+    end = n
+    while end:
+        start, match = back[end]
+        found.append(match)
+        end = start
+    found.reverse()
+    return found
+
+
+def word_source(word_index=None, word_file=None, db_manager=None, db_path="database/pi_words.db"):
+    """
+    The object one request looks words up in: word_index, one snapshot of
+    word_file, or db_manager (by default the shared DBManager for db_path).
+    All three offer search_words, search_occurrences and version.
+    """
+    if word_index is not None:
+        return word_index
+    if word_file is not None:
+        return word_file.snapshot()
+    if db_manager is not None:
+        return db_manager
+    return get_db_manager(db_path)
+
+
+def substring_trie(source, words, kgram_table=None):
+    """Trie of the indexed substrings of words; a WordIndex already holds one of every word."""
+    if isinstance(source, WordIndex):
+        return source.trie
+    wanted = set()
+    for word in words:
+        wanted |= database_substrings(word, kgram_table)
+    # Every indexed substring in a single query
+    return WordTrie(source.search_words(wanted))
+
+
+def resolve_cached(word_cache, key, compute):
+    """compute() through word_cache (a ResultCache) when one is given."""
+    if word_cache is None:
+        return compute()
+    return word_cache.get_or_compute(key, compute)
+
+
+def process_search_request(
+    input_string,
+    db_path="database/pi_words.db",
+    suffix_index=None,
+    word_index=None,
+    db_manager=None,
+    word_cache=None,
+    kgram_table=None,
+    locality=True,
+    word_file=None,
+):
     """
     Process the input string and return search results.
-    Only searches for full matches.
+
+    Each word resolves to its word_positions row when it is indexed as a whole.
+    Otherwise it resolves to a list of rows that spell it in the fewest
+    segments, found by dynamic programming over a prefix trie. Runs of words
+    indexed together as a phrase (see the indexer's --phrases) collapse into
+    a single row when that saves segments. Words that are
+    not indexed in the database are looked up in suffix_index (a
+    SuffixArrayIndex) when one is given. With a word_index (an in-memory
+    WordIndex) no database I/O is done at all. With a word_file (a memory-mapped
+    WordFile) every lookup, occurrences included, is a hash probe into one
+    snapshot of the file. Otherwise
+    every word costs one DBManager.search_words query on db_manager (by
+    default the shared DBManager for db_path). With a word_cache (a ResultCache) each word is
+    resolved once per data version. With a kgram_table (KGramTable) fragments
+    of up to kgram_table.max_k characters never touch the database. With
+    locality, rows move to other stored occurrences of their word so the
+    message spans few pages of pi (see cluster_positions).
     """
     if not input_string:
         return {"error": "Input string cannot be empty."}
 
     # Split the input string into words
-    words = input_string.split()
-    found_matches = []
+    words = [word.lower() for word in input_string.split()]
+    matches = []
+
+    def add_match(compute):
+        # Unresolvable words are only fatal if no phrase covers them
+        try:
+            with span("search.resolve_word"):
+                matches.append(compute())
+        except ValueError as e:
+            matches.append(e)
 
-    # Open a single database connection for ALL searches
-    conn = None
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        source = word_source(word_index, word_file, db_manager, db_path)
+        version = source.version
+
+        def lookup(word):
+            trie = substring_trie(source, [word], kgram_table)
+            return resolve_word(word, trie, suffix_index, kgram_table)
 
-        # Process each word separately
         for word in words:
-            word = word.lower()
-            # Get full match using the existing cursor directly
-            base32_word = ascii_to_base32(word)
-            logger.info(f"processing: {word}, b32: {base32_word}")
-            match = search_word_with_conn(cursor, word)
-
-            # If we found a match, add it to our results
-
-            if len(match) > 1 and match[4] == len(word):
-                logger.info(f"full match for: {word}")
-                found_matches.append(match)
-            else:
-                if len(match) > 1:
-                    logger.info(
-                        f"no indexed full match for: {word} breaking into components {word[:match[4]]} , {word[match[4]:]}"
-                    )
-                    # Find the best way to construct the word from segments
-                    compositeMatches = []
-                    compositeMatches.append(match)
-                    resolvedSubString = word[:match[4]]
-                    unresolvedSubString = word[match[4]:]
-                    for i in unresolvedSubString:
-                        compositeMatches.append(search_word_with_conn(cursor, i))
-                    logger.info(f"- composite matches: {compositeMatches}")
-                    found_matches.append(compositeMatches)
-                else:
-                    logger.info(f"no match for: {word}, breaking into segments")
-                    compositeMatches = []
-                    resolvedSubString = ""
-                    r_match=[]
-                    for i in range(1,len(word)):
-                        print(f"========{i}========={word[:i]}========")
-                        op_match = search_word_with_conn(cursor, word[:i])
-                        if len(op_match) > 1 and op_match[4] == len(word[:i]):
-                            r_match=op_match
-                            print(r_match)
-                            resolvedSubString = word[:i]
-
-                    compositeMatches.append(r_match)
-                    unresolvedSubString = word[len(resolvedSubString):]
-                    for i in unresolvedSubString:
-                        compositeMatches.append(search_word_with_conn(cursor, i))
-                    found_matches.append(compositeMatches)
+            add_match(lambda word=word: resolve_cached(word_cache, (version, word), lambda: lookup(word)))
+        phrases = full_matches(source.search_words(phrase_candidates(words)))
+        found_matches = cover_words(words, matches, phrases)
 
+        if locality:
+            occurrences = source.search_occurrences(relocatable_words(found_matches))
+            with span("search.locality"):
+                found_matches = cluster_positions(found_matches, occurrences)
         logger.info(f"results: {found_matches}")
 
     except sqlite3.Error as e:
         logger.error(f"Database error: {e}")
         return {"error": f"Database error: {str(e)}"}
-    finally:
-        # Ensure connection is closed even if an exception occurs
-        if conn:
-            conn.close()
 
     # Return a response with the matches found
     return found_matches
 
 
+def resolve_words(words, trie, suffix_index=None, kgram_table=None):
+    """
+    Resolve distinct words against one trie.
+
+    :return: Dict of word -> row or list of rows, and dict of word -> error
+             message for words that cannot be encoded.
+    """
+    resolved, errors = {}, {}
+    for word in words:
+        try:
+            resolved[word] = resolve_word(word, trie, suffix_index, kgram_table)
+        except ValueError as e:
+            errors[word] = str(e)
+    return resolved, errors
+
+
+def process_batch_search_request(
+    input_strings,
+    db_path="database/pi_words.db",
+    suffix_index=None,
+    word_index=None,
+    db_manager=None,
+    word_cache=None,
+    kgram_table=None,
+    locality=True,
+    word_file=None,
+):
+    """
+    Process many input strings at once.
+
+    Words are deduplicated across the whole batch and resolved in one pass:
+    against the WordIndex trie, or against a trie built from a single
+    set-based query (or hash probes into word_file) for every substring of
+    every new word. Words found in
+    word_cache are not looked up again. Phrase candidates of all inputs are
+    looked up with one more query, and with locality the occurrences of
+    every chosen word with one more.
+
+    :return: One entry per input, in order: the list of matches that
+             process_search_request would return, or {"error": ...}.
+    """
+    inputs = [[word.lower() for word in text.split()] if text else None for text in input_strings]
+    pending = {word for words in inputs if words for word in words}
+    resolved, errors = {}, {}
+
+    try:
+        source = word_source(word_index, word_file, db_manager, db_path)
+        version = source.version
+
+        if word_cache is not None:
+            for word in list(pending):
+                match = word_cache.get((version, word))
+                if match is not None:
+                    resolved[word] = match
+                    pending.discard(word)
+
+        candidates = set()
+        for words in inputs:
+            if words:
+                candidates |= phrase_candidates(words)
+        phrases = full_matches(source.search_words(candidates))
+
+        if pending:
+            trie = substring_trie(source, pending, kgram_table)
+            with span("search.resolve_words"):
+                found, errors = resolve_words(pending, trie, suffix_index, kgram_table)
+            resolved.update(found)
+            if word_cache is not None:
+                for word, match in found.items():
+                    word_cache.set((version, word), match)
+
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        return [{"error": f"Database error: {str(e)}"} for _ in inputs]
+
+    results = []
+    for words in inputs:
+        if words is None:
+            results.append({"error": "Input string cannot be empty."})
+            continue
+        matches = [resolved[word] if word in resolved else ValueError(errors[word]) for word in words]
+        try:
+            results.append(cover_words(words, matches, phrases))
+        except ValueError as e:
+            results.append({"error": str(e)})
+
+    if locality:
+        relocatable = set()
+        for result in results:
+            if not isinstance(result, dict):
+                relocatable |= relocatable_words(result)
+        try:
+            occurrences = source.search_occurrences(relocatable)
+        except sqlite3.Error as e:
+            logger.error(f"Database error: {e}")
+            return [{"error": f"Database error: {str(e)}"} for _ in inputs]
+        with span("search.locality"):
+            results = [
+                result if isinstance(result, dict) else cluster_positions(result, occurrences)
+                for result in results
+            ]
+    logger.info(f"Resolved {len(resolved)} distinct words for {len(results)} inputs")
+    return results
+
+
 if __name__ == "__main__":
     p.pprint(process_search_request("Hello I am PI"))
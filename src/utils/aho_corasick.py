@@ -0,0 +1,281 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .pi_digits import get_pi_digits
+
+ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+
+# Any byte outside the base32 alphabet maps to OTHER, which no pattern contains
+OTHER = len(ALPHABET)
+WIDTH = OTHER + 1
+SYMBOL_CODES = bytes(ALPHABET.index(b) if b in ALPHABET else OTHER for b in range(256))
+
+# Digits scanned per chunk when streaming pi
+SCAN_CHUNK = 1 << 22
+
+# Shards per worker process in parallel mode, so uneven shards balance out
+SHARDS_PER_WORKER = 4
+
+# Set in each worker process by _init_worker
+_worker_automaton = None
+_worker_pi_path = None
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a prefix-closed set of base32 patterns.
+
+    Every base32 word is inserted with all of its prefixes, so every trie node
+    is itself a pattern and a node's failure link is also its dictionary link.
+    One pass over pi records the first position of every node.
+    """
+
+    def __init__(self, patterns):
+        self.depth = [0]
+        children = [{}]
+        for pattern in patterns:
+            node = 0
+            for code in pattern.encode("ascii", "replace").translate(SYMBOL_CODES):
+                if code == OTHER:
+                    # Nothing past a non-base32 character can ever be found
+                    break
+                if code not in children[node]:
+                    children[node][code] = len(self.depth)
+                    children.append({})
+                    self.depth.append(self.depth[node] + 1)
+                node = children[node][code]
+        self._children = children
+        self._build_links()
+
+    def __len__(self):
+        return len(self.depth)
+
+    def _build_links(self):
+        """Compute failure links and the flattened DFA transition table."""
+        nodes = len(self.depth)
+        self.fail = [0] * nodes
+        self.goto = [0] * (nodes * WIDTH)
+        for code, child in self._children[0].items():
+            self.goto[code] = child
+
+        queue = deque(self._children[0].values())
+        while queue:
+            node = queue.popleft()
+            fail_row = self.fail[node] * WIDTH
+            row = node * WIDTH
+            self.goto[row : row + WIDTH] = self.goto[fail_row : fail_row + WIDTH]
+            for code, child in self._children[node].items():
+                self.fail[child] = self.goto[fail_row + code]
+                self.goto[row + code] = child
+                queue.append(child)
+
+    def node(self, pattern):
+        """Return the trie node for pattern, or -1 if it was not inserted."""
+        node = 0
+        for code in pattern.encode("ascii", "replace").translate(SYMBOL_CODES):
+            node = self._children[node].get(code, -1)
+            if node == -1:
+                return -1
+        return node
+
+    def path(self, pattern):
+        """Return the trie nodes for each inserted prefix of pattern, shortest first."""
+        nodes = []
+        node = 0
+        for code in pattern.encode("ascii", "replace").translate(SYMBOL_CODES):
+            node = self._children[node].get(code)
+            if node is None:
+                break
+            nodes.append(node)
+        return nodes
+
+    def scan(self, chunks, first=None):
+        """
+        Stream text through the automaton, recording first occurrences.
+
+        :param chunks: Iterable of (position, bytes-like) consecutive chunks.
+        :param first: List of first start positions per node to update in
+                      place (-1 = not seen yet), or None to start fresh.
+        :return: The list of first start positions per node.
+        """
+        if first is None:
+            first = [-1] * len(self.depth)
+        goto, fail, depth = self.goto, self.fail, self.depth
+        remaining = first.count(-1) - (first[0] == -1)
+        state = 0
+        for position, chunk in chunks:
+            codes = bytes(chunk).translate(SYMBOL_CODES)
+            for i, code in enumerate(codes):
+                state = goto[state * WIDTH + code]
+                if state and first[state] == -1:
+                    # Every suffix of this match is a pattern too; stop at the
+                    # first one already recorded, its own suffixes were as well.
+                    node = state
+                    while node and first[node] == -1:
+                        first[node] = position + i - depth[node] + 1
+                        remaining -= 1
+                        node = fail[node]
+                    if not remaining:
+                        return first
+        return first
+
+    def scan_top_k(self, chunks, k, found=None):
+        """
+        Stream text through the automaton, recording the first k start
+        positions of every node.
+
+        Once a node has k positions so do all of its suffixes (each of its
+        occurrences ends one of theirs), so the suffix walk stops there.
+
+        :param chunks: Iterable of (position, bytes-like) consecutive chunks.
+        :param found: List of position lists per node to extend in place, or None.
+        :return: The list of position lists per node, each in increasing order.
+        """
+        if found is None:
+            found = [[] for _ in self.depth]
+        goto, fail, depth = self.goto, self.fail, self.depth
+        remaining = sum(len(positions) < k for positions in found[1:])
+        state = 0
+        for position, chunk in chunks:
+            codes = bytes(chunk).translate(SYMBOL_CODES)
+            for i, code in enumerate(codes):
+                state = goto[state * WIDTH + code]
+                node = state
+                while node and len(found[node]) < k:
+                    found[node].append(position + i - depth[node] + 1)
+                    if len(found[node]) == k:
+                        remaining -= 1
+                    node = fail[node]
+                if not remaining:
+                    return found
+        return found
+
+
+def top_occurrences(base32_words, pi_digits, k, chunk_size=SCAN_CHUNK, progress=None, workers=1):
+    """
+    Find the first k exact occurrences of every word in a single pass over pi.
+
+    :param base32_words: List of base32 strings.
+    :param pi_digits: PiDigits or PackedPiDigits store.
+    :param k: Positions to keep per word.
+    :param progress: Optional callback(position), as for first_occurrences.
+    :param workers: Scan shards of pi in this many processes.
+    :return: One list of up to k increasing positions per word.
+    """
+    automaton = AhoCorasick(base32_words)
+
+    if workers > 1:
+        found = _parallel_scan(automaton, pi_digits, workers, chunk_size, progress, k)
+    else:
+        def chunks():
+            for position, chunk in pi_digits.iter_chunks(chunk_size):
+                yield position, chunk
+                if progress:
+                    progress(position + len(chunk))
+
+        found = automaton.scan_top_k(chunks(), k)
+
+    results = []
+    for word in base32_words:
+        node = automaton.node(word) if word else -1
+        results.append(found[node] if node > 0 else [])
+    return results
+
+
+def first_occurrences(base32_words, pi_digits, chunk_size=SCAN_CHUNK, progress=None, workers=1):
+    """
+    Find every word, or its longest prefix, in a single pass over pi.
+
+    Returns one (position, found_string, is_exact_match) tuple per word, the
+    same result find_in_pi gives: shorter prefixes need at least 2 characters,
+    and (-1, "", False) means nothing was found.
+
+    :param base32_words: List of base32 strings.
+    :param pi_digits: PiDigits or PackedPiDigits store.
+    :param progress: Optional callback(position) called after every chunk,
+                     or after every shard when workers > 1.
+    :param workers: Scan shards of pi in this many processes.
+    """
+    automaton = AhoCorasick(base32_words)
+
+    if workers > 1:
+        first = _parallel_scan(automaton, pi_digits, workers, chunk_size, progress)
+    else:
+        def chunks():
+            for position, chunk in pi_digits.iter_chunks(chunk_size):
+                yield position, chunk
+                if progress:
+                    progress(position + len(chunk))
+
+        first = automaton.scan(chunks())
+    return [_best_match(automaton, first, word) for word in base32_words]
+
+
+def shard_ranges(length, shards, overlap):
+    """
+    Split [0, length) into shards that each extend overlap digits into the next.
+
+    Every occurrence of a pattern of up to overlap + 1 characters starts inside
+    exactly one shard's own range and therefore lies entirely within that shard.
+    """
+    size = max(1, -(-length // shards))
+    return [(start, min(start + size + overlap, length)) for start in range(0, length, size)]
+
+
+def _init_worker(automaton, pi_path):
+    global _worker_automaton, _worker_pi_path
+    _worker_automaton = automaton
+    _worker_pi_path = pi_path
+
+
+def _scan_shard(start, end, chunk_size, k=None):
+    """
+    Scan one shard of pi in a worker process; returns first positions per
+    node, or the first k positions per node when k is given.
+    """
+    pi_digits = get_pi_digits(_worker_pi_path)
+    chunks = pi_digits.iter_chunks(chunk_size, start=start, end=end)
+    if k is None:
+        return _worker_automaton.scan(chunks)
+    return _worker_automaton.scan_top_k(chunks, k)
+
+
+def _parallel_scan(automaton, pi_digits, workers, chunk_size, progress, k=None):
+    """
+    Scan overlapping shards in a process pool and merge the minimum positions
+    (or the k smallest distinct positions when k is given).
+    """
+    overlap = max(automaton.depth) - 1
+    shards = shard_ranges(len(pi_digits), workers * SHARDS_PER_WORKER, overlap)
+    if k is None:
+        first = [-1] * len(automaton)
+    else:
+        found = [[] for _ in automaton.depth]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(automaton, pi_digits.file_path),
+    ) as executor:
+        futures = [executor.submit(_scan_shard, start, end, chunk_size, k) for start, end in shards]
+        for done, future in enumerate(as_completed(futures), 1):
+            if k is not None:
+                # Shards overlap, so the same occurrence can come from two of them
+                for node, positions in enumerate(future.result()):
+                    if positions:
+                        found[node] = sorted(set(found[node]).union(positions))[:k]
+            else:
+                for node, position in enumerate(future.result()):
+                    if position != -1 and (first[node] == -1 or position < first[node]):
+                        first[node] = position
+            if progress:
+                progress(len(pi_digits) * done // len(shards))
+    return first if k is None else found
+
+
+def _best_match(automaton, first, base32_word):
+    """Pick the longest prefix of base32_word that was found in pi."""
+    for node in reversed(automaton.path(base32_word)):
+        length = automaton.depth[node]
+        if first[node] != -1 and (length == len(base32_word) or length > 1):
+            return (first[node], base32_word[:length], length == len(base32_word))
+    return (-1, "", False)
@@ -0,0 +1,278 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .read_planner import READ_MERGE_GAP, iter_chunks, plan_reads, read_many
+
+# Fixed-point fractions are kept as LIMBS integers of LIMB_BITS bits each.
+# A remainder (< 2**37) shifted by LIMB_BITS must still fit in an int64.
+LIMB_BITS = 26
+LIMBS = 3
+FRACTION_BITS = LIMB_BITS * LIMBS
+FRACTION_MASK = (1 << FRACTION_BITS) - 1
+MAX_MODULUS = 1 << (63 - LIMB_BITS)
+
+# Series terms evaluated per numpy batch
+TERMS_PER_CHUNK = 1 << 18
+
+# Below this many terms a single evaluation is not worth a process pool
+PARALLEL_MIN_TERMS = 1 << 22
+
+# One fraction_at(d) takes about d times this on one core (measured: ~2.6 s
+# at d = 1e6, so ~45 minutes at d = 1e9)
+SECONDS_PER_TERM = 2.6e-6
+
+# Most digits past the base store one read_many may compute by default; at
+# ~8 base32 digits per evaluation this bounds a request to a few evaluations
+MAX_COMPUTED_DIGITS = 64
+
+# pi = 4 S(1) - 2 S(4) - S(5) - S(6) (Bailey-Borwein-Plouffe)
+BBP_TERMS = ((1, 4), (4, -2), (5, -1), (6, -1))
+
+# Layout of pi_base32_1b.txt: the hex digits "3243F6A8..." with a "0" nibble
+# prepended (the hex file has an odd digit count), encoded 5 bits per symbol
+BASE32_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+LEADING_NIBBLES = (0x0, 0x3)
+
+
+def _mulmod(a, b, m):
+    """
+    a * b mod m for int64 arrays with a, b < m < MAX_MODULUS.
+
+    The quotient is estimated in floating point; the remainder is then exact
+    in wrapping int64 arithmetic because its true value lies in (-m, 2m).
+    """
+    q = np.floor(a.astype(np.float64) * b.astype(np.float64) / m).astype(np.int64)
+    with np.errstate(over="ignore"):
+        r = a * b - q * m
+    r = np.where(r < 0, r + m, r)
+    return np.where(r >= m, r - m, r)
+
+
+def _powmod16(exponents, moduli):
+    """16 ** exponents mod moduli, elementwise, by square-and-multiply over all bits at once."""
+    result = np.ones_like(moduli) % moduli
+    base = np.full_like(moduli, 16) % moduli
+    e = exponents.copy()
+    while e.any():
+        odd = (e & 1).astype(bool)
+        result = np.where(odd, _mulmod(result, base, moduli), result)
+        base = _mulmod(base, base, moduli)
+        e >>= 1
+    return result
+
+
+def _fixed_fraction(remainders, moduli):
+    """Sum of remainders / moduli as a FRACTION_BITS fixed-point int (mod 1), truncating each term."""
+    total = 0
+    r = remainders
+    for limb in range(LIMBS):
+        shifted = r << LIMB_BITS
+        total = (total << LIMB_BITS) + int((shifted // moduli).sum())
+        r = shifted % moduli
+    return total
+
+
+def _head_sum(d, k_start, k_stop):
+    """
+    Fixed-point sum over k in [k_start, k_stop) (all k <= d) of the BBP series
+    at position d, combined over S(1), S(4), S(5), S(6).
+    """
+    total = 0
+    for chunk_start in range(k_start, k_stop, TERMS_PER_CHUNK):
+        k = np.arange(chunk_start, min(chunk_start + TERMS_PER_CHUNK, k_stop), dtype=np.int64)
+        exponents = d - k
+        for j, coefficient in BBP_TERMS:
+            moduli = 8 * k + j
+            total += coefficient * _fixed_fraction(_powmod16(exponents, moduli), moduli)
+    return total & FRACTION_MASK
+
+
+def _tail_sum(d):
+    """Fixed-point sum of the series terms with k > d, where 16 ** (d - k) < 1."""
+    total = 0
+    k = d + 1
+    while True:
+        scale = 16 ** (k - d)
+        terms = [coefficient * ((1 << FRACTION_BITS) // (scale * (8 * k + j))) for j, coefficient in BBP_TERMS]
+        if not any(terms):
+            return total
+        total += sum(terms)
+        k += 1
+
+
+def fraction_at(d, workers=1):
+    """
+    Fractional part of 16**d * pi as a FRACTION_BITS fixed-point int.
+
+    :param d: Hex digit offset after the point (0 gives 0x243F6A88...).
+    :param workers: Split the series over this many processes.
+    """
+    if 8 * d + 6 >= MAX_MODULUS:
+        raise ValueError(f"Hex position {d} is beyond what the spigot supports")
+    terms = d + 1
+    if workers > 1 and terms >= PARALLEL_MIN_TERMS:
+        step = -(-terms // workers)
+        bounds = [(start, min(start + step, terms)) for start in range(0, terms, step)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_head_sum, d, start, stop) for start, stop in bounds]
+            head = sum(future.result() for future in futures)
+    else:
+        head = _head_sum(d, 0, terms)
+    return (head + _tail_sum(d)) & FRACTION_MASK
+
+
+def reliable_digits(d):
+    """Hex digits of fraction_at(d) that rounding of the d + 1 truncated terms cannot reach."""
+    error_bits = (8 * (d + 64)).bit_length() + 1
+    return max(1, (FRACTION_BITS - error_bits) // 4)
+
+
+def pi_hex_digits(start, count, workers=1):
+    """
+    Hex digits of pi after the point, computed without the digits before them.
+
+    :param start: 0-indexed offset after the point (0 gives "243F6A88...").
+    :return: str of count uppercase hex digits.
+    """
+    digits = []
+    position = start
+    while position < start + count:
+        usable = reliable_digits(position)
+        fraction = fraction_at(position, workers)
+        text = f"{fraction >> (FRACTION_BITS % 4):0{FRACTION_BITS // 4}X}"
+        digits.append(text[: min(usable, start + count - position)])
+        position += usable
+    return "".join(digits)
+
+
+def estimated_seconds(start, count, workers=1):
+    """
+    Rough time base32_digits(start, count, workers) takes, from SECONDS_PER_TERM.
+
+    Every evaluation near hex offset d costs ~d terms and yields
+    reliable_digits(d) hex digits.
+    """
+    if count <= 0:
+        return 0.0
+    first = 5 * start // 4
+    last = -(-5 * (start + count) // 4)
+    evaluations = -(-(last - first) // reliable_digits(last))
+    parallel = workers if workers > 1 and last >= PARALLEL_MIN_TERMS else 1
+    return evaluations * SECONDS_PER_TERM * (last + 1) / parallel
+
+
+class SpigotLimitError(ValueError):
+    """A read would compute more spigot digits than allowed."""
+
+
+def _nibbles(first, last, workers):
+    """Nibbles first..last-1 of the padded hex stream the base32 file was encoded from."""
+    lead = [LEADING_NIBBLES[h] for h in range(first, min(last, len(LEADING_NIBBLES)))]
+    fraction_start = max(first, len(LEADING_NIBBLES)) - len(LEADING_NIBBLES)
+    fraction_count = max(0, last - max(first, len(LEADING_NIBBLES)))
+    return lead + [int(c, 16) for c in pi_hex_digits(fraction_start, fraction_count, workers)]
+
+
+def base32_digits(start, count, workers=1):
+    """
+    Base32 symbols start..start+count-1 of pi, as pi_base32_1b.txt would hold them.
+
+    :return: bytes of count symbols from BASE32_ALPHABET.
+    """
+    if count <= 0:
+        return b""
+    first = 5 * start // 4
+    last = -(-5 * (start + count) // 4)
+    value = 0
+    for nibble in _nibbles(first, last, workers):
+        value = (value << 4) | nibble
+    total_bits = 4 * (last - first)
+    offset = 5 * start - 4 * first
+    symbols = bytearray(count)
+    for i in range(count):
+        shift = total_bits - offset - 5 * (i + 1)
+        symbols[i] = ord(BASE32_ALPHABET[(value >> shift) & 31])
+    return bytes(symbols)
+
+
+class SpigotPiDigits:
+    """
+    Digit store that computes base32 pi digits with the BBP formula.
+
+    Positions below len(base) are read from base (a PiDigits or
+    PackedPiDigits); the rest, up to length, are computed on demand. Every
+    hex digit at offset d costs O(d) modular exponentiations, so this serves
+    occasional reads just past the end of the file, not bulk scans; reads
+    computing more than max_computed digits raise SpigotLimitError.
+    """
+
+    decimal_point = -1
+    file_path = None
+
+    def __init__(self, length, base=None, workers=1, max_computed=None):
+        self.base = base
+        self.length = length
+        self.workers = workers
+        self.max_computed = max_computed
+        self._base_length = len(base) if base is not None else 0
+
+    def __len__(self):
+        return self.length
+
+    def read_bytes(self, start, count):
+        """Return count digits starting at start as bytes."""
+        start = max(0, min(start, self.length))
+        end = min(start + count, self.length)
+        if end <= start:
+            return b""
+        head = b""
+        if start < self._base_length:
+            head = self.base.read_bytes(start, min(end, self._base_length) - start)
+            start = self._base_length
+        if start >= end:
+            return head
+        self._check_computed(end - start)
+        return head + base32_digits(start, end - start, self.workers)
+
+    def _check_computed(self, count):
+        if self.max_computed is not None and count > self.max_computed:
+            raise SpigotLimitError(
+                f"reading {count} digits past position {self._base_length} exceeds "
+                f"the limit of {self.max_computed} computed digits"
+            )
+
+    def read(self, start, count):
+        """Return count digits starting at start as a str."""
+        return self.read_bytes(start, count).decode("ascii")
+
+    def read_many(self, ranges, max_gap=READ_MERGE_GAP):
+        """
+        Return the str for each (start, count) in ranges, merging nearby reads (see read_planner).
+
+        Only the parts of ranges inside base are merged across gaps; computed
+        parts are merged only where they overlap, so no gap digit is
+        computed, and together they may not exceed max_computed digits.
+        """
+        stored, computed = [], []
+        for start, count in ranges:
+            start = max(0, min(start, self.length))
+            end = min(start + max(0, count), self.length)
+            split = max(start, min(end, self._base_length))
+            stored.append((start, split - start))
+            computed.append((split, end - split))
+        self._check_computed(sum(end - start for start, end, _ in plan_reads(computed, 0)))
+        heads = read_many(self.base, stored, max_gap) if self._base_length else [""] * len(ranges)
+        tails = read_many(self, computed, 0)
+        return [head + tail for head, tail in zip(heads, tails)]
+
+    def view(self, start, count):
+        return memoryview(self.read_bytes(start, count))
+
+    def iter_chunks(self, chunk_size, overlap=0, start=0, end=None):
+        """Yield (position, memoryview) chunks of the digits (see read_planner.iter_chunks)."""
+        return iter_chunks(self, chunk_size, overlap, start, end)
+
+    def close(self):
+        pass
+
@@ -0,0 +1,79 @@
+import numpy as np
+
+# Substrings at least this long are looked up by trigram postings
+TRIGRAM = 3
+
+
+class CharacterIndex:
+    """
+    In-memory inverted index for infix and character-set queries over words.
+
+    Every character maps to a packed bitmap over word ids, and every trigram
+    to a sorted array of the ids containing it. A character-set query is an
+    AND of bitmaps; an infix query intersects the postings of its trigrams
+    (or the bitmaps of its characters, for infixes shorter than a trigram)
+    and only checks the surviving candidates. Ids are positions in words.
+    """
+
+    def __init__(self, words):
+        self.words = list(words)
+        chars, trigrams = {}, {}
+        for i, word in enumerate(self.words):
+            for char in set(word):
+                chars.setdefault(char, []).append(i)
+            for gram in {word[j : j + TRIGRAM] for j in range(len(word) - TRIGRAM + 1)}:
+                trigrams.setdefault(gram, []).append(i)
+        self._chars = {char: self._bitmap(ids) for char, ids in chars.items()}
+        self._trigrams = {gram: np.array(ids, dtype=np.int32) for gram, ids in trigrams.items()}
+
+    def __len__(self):
+        return len(self.words)
+
+    def _bitmap(self, ids):
+        mask = np.zeros(len(self.words), dtype=bool)
+        mask[ids] = True
+        return np.packbits(mask)
+
+    def _with_bitmaps(self, chars):
+        """Ids of the words containing every character in chars."""
+        bitmap = None
+        for char in set(chars):
+            char_bitmap = self._chars.get(char)
+            if char_bitmap is None:
+                return np.empty(0, dtype=np.int64)
+            bitmap = char_bitmap if bitmap is None else bitmap & char_bitmap
+        if bitmap is None:
+            return np.arange(len(self.words))
+        return np.flatnonzero(np.unpackbits(bitmap, count=len(self.words)))
+
+    def with_characters(self, chars):
+        """
+        Find the words that contain every character of chars, in any order.
+
+        :return: List of word ids in increasing order.
+        """
+        return self._with_bitmaps(chars).tolist()
+
+    def containing(self, substring):
+        """
+        Find the words that contain substring.
+
+        :return: List of word ids in increasing order.
+        """
+        if len(substring) < TRIGRAM:
+            candidates = self._with_bitmaps(substring)
+        else:
+            postings = []
+            for gram in {substring[j : j + TRIGRAM] for j in range(len(substring) - TRIGRAM + 1)}:
+                ids = self._trigrams.get(gram)
+                if ids is None:
+                    return []
+                postings.append(ids)
+            postings.sort(key=len)
+            candidates = postings[0]
+            for ids in postings[1:]:
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if len(substring) == TRIGRAM:
+                return candidates.tolist()
+        words = self.words
+        return [i for i in candidates.tolist() if substring in words[i]]
@@ -0,0 +1,119 @@
+import logging
+import os
+
+import numpy as np
+
+from .aho_corasick import OTHER, SCAN_CHUNK, SYMBOL_CODES
+
+logger = logging.getLogger(__name__)
+
+# 32**4 (about 1M) four-character grams; larger k grows the table 32x per step
+DEFAULT_MAX_K = 4
+
+BITS_PER_SYMBOL = 5
+
+
+def kgram_offset(k):
+    """Index of the first k-gram in the flat table (grams of length 1..k-1 come first)."""
+    return (32**k - 32) // 31
+
+
+def table_size(max_k):
+    """Number of slots for every gram of length 1..max_k."""
+    return kgram_offset(max_k + 1)
+
+
+def build_kgram_table(pi_digits, max_k=DEFAULT_MAX_K, chunk_size=SCAN_CHUNK):
+    """
+    Compute the first position of every base32 gram of length 1..max_k.
+
+    Streams pi in chunks (overlapping by max_k - 1 digits). For each chunk and
+    each k, the codes of all windows are computed with shifted numpy slices,
+    np.unique picks the first window per gram, and only slots that are still
+    empty are filled, so earlier chunks win. Stops as soon as every gram has
+    been seen.
+
+    :param pi_digits: PiDigits or PackedPiDigits.
+    :return: Flat numpy array, -1 for grams that never occur; int32 when positions fit.
+    """
+    table = np.full(table_size(max_k), -1, dtype=np.int64)
+    lut = np.frombuffer(SYMBOL_CODES, dtype=np.uint8)
+    for position, view in pi_digits.iter_chunks(chunk_size, overlap=max_k - 1):
+        codes = lut[np.frombuffer(view, dtype=np.uint8)].astype(np.int64)
+        valid = codes != OTHER
+        for k in range(1, max_k + 1):
+            windows = len(codes) - k + 1
+            if windows <= 0:
+                break
+            values = np.zeros(windows, dtype=np.int64)
+            ok = np.ones(windows, dtype=bool)
+            for j in range(k):
+                values = (values << BITS_PER_SYMBOL) | codes[j : j + windows]
+                ok &= valid[j : j + windows]
+            starts = np.flatnonzero(ok)
+            grams, first = np.unique(values[starts], return_index=True)
+            slots = kgram_offset(k) + grams
+            empty = table[slots] == -1
+            table[slots[empty]] = position + starts[first[empty]]
+        if (table >= 0).all():
+            logger.info(f"Every gram up to length {max_k} found within {position + len(codes)} digits")
+            break
+
+    if table.max(initial=-1) < np.iinfo(np.int32).max:
+        return table.astype(np.int32)
+    return table
+
+
+def save_kgram_table(table, path):
+    """Write a k-gram table to disk in .npy format so it can be memory-mapped."""
+    np.save(path, table)
+
+
+class KGramTable:
+    """
+    Direct-indexed first occurrences of every short base32 string.
+
+    A lookup packs the gram into an integer (5 bits per symbol) and reads one
+    slot, so resolving a short fragment costs no search and no database query.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.max_k = 0
+        while table_size(self.max_k + 1) <= len(table):
+            self.max_k += 1
+        if table_size(self.max_k) != len(table):
+            raise ValueError(f"{len(table)} entries is not a complete k-gram table")
+
+    def __len__(self):
+        return len(self.table)
+
+    def find(self, gram):
+        """
+        First position of a base32 gram of at most max_k characters.
+
+        :param gram: str or bytes.
+        :return: The 0-indexed position, or -1 if it never occurs or is too long.
+        """
+        if isinstance(gram, str):
+            gram = gram.encode("ascii", "replace")
+        if not 0 < len(gram) <= self.max_k:
+            return -1
+        value = 0
+        for code in gram.translate(SYMBOL_CODES):
+            if code == OTHER:
+                return -1
+            value = (value << BITS_PER_SYMBOL) | code
+        return int(self.table[kgram_offset(len(gram)) + value])
+
+
+def load_kgram_table(path):
+    """
+    Open a KGramTable memory-mapped from path.
+
+    :return: KGramTable, or None when the table has not been built.
+    """
+    if not os.path.exists(path):
+        logger.info(f"No k-gram table at {path}, short fragments use the database")
+        return None
+    return KGramTable(np.load(path, mmap_mode="r"))
@@ -0,0 +1,137 @@
+import base64
+import mmap
+import struct
+
+from .read_planner import READ_MERGE_GAP, iter_chunks, read_many
+
+# Header: magic, format version, reserved, number of base32 symbols
+PACKED_MAGIC = b"PI32"
+PACKED_VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+
+# Eight 5-bit base32 symbols pack into exactly five bytes
+SYMBOLS_PER_GROUP = 8
+BYTES_PER_GROUP = 5
+
+# Symbols decoded at a time when scanning the packed file
+SCAN_CHUNK = 1 << 20
+
+
+def is_packed_file(file_path):
+    """Return True if file_path starts with the packed digit header."""
+    with open(file_path, "rb") as file:
+        return file.read(len(PACKED_MAGIC)) == PACKED_MAGIC
+
+
+def pack_base32_file(source_path, packed_path, chunk_size=SCAN_CHUNK):
+    """
+    Convert a base32 pi digit text file into the packed 5-bit format.
+
+    The text is streamed, so memory use stays at chunk_size regardless of the
+    file size. A decimal point, whitespace and '=' padding are dropped.
+
+    :param source_path: Text file with one base32 symbol per byte.
+    :param packed_path: Output file.
+    :return: Number of symbols written.
+    """
+    chunk_size -= chunk_size % SYMBOLS_PER_GROUP
+    count = 0
+    pending = b""
+    with open(source_path, "rb") as source, open(packed_path, "wb") as packed:
+        packed.write(HEADER.pack(PACKED_MAGIC, PACKED_VERSION, 0, 0))
+        while True:
+            data = source.read(chunk_size)
+            if not data:
+                break
+            pending += data.translate(None, b".=\r\n\t ")
+            usable = len(pending) - len(pending) % SYMBOLS_PER_GROUP
+            packed.write(base64.b32decode(pending[:usable]))
+            count += usable
+            pending = pending[usable:]
+        if pending:
+            # Pad the final group with 'A' (zero bits); the header keeps the real count
+            packed.write(base64.b32decode(pending.ljust(SYMBOLS_PER_GROUP, b"A")))
+            count += len(pending)
+        packed.seek(0)
+        packed.write(HEADER.pack(PACKED_MAGIC, PACKED_VERSION, 0, count))
+    return count
+
+
+class PackedPiDigits:
+    """
+    Random-access reader for packed base32 pi digits.
+
+    Exposes the same read interface as PiDigits, but only the five-byte groups
+    that cover the requested range are decoded.
+    """
+
+    decimal_point = -1
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = open(file_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self._count = HEADER.unpack_from(self._mmap, 0)
+        if magic != PACKED_MAGIC or version != PACKED_VERSION:
+            raise ValueError(f"{file_path} is not a packed pi digit file")
+
+    def __len__(self):
+        return self._count
+
+    def read_bytes(self, start, count):
+        """Return count digits starting at start as bytes."""
+        start = max(0, min(start, self._count))
+        end = min(start + count, self._count)
+        if end <= start:
+            return b""
+        first_group = start // SYMBOLS_PER_GROUP
+        last_group = -(-end // SYMBOLS_PER_GROUP)
+        offset = HEADER.size + first_group * BYTES_PER_GROUP
+        packed = self._mmap[offset : HEADER.size + last_group * BYTES_PER_GROUP]
+        skip = start - first_group * SYMBOLS_PER_GROUP
+        return base64.b32encode(packed)[skip : skip + end - start]
+
+    def read(self, start, count):
+        """Return count digits starting at start as a str."""
+        return self.read_bytes(start, count).decode("ascii")
+
+    def read_many(self, ranges, max_gap=READ_MERGE_GAP):
+        """Return the str for each (start, count) in ranges, merging nearby reads (see read_planner)."""
+        return read_many(self, ranges, max_gap)
+
+    def view(self, start, count):
+        """Return count digits starting at start as a memoryview (decoded copy)."""
+        return memoryview(self.read_bytes(start, count))
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self.read(key, 1)
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            raise ValueError("PackedPiDigits only supports contiguous slices")
+        return self.view(start, max(0, stop - start))
+
+    def iter_chunks(self, chunk_size, overlap=0, start=0, end=None):
+        """Yield (position, memoryview) chunks of the digits (see read_planner.iter_chunks)."""
+        return iter_chunks(self, chunk_size, overlap, start, end)
+
+    def find(self, sub, start=0, end=None):
+        """
+        Find the first occurrence of sub at or after start.
+
+        :param sub: str or bytes to search for.
+        :return: The 0-indexed digit position, or -1 if not found.
+        """
+        if isinstance(sub, str):
+            sub = sub.encode("ascii")
+        if not sub:
+            return start
+        for position, chunk in self.iter_chunks(SCAN_CHUNK, len(sub) - 1, start, end):
+            pos = bytes(chunk).find(sub)
+            if pos != -1:
+                return position + pos
+        return -1
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
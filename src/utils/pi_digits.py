@@ -0,0 +1,133 @@
+import functools
+import mmap
+
+from .bbp import MAX_COMPUTED_DIGITS, SpigotPiDigits
+from .packed_digits import PackedPiDigits, is_packed_file
+from .read_planner import READ_MERGE_GAP, iter_chunks, read_many
+
+# Only the first few bytes are checked for a decimal point ("3.243F..." style files).
+DECIMAL_POINT_SEARCH = 16
+
+
+class PiDigits:
+    """
+    Read-only, memory-mapped view of a pi digit file.
+
+    Positions are 0-indexed into the digits with any leading decimal point
+    removed, the same positions the indexer stores in word_positions. The file
+    is never read into the Python heap: every process that opens it shares the
+    same pages through the OS page cache.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = open(file_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self.decimal_point = self._mmap[:DECIMAL_POINT_SEARCH].find(b".")
+
+    def __len__(self):
+        return len(self._mmap) - (1 if self.decimal_point != -1 else 0)
+
+    def _raw(self, position):
+        """Translate a digit position into a byte offset in the file."""
+        if self.decimal_point != -1 and position >= self.decimal_point:
+            return position + 1
+        return position
+
+    def _raw_end(self, position):
+        """Translate an exclusive end position into a byte offset in the file."""
+        if self.decimal_point != -1 and position > self.decimal_point:
+            return position + 1
+        return position
+
+    def view(self, start, count):
+        """
+        Return count digits starting at start as a memoryview into the file.
+
+        No data is copied unless the range spans the decimal point.
+        """
+        start = max(0, min(start, len(self)))
+        end = min(start + count, len(self))
+        if self.decimal_point != -1 and start < self.decimal_point < end:
+            dot = self.decimal_point
+            return memoryview(bytes(self._view[start:dot]) + bytes(self._view[dot + 1 : end + 1]))
+        return self._view[self._raw(start) : self._raw_end(max(start, end))]
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return chr(self.view(key, 1)[0])
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            raise ValueError("PiDigits only supports contiguous slices")
+        return self.view(start, max(0, stop - start))
+
+    def read_bytes(self, start, count):
+        """Return count digits starting at start as bytes."""
+        return bytes(self.view(start, count))
+
+    def read(self, start, count):
+        """Return count digits starting at start as a str."""
+        return self.read_bytes(start, count).decode("ascii")
+
+    def read_many(self, ranges, max_gap=READ_MERGE_GAP):
+        """Return the str for each (start, count) in ranges, merging nearby reads (see read_planner)."""
+        return read_many(self, ranges, max_gap)
+
+    def find(self, sub, start=0, end=None):
+        """
+        Find the first occurrence of sub at or after start.
+
+        :param sub: str or bytes to search for.
+        :return: The 0-indexed digit position, or -1 if not found.
+        """
+        if isinstance(sub, str):
+            sub = sub.encode("ascii")
+        end = len(self) if end is None else min(end, len(self))
+        dot = self.decimal_point
+        if dot != -1 and start < dot:
+            # Matches around the decimal point need the stripped digits
+            head = self.read_bytes(start, min(end, dot + len(sub)) - start)
+            pos = head.find(sub)
+            if pos != -1:
+                return start + pos
+            start = dot
+        pos = self._mmap.find(sub, self._raw(start), self._raw_end(end))
+        if pos == -1:
+            return -1
+        return pos - 1 if dot != -1 and pos > dot else pos
+
+    def iter_chunks(self, chunk_size, overlap=0, start=0, end=None):
+        """Yield (position, memoryview) chunks of the digits (see read_planner.iter_chunks)."""
+        return iter_chunks(self, chunk_size, overlap, start, end)
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+
+def open_pi_digits(file_path):
+    """Open a digit file as PackedPiDigits or PiDigits depending on its format."""
+    if is_packed_file(file_path):
+        return PackedPiDigits(file_path)
+    return PiDigits(file_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_pi_digits(file_path):
+    """Return the process-wide digit store for file_path, opening it once."""
+    return open_pi_digits(file_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_extended_pi_digits(file_path, extra_digits, max_computed=MAX_COMPUTED_DIGITS):
+    """
+    Return the digit store for file_path extended by extra_digits digits that
+    are computed with the BBP spigot (see bbp) instead of read from disk, at
+    most max_computed of them per read_many.
+    """
+    base = get_pi_digits(file_path)
+    if extra_digits <= 0:
+        return base
+    return SpigotPiDigits(len(base) + extra_digits, base, max_computed=max_computed)
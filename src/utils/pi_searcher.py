@@ -1,10 +1,33 @@
+import functools
+import os
 import sqlite3
 
+from .character_index import CharacterIndex
+
+
+@functools.lru_cache(maxsize=8)
+def load_character_index(db_path, stamp):
+    """
+    Read every (id, word) row once per database version (stamp is the file's
+    mtime and size) and index the lowercased words, so matches can ignore
+    case as LIKE does.
+    """
+    connection = sqlite3.connect(db_path)
+    try:
+        rows = connection.execute("SELECT id, word FROM words ORDER BY rowid").fetchall()
+    finally:
+        connection.close()
+    return rows, CharacterIndex(word.lower() for _, word in rows)
+
+
 def search_words_in_db(search_string, db_path='database/pi_words.db'):
     """
     Searches for full words, partial matches, and character-wise matches in the pi_words database.
     Returns a dictionary with indexes of found words categorized by match type.
     """
+    stat = os.stat(db_path)
+    rows, index = load_character_index(db_path, (stat.st_mtime_ns, stat.st_size))
+
     connection = sqlite3.connect(db_path)
     cursor = connection.cursor()
 
@@ -20,19 +43,17 @@ def search_words_in_db(search_string, db_path='database/pi_words.db'):
     full_matches = cursor.fetchall()
     results['full_matches'].extend(full_matches)
 
-    # Search for partial matches
-    cursor.execute("SELECT id, word FROM words WHERE word LIKE ?", ('%' + search_string + '%',))
-    partial_matches = cursor.fetchall()
-    results['partial_matches'].extend(partial_matches)
+    connection.close()
 
-    # Search for character-wise matches
-    cursor.execute("SELECT id, word FROM words")
-    all_words = cursor.fetchall()
-    for word in all_words:
-        if all(char in word[1] for char in search_string):
-            results['character_matches'].append(word)
+    # Search for partial matches, ignoring case
+    results['partial_matches'].extend(rows[i] for i in index.containing(search_string.lower()))
 
-    connection.close()
+    # Search for character-wise matches; the index ignores case, so check the exact characters
+    results['character_matches'].extend(
+        rows[i]
+        for i in index.with_characters(search_string.lower())
+        if all(char in rows[i][1] for char in search_string)
+    )
     return results
 
 
@@ -0,0 +1,58 @@
+# Ranges closer than this many digits are fetched with a single read
+READ_MERGE_GAP = 4096
+
+
+def plan_reads(ranges, max_gap=READ_MERGE_GAP):
+    """
+    Group (start, count) ranges into few contiguous spans.
+
+    Ranges are sorted by start and merged while the next one begins within
+    max_gap digits of the current span's end.
+
+    :return: List of (span_start, span_end, [range indices]) in file order.
+    """
+    order = sorted(range(len(ranges)), key=lambda k: ranges[k][0])
+    spans = []
+    for k in order:
+        start, count = ranges[k]
+        start = max(0, start)
+        end = start + max(0, count)
+        if spans and start <= spans[-1][1] + max_gap:
+            span = spans[-1]
+            span[1] = max(span[1], end)
+            span[2].append(k)
+        else:
+            spans.append([start, end, [k]])
+    return [tuple(span) for span in spans]
+
+
+def read_many(pi_digits, ranges, max_gap=READ_MERGE_GAP):
+    """
+    Read many (start, count) ranges from a digit store with one read per planned span.
+
+    :return: List of str in the order of ranges, as pi_digits.read would return them.
+    """
+    results = [None] * len(ranges)
+    for span_start, span_end, members in plan_reads(ranges, max_gap):
+        data = pi_digits.read_bytes(span_start, span_end - span_start)
+        for k in members:
+            offset = max(0, ranges[k][0]) - span_start
+            results[k] = data[offset : offset + max(0, ranges[k][1])].decode("ascii")
+    return results
+
+
+def iter_chunks(pi_digits, chunk_size, overlap=0, start=0, end=None):
+    """
+    Yield (position, memoryview) chunks of a digit store in order.
+
+    Consecutive chunks share overlap digits so a pattern of up to
+    overlap + 1 characters is never split across a chunk boundary.
+    """
+    end = len(pi_digits) if end is None else min(end, len(pi_digits))
+    position = start
+    while position < end:
+        count = min(chunk_size + overlap, end - position)
+        yield position, pi_digits.view(position, count)
+        if position + count >= end:
+            break
+        position += chunk_size
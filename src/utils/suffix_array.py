@@ -0,0 +1,177 @@
+import logging
+import os
+
+import numpy as np
+
+from .pi_digits import get_pi_digits
+
+logger = logging.getLogger(__name__)
+
+# Number of leading bytes packed into the initial sort key (257**4 fits in int64).
+INITIAL_K = 4
+
+# Above this many matching suffixes the first occurrence is found with a plain
+# scan of the text instead: a pattern that frequent occurs very early anyway.
+MAX_RANGE_FOR_MIN = 1 << 16
+
+
+def build_suffix_array(text):
+    """
+    Build the suffix array of a byte string using numpy prefix doubling.
+
+    Memory use is a few int64 arrays of len(text), so building over the full
+    1B-character pi file needs a machine with plenty of RAM; it only has to be
+    done once.
+
+    :param text: bytes, bytearray, memoryview or uint8 numpy array.
+    :return: numpy uint32 array of suffix start positions in sorted order.
+    """
+    codes = np.frombuffer(text, dtype=np.uint8) if not isinstance(text, np.ndarray) else text
+    n = len(codes)
+    if n == 0:
+        return np.empty(0, dtype=np.uint32)
+    if n >= 1 << 32:
+        raise ValueError("Text too long for a uint32 suffix array.")
+
+    # Rank every suffix by its first INITIAL_K bytes (0 marks "past the end").
+    key = np.zeros(n, dtype=np.int64)
+    for j in range(INITIAL_K):
+        shifted = np.zeros(n, dtype=np.int64)
+        shifted[: n - j] = codes[j:].astype(np.int64) + 1
+        key = key * 257 + shifted
+    sa, rank = _rank_by_key(key)
+
+    k = INITIAL_K
+    while rank[sa[-1]] < n - 1 and k < n:
+        second = np.zeros(n, dtype=np.int64)
+        second[: n - k] = rank[k:] + 1
+        sa, rank = _rank_by_key(rank * (n + 1) + second)
+        k *= 2
+        logger.info(f"Suffix array: sorted by {k} characters")
+
+    return sa.astype(np.uint32)
+
+
+def _rank_by_key(key):
+    """Sort suffixes by key and return (order, dense rank of each suffix)."""
+    sa = np.argsort(key, kind="stable")
+    sorted_key = key[sa]
+    rank = np.empty(len(key), dtype=np.int64)
+    rank[sa[0]] = 0
+    rank[sa[1:]] = np.cumsum(sorted_key[1:] != sorted_key[:-1])
+    return sa, rank
+
+
+def save_suffix_array(sa, sa_path):
+    """Write a suffix array to disk in .npy format so it can be memory-mapped."""
+    np.save(sa_path, sa)
+
+
+class SuffixArrayIndex:
+    """
+    Memory-mapped suffix array over the base32 pi digits.
+
+    Both the digit file and the suffix array stay on disk; a lookup touches
+    O(log n) pages of each, so exact and longest-prefix searches take
+    milliseconds instead of a full scan.
+    """
+
+    def __init__(self, text_path, sa_path):
+        self.text = get_pi_digits(text_path)
+        self.sa = np.load(sa_path, mmap_mode="r")
+        if len(self.sa) != len(self.text):
+            raise ValueError(
+                f"Suffix array {sa_path} does not match {text_path} "
+                f"({len(self.sa)} != {len(self.text)} entries)"
+            )
+
+    def __len__(self):
+        return len(self.sa)
+
+    def _suffix(self, rank, length):
+        return self.text.read_bytes(int(self.sa[rank]), length)
+
+    def _bounds(self, pattern):
+        """Return the [lo, hi) range of suffix ranks that start with pattern."""
+        m = len(pattern)
+        lo, hi = 0, len(self.sa)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._suffix(mid, m) < pattern:
+                lo = mid + 1
+            else:
+                hi = mid
+        first = lo
+        hi = len(self.sa)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._suffix(mid, m) <= pattern:
+                lo = mid + 1
+            else:
+                hi = mid
+        return first, lo
+
+    def _first_position(self, pattern, lo, hi):
+        """Smallest text position among the suffix ranks [lo, hi)."""
+        if hi - lo > MAX_RANGE_FOR_MIN:
+            return self.text.find(pattern)
+        return int(self.sa[lo:hi].min())
+
+    def find(self, pattern):
+        """
+        Find the first occurrence of pattern in the text.
+
+        :param pattern: str or bytes to search for.
+        :return: The 0-indexed position, or -1 if not found.
+        """
+        if isinstance(pattern, str):
+            pattern = pattern.encode("ascii")
+        if not pattern:
+            return -1
+        lo, hi = self._bounds(pattern)
+        if lo == hi:
+            return -1
+        return self._first_position(pattern, lo, hi)
+
+    def longest_prefix(self, pattern):
+        """
+        Find the longest prefix of pattern that occurs in the text.
+
+        :param pattern: str or bytes to search for.
+        :return: (position, length) of the first occurrence of the longest
+                 prefix, or (-1, 0) if not even the first character occurs.
+        """
+        if isinstance(pattern, str):
+            pattern = pattern.encode("ascii")
+        if not pattern:
+            return (-1, 0)
+        lo, _ = self._bounds(pattern)
+
+        # The longest matching prefix is shared with one of the two suffixes
+        # adjacent to the insertion point of the full pattern.
+        length = 0
+        for rank in (lo - 1, lo):
+            if 0 <= rank < len(self.sa):
+                suffix = self._suffix(rank, len(pattern))
+                common = 0
+                while common < len(suffix) and suffix[common] == pattern[common]:
+                    common += 1
+                length = max(length, common)
+
+        if length == 0:
+            return (-1, 0)
+        prefix = pattern[:length]
+        lo, hi = self._bounds(prefix)
+        return (self._first_position(prefix, lo, hi), length)
+
+
+def load_suffix_index(text_path, sa_path):
+    """
+    Open a SuffixArrayIndex if both files exist.
+
+    :return: SuffixArrayIndex, or None when the suffix array has not been built.
+    """
+    if not (os.path.exists(text_path) and os.path.exists(sa_path)):
+        logger.info(f"No suffix array at {sa_path}, substring lookups disabled")
+        return None
+    return SuffixArrayIndex(text_path, sa_path)
@@ -0,0 +1,97 @@
+class WordTrie:
+    """
+    Prefix trie over indexed strings, each mapped to its word_positions row.
+
+    A single walk from any start position yields every indexed string that
+    starts there, which is all the segmentation below needs.
+    """
+
+    # Key under which a node stores its row; never a character
+    _ROW = None
+
+    def __init__(self, rows=()):
+        self._root = {}
+        self._size = 0
+        for row in rows:
+            self.insert_row(row)
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, key, row):
+        """Map key to row, preferring exact matches, then earlier positions."""
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        current = node.get(self._ROW)
+        if current is None:
+            self._size += 1
+        elif (current[5], -current[3]) >= (row[5], -row[3]):
+            return
+        node[self._ROW] = row
+
+    def insert_row(self, row):
+        """Index a word_positions row under the part of its word that was found in pi."""
+        if row and row[4] > 0:
+            self.insert(row[1][: row[4]], row)
+
+    def get(self, key):
+        """Return the row stored for key, or None."""
+        node = self._root
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node.get(self._ROW)
+
+    def prefixes(self, text, start=0):
+        """Yield (end, row) for every indexed string text[start:end], shortest first."""
+        node = self._root
+        for end in range(start, len(text)):
+            node = node.get(text[end])
+            if node is None:
+                return
+            row = node.get(self._ROW)
+            if row is not None:
+                yield end + 1, row
+
+    def longest_prefix(self, text, start=0):
+        """Return (end, row) for the longest indexed prefix of text[start:], or (start, None)."""
+        longest = (start, None)
+        for longest in self.prefixes(text, start):
+            pass
+        return longest
+
+
+def segment(text, *tries):
+    """
+    Cover text with the fewest indexed strings.
+
+    Dynamic programming over the trie walks: best[i] is the fewest segments
+    that spell text[:i]. Candidates from all tries are combined, so a small
+    overlay trie can add fallbacks to a shared one.
+
+    :return: List of rows in order, or None if text cannot be covered.
+    """
+    n = len(text)
+    best = [0] + [None] * n
+    back = [None] * (n + 1)
+    for start in range(n):
+        if best[start] is None:
+            continue
+        for trie in tries:
+            for end, row in trie.prefixes(text, start):
+                if best[end] is None or best[start] + 1 < best[end]:
+                    best[end] = best[start] + 1
+                    back[end] = (start, row)
+    if best[n] is None:
+        return None
+
+    rows = []
+    end = n
+    while end:
+        start, row = back[end]
+        rows.append(row)
+        end = start
+    rows.reverse()
+    return rows
@@ -0,0 +1,26 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.database.db_manager import DBManager
+
+
+class DatabaseCopyTestCase(unittest.TestCase):
+    """
+    Test case with a private copy of database/pi_words.db at self.db_path and
+    a DBManager for it at self.db_manager. Connections open lazily, so setUp
+    of a subclass may still modify the copy after calling super().setUp().
+    """
+
+    pool_size = 8
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "pi_words.db")
+        shutil.copy("database/pi_words.db", self.db_path)
+        self.db_manager = DBManager(self.db_path, pool_size=self.pool_size)
+
+    def tearDown(self):
+        self.db_manager.close()
+        self.tmpdir.cleanup()
@@ -0,0 +1,77 @@
+import os
+import random
+import tempfile
+import unittest
+
+from src.utils.aho_corasick import AhoCorasick, first_occurrences, shard_ranges, top_occurrences
+from src.utils.pi_digits import PiDigits
+
+
+def find_in_pi(search_string, pi_digits):
+    """Reference implementation from indexer.py: one scan per prefix."""
+    pos = pi_digits.find(search_string)
+    if pos != -1:
+        return (pos, search_string, True)
+    for length in range(len(search_string) - 1, 1, -1):
+        pos = pi_digits.find(search_string[:length])
+        if pos != -1:
+            return (pos, search_string[:length], False)
+    return (-1, "", False)
+
+
+class TestAhoCorasick(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+        self.text = "".join(rng.choice(alphabet) for _ in range(20000))
+        self.words = ["A", "Q", "THE", "OF", "AND", "HELLO", "W7RLD", "PI;", "X" * 9]
+        self.words += [self.text[i : i + rng.randint(2, 6)] + "ZZ" for i in range(0, 20000, 997)]
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "pi.txt")
+        with open(self.path, "w") as file:
+            file.write(self.text)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_matches_find_in_pi(self):
+        pi_digits = PiDigits(self.path)
+        found = first_occurrences(self.words, pi_digits, chunk_size=1000)
+        expected = [find_in_pi(word, self.text) for word in self.words]
+        self.assertEqual(found, expected)
+
+    def test_parallel_shards_match_single_pass(self):
+        pi_digits = PiDigits(self.path)
+        single = first_occurrences(self.words, pi_digits)
+        sharded = first_occurrences(self.words, pi_digits, chunk_size=500, workers=3)
+        self.assertEqual(sharded, single)
+
+    def test_top_occurrences(self):
+        pi_digits = PiDigits(self.path)
+        words = self.words + ["AB", "7", "ZZ"]
+        expected = []
+        for word in words:
+            positions = []
+            pos = self.text.find(word)
+            while pos != -1 and len(positions) < 5:
+                positions.append(pos)
+                pos = self.text.find(word, pos + 1)
+            expected.append(positions)
+        self.assertEqual(top_occurrences(words, pi_digits, 5, chunk_size=700), expected)
+        self.assertEqual(top_occurrences(words, pi_digits, 5, chunk_size=500, workers=3), expected)
+
+    def test_shard_ranges_overlap(self):
+        self.assertEqual(shard_ranges(10, 3, 2), [(0, 6), (4, 10), (8, 10)])
+
+    def test_failure_links(self):
+        automaton = AhoCorasick(["ABAB", "BABC"])
+        first = automaton.scan([(0, b"XABABC")])
+        self.assertEqual(first[automaton.node("ABAB")], 1)
+        self.assertEqual(first[automaton.node("BABC")], 2)
+        self.assertEqual(first[automaton.node("BAB")], 2)
+        self.assertEqual(automaton.node("ABC"), -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
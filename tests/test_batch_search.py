@@ -0,0 +1,69 @@
+import json
+import unittest
+
+from fastapi.testclient import TestClient
+
+from src.app import MAX_SEARCH_INPUT_LENGTH, app
+from src.decipher import parse_input_string
+from src.database.word_index import WordIndex
+from src.index_to_cipher import CIPHER_FORMATS, index_to_cipher
+from src.search_service import process_batch_search_request, process_search_request
+
+DB_PATH = "database/pi_words.db"
+INPUTS = ["hello world", "The pi", "", "zzyzx hello", "hello world"]
+
+
+class TestBatchSearch(unittest.TestCase):
+
+    def test_same_results_as_single_requests(self):
+        results = process_batch_search_request(INPUTS, DB_PATH)
+        self.assertEqual(results, [process_search_request(text, DB_PATH) for text in INPUTS])
+
+    def test_word_index(self):
+        word_index = WordIndex(DB_PATH)
+        self.assertEqual(
+            process_batch_search_request(INPUTS, DB_PATH, word_index=word_index),
+            process_batch_search_request(INPUTS, DB_PATH),
+        )
+
+    def test_endpoint(self):
+        with TestClient(app) as client:
+            response = client.post(
+                "/search/batch", json={"input_strings": ["hello world", "hello 42"]}
+            )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(
+            results[0],
+            {"encrypted_string": index_to_cipher(process_search_request("hello world", DB_PATH))},
+        )
+        self.assertIn("error", results[1])
+
+    def test_endpoint_stream(self):
+        with TestClient(app) as client:
+            response = client.post(
+                "/search/batch", json={"input_strings": ["hello", "world"], "stream": True}
+            )
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([line["index"] for line in lines], [0, 1])
+        self.assertTrue(all("encrypted_string" in line for line in lines))
+
+    def test_longest_input_deciphers(self):
+        # Unindexed words split into one-character segments
+        text = ("qzxj " * MAX_SEARCH_INPUT_LENGTH)[:MAX_SEARCH_INPUT_LENGTH]
+        [matches] = process_batch_search_request([text], DB_PATH, locality=False)
+        for cipher_format, encode in CIPHER_FORMATS.items():
+            segments = parse_input_string(encode(matches), cipher_format)
+            self.assertEqual(sum(n for _, n, _ in segments), len(text.replace(" ", "")), cipher_format)
+
+    def test_overlong_inputs_are_rejected(self):
+        text = "a" * (MAX_SEARCH_INPUT_LENGTH + 1)
+        with TestClient(app) as client:
+            self.assertEqual(client.post("/search", json={"input_string": text}).status_code, 413)
+            response = client.post("/search/batch", json={"input_strings": ["hello", text]})
+        self.assertEqual(response.status_code, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import base64
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.decipher import REVERSE_MAPPING, CipherError, decipher_segments, parse_input_string
+from src.utils import bbp
+from src.utils.bbp import SpigotLimitError, SpigotPiDigits, base32_digits, estimated_seconds, pi_hex_digits
+from src.utils.pi_digits import PiDigits
+
+
+def reference_hex_digits(count):
+    """Hex digits of pi after the point from Machin's formula in exact integer arithmetic."""
+    bits = 4 * count + 64
+    one = 1 << bits
+
+    def arctan_inverse(x):
+        total, term, k = 0, one // x, 0
+        while term:
+            total += term // (2 * k + 1) * (-1) ** k
+            term //= x * x
+            k += 1
+        return total
+
+    pi = 16 * arctan_inverse(5) - 4 * arctan_inverse(239)
+    fraction = (pi - (3 << bits)) >> 64
+    return f"{fraction:0{count}X}"
+
+
+class TestBBP(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = reference_hex_digits(1300)
+        # Same layout as pi_base32_1b.txt: "0" nibble, "3", then the fraction
+        cls.base32 = base64.b32encode(bytes.fromhex("03" + cls.reference)).decode()
+
+    def test_hex_digits_at_any_offset(self):
+        self.assertEqual(pi_hex_digits(0, 50), "243F6A8885A308D313198A2E03707344A4093822299F31D008")
+        for start in (1, 17, 250, 1203):
+            self.assertEqual(pi_hex_digits(start, 40), self.reference[start : start + 40], start)
+
+    def test_workers_give_same_digits(self):
+        self.assertEqual(pi_hex_digits(999, 20, workers=2), self.reference[999:1019])
+
+    def test_base32_matches_digit_file_layout(self):
+        for start, count in ((0, 40), (1, 7), (3, 30), (997, 25)):
+            self.assertEqual(base32_digits(start, count).decode(), self.base32[start : start + count])
+
+    def test_spigot_extends_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "pi.txt")
+            with open(path, "w") as file:
+                file.write(self.base32[:600])
+            base = PiDigits(path)
+            spigot = SpigotPiDigits(1000, base)
+            self.assertEqual(len(spigot), 1000)
+            self.assertEqual(spigot.read(590, 30), self.base32[590:620])
+            self.assertEqual(spigot.read_many([(5, 3), (990, 20)]), [self.base32[5:8], self.base32[990:1000]])
+            chunks = b"".join(bytes(chunk) for _, chunk in spigot.iter_chunks(300, start=500))
+            self.assertEqual(chunks.decode(), self.base32[500:1000])
+            base.close()
+
+    def test_computed_reads_are_not_merged_across_gaps(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "pi.txt")
+            with open(path, "w") as file:
+                file.write(self.base32[:200])
+            base = PiDigits(path)
+            spigot = SpigotPiDigits(1040, base)
+            with mock.patch.object(bbp, "fraction_at", wraps=bbp.fraction_at) as fraction_at:
+                words = spigot.read_many([(198, 4), (300, 4), (1000, 4)])
+            self.assertEqual(words, [self.base32[198:202], self.base32[300:304], self.base32[1000:1004]])
+            self.assertLessEqual(fraction_at.call_count, 4)
+            base.close()
+
+    def test_computed_digits_are_capped(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "pi.txt")
+            with open(path, "w") as file:
+                file.write(self.base32[:200])
+            base = PiDigits(path)
+            spigot = SpigotPiDigits(1000, base, max_computed=10)
+            self.assertEqual(spigot.read_many([(100, 50), (300, 5), (303, 5)]), [
+                self.base32[100:150], self.base32[300:305], self.base32[303:308]
+            ])
+            with self.assertRaises(SpigotLimitError):
+                spigot.read_many([(300, 6), (400, 6)])
+            with self.assertRaises(SpigotLimitError):
+                spigot.read(195, 20)
+            segments = parse_input_string("[300-4][500-4][700-4]")
+            with self.assertRaises(CipherError):
+                decipher_segments([segments], path, spigot_digits=800, spigot_max_digits=8)
+            base.close()
+
+    def test_estimated_seconds_grow_with_offset(self):
+        self.assertEqual(estimated_seconds(10, 0), 0)
+        near = estimated_seconds(1000, 4096)
+        far = estimated_seconds(10**9, 4096)
+        self.assertGreater(far, 10**5 * near)
+        # ~45 minutes per evaluation at 1e9 and hundreds of evaluations per chunk
+        self.assertGreater(far, 400 * 2000)
+
+    def test_decipher_past_end_of_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "pi.txt")
+            with open(path, "w") as file:
+                file.write(self.base32[:600])
+            segments = parse_input_string("[700-4]")
+            self.assertEqual(
+                decipher_segments([segments], path, spigot_digits=200),
+                [self.base32[700:704].translate(REVERSE_MAPPING)],
+            )
+            self.assertEqual(decipher_segments([segments], path), [""])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks.corpus import build_corpus, generate_phrases
+from benchmarks.micro import percentile
+from benchmarks.run import run
+from src.database.db_manager import DBManager
+from src.utils.base32_converter import ascii_to_base32
+from src.utils.pi_digits import PiDigits
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_corpus_is_deterministic_and_consistent(self):
+        first = os.path.join(self.tmpdir.name, "a")
+        second = os.path.join(self.tmpdir.name, "b")
+        os.makedirs(first)
+        os.makedirs(second)
+        pi_path, db_path, words = build_corpus(first, 20000, 300, seed=3)
+        pi_again, _, words_again = build_corpus(second, 20000, 300, seed=3)
+        self.assertEqual(words, words_again)
+        with open(pi_path, "rb") as a, open(pi_again, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+        pi_digits = PiDigits(pi_path)
+        manager = DBManager(db_path)
+        for word in words[:50]:
+            row = manager.search_word(word)
+            if row:
+                self.assertEqual(pi_digits.read(row[3], row[4]), ascii_to_base32(word)[: row[4]])
+        manager.close()
+        pi_digits.close()
+        self.assertEqual(len(generate_phrases(words, 40, seed=3)), 40)
+
+    def test_report(self):
+        report = run(20000, 200, 0, 5, [1, 4], 12, self.tmpdir.name)
+        self.assertEqual(
+            set(report["micro"]),
+            {"ascii_to_base32", "process_search_request", "index_to_cipher", "parse_input_string", "decipher"},
+        )
+        self.assertEqual(len(report["load"]), 4)
+        for result in report["load"]:
+            self.assertEqual(result["errors"], 0)
+            self.assertEqual(result["count"], 12)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertEqual(percentile([], 50), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from src.cache import ResultCache
+from src.search_service import process_search_request
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = ResultCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_single_flight_threads(self):
+        cache = ResultCache()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait()
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        while cache.misses + cache.coalesced < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["value"] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["coalesced"], 3)
+        self.assertEqual(cache.get_or_compute("k", compute), "value")
+        self.assertEqual(cache.hits, 1)
+
+    def test_single_flight_async(self):
+        cache = ResultCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def main():
+            return await asyncio.gather(
+                *(cache.get_or_compute_async("k", compute) for _ in range(5))
+            )
+
+        self.assertEqual(asyncio.run(main()), ["value"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((cache.misses, cache.coalesced), (1, 4))
+
+    def test_errors_are_not_cached(self):
+        cache = ResultCache()
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            cache.get_or_compute("k", fail)
+        self.assertEqual(cache.get_or_compute("k", lambda: "ok"), "ok")
+
+    def test_word_cache_in_search(self):
+        word_cache = ResultCache()
+        first = process_search_request("the pi the", word_cache=word_cache)
+        self.assertEqual(process_search_request("the pi the", word_cache=word_cache), first)
+        self.assertEqual(first, process_search_request("the pi the"))
+        self.assertEqual(len(word_cache), 2)
+        self.assertEqual(word_cache.misses, 2)
+        self.assertEqual(word_cache.hits, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
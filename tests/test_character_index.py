@@ -0,0 +1,59 @@
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+
+from src.utils.character_index import CharacterIndex
+from src.utils.pi_searcher import search_words_in_db
+
+
+class TestCharacterIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.words = ["".join(rng.choice("abcdefgh") for _ in range(rng.randint(1, 9))) for _ in range(3000)]
+        self.index = CharacterIndex(self.words)
+
+    def test_containing_matches_scan(self):
+        for substring in ["", "a", "ab", "abc", "abca", "hgfe", "aaaa", "xyz", "ax"]:
+            expected = [i for i, word in enumerate(self.words) if substring in word]
+            self.assertEqual(self.index.containing(substring), expected, substring)
+
+    def test_with_characters_matches_scan(self):
+        for chars in ["", "a", "ha", "abc", "cab", "abcdefgh", "z"]:
+            expected = [i for i, word in enumerate(self.words) if all(char in word for char in chars)]
+            self.assertEqual(self.index.with_characters(chars), expected, chars)
+
+    def test_empty(self):
+        index = CharacterIndex([])
+        self.assertEqual(index.containing("abc"), [])
+        self.assertEqual(index.with_characters(""), [])
+
+
+class TestSearchWordsInDb(unittest.TestCase):
+
+    def test_matches_like_and_scan(self):
+        rng = random.Random(11)
+        words = ["".join(rng.choice("abcABC") for _ in range(rng.randint(1, 6))) for _ in range(500)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "words.db")
+            conn = sqlite3.connect(db_path)
+            conn.execute("CREATE TABLE words (id INTEGER PRIMARY KEY, word TEXT)")
+            conn.executemany("INSERT INTO words (word) VALUES (?)", [(word,) for word in words])
+            conn.commit()
+            for text in ["a", "Ab", "cab", "CCC", "z"]:
+                results = search_words_in_db(text, db_path)
+                rows = conn.execute("SELECT id, word FROM words ORDER BY rowid").fetchall()
+                like = conn.execute("SELECT id, word FROM words WHERE word LIKE ?", ("%" + text + "%",))
+                self.assertEqual(results["partial_matches"], like.fetchall(), text)
+                self.assertEqual(
+                    results["character_matches"],
+                    [row for row in rows if all(char in row[1] for char in text)],
+                    text,
+                )
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import unittest
+
+from src.concurrency import BlockingExecutor, Overloaded
+
+
+class TestBlockingExecutor(unittest.TestCase):
+
+    def test_runs_off_the_event_loop(self):
+        executor = BlockingExecutor(max_workers=2, max_pending=4)
+
+        async def main():
+            return await executor.run(threading.get_ident)
+
+        self.assertNotEqual(asyncio.run(main()), threading.get_ident())
+        executor.shutdown()
+
+    def test_rejects_beyond_max_pending(self):
+        executor = BlockingExecutor(max_workers=1, max_pending=2)
+        release = threading.Event()
+
+        async def main():
+            waiting = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0)
+            with self.assertRaises(Overloaded):
+                await executor.run(release.wait)
+            release.set()
+            await asyncio.gather(*waiting)
+            return executor.pending
+
+        self.assertEqual(asyncio.run(main()), 0)
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
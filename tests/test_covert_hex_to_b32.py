@@ -0,0 +1,85 @@
+import base64
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+
+# The conversion script lives in pi-digits-search, which is not a package
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "pi-digits-search", "covert_hex_to_b32.py")
+spec = importlib.util.spec_from_file_location("covert_hex_to_b32", SCRIPT)
+converter = importlib.util.module_from_spec(spec)
+# Registered so worker processes can unpickle encode_chunk
+sys.modules[spec.name] = converter
+spec.loader.exec_module(converter)
+
+HEX_DIGITS = "0123456789ABCDEF"
+
+
+def one_shot(hex_digits):
+    """The whole file encoded at once, as hex_to_base32 does."""
+    if len(hex_digits) % 2:
+        hex_digits = "0" + hex_digits
+    return base64.b32encode(bytes.fromhex(hex_digits)).decode()
+
+
+class TestConvertHexFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmpdir.name, "base32.txt")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_hex(self, count):
+        """Write count hex digits as "3.<digits>" with line breaks, return the digits."""
+        digits = "".join(HEX_DIGITS[(i * 7 + i // 3) % 16] for i in range(count))
+        path = os.path.join(self.tmpdir.name, "pi_hex.txt")
+        with open(path, "w") as file:
+            file.write(digits[0] + ".")
+            for start in range(1, count, 37):
+                file.write(digits[start : start + 37] + "\n")
+        return path, digits
+
+    def convert(self, hex_path, **kwargs):
+        count = converter.convert_hex_file(hex_path, self.output_path, **kwargs)
+        with open(self.output_path) as file:
+            output = file.read()
+        self.assertEqual(count, len(output))
+        return output
+
+    def test_odd_and_even_lengths_match_one_shot(self):
+        for count in (1, 2, 9, 10, 11, 99, 100, 1001, 1234):
+            hex_path, digits = self.write_hex(count)
+            self.assertEqual(converter.count_hex_digits(hex_path), count)
+            self.assertEqual(self.convert(hex_path, chunk_digits=30), one_shot(digits), count)
+            self.assertEqual(converter.hex_to_base32(digits), one_shot(digits))
+
+    def test_chunks_are_aligned(self):
+        hex_path, digits = self.write_hex(1001)
+        chunks = list(converter.iter_hex_chunks(hex_path, 50, pad=True))
+        self.assertTrue(all(len(chunk) == 50 for chunk in chunks[:-1]))
+        self.assertEqual(b"".join(chunks).decode(), "0" + digits)
+        skipped = list(converter.iter_hex_chunks(hex_path, 50, skip_digits=120, pad=True))
+        self.assertEqual(b"".join(skipped).decode(), ("0" + digits)[120:])
+        with self.assertRaises(ValueError):
+            converter.convert_hex_file(hex_path, self.output_path, chunk_digits=25)
+
+    def test_workers_match_one_shot(self):
+        hex_path, digits = self.write_hex(2345)
+        self.assertEqual(self.convert(hex_path, chunk_digits=40, workers=3), one_shot(digits))
+
+    def test_resume_partial_output(self):
+        hex_path, digits = self.write_hex(1235)
+        expected = one_shot(digits)
+        for written in (0, 5, 8, 13, 400, len(expected) - 1):
+            # A partial last group is rewritten, so its contents do not matter
+            with open(self.output_path, "w") as file:
+                file.write(expected[: written - written % 8] + "?" * (written % 8))
+            self.assertEqual(self.convert(hex_path, chunk_digits=60, resume=True), expected, written)
+        self.assertEqual(self.convert(hex_path, chunk_digits=60, resume=True), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+import unittest
+
+from src.database.db_manager import get_db_manager
+from src.database.schema import bulk_upsert_word_positions, migrate
+from src.search_service import process_search_request
+from tests.helpers import DatabaseCopyTestCase
+
+
+class TestDBManager(DatabaseCopyTestCase):
+
+    pool_size = 2
+
+    def test_search_word(self):
+        self.assertEqual(self.db_manager.search_word("the")[1:], ("the", "THE", 28542, 3, 1))
+        self.assertEqual(self.db_manager.search_word("notaword"), [])
+
+    def test_search_words(self):
+        rows = self.db_manager.search_words(["the", "pi", "notaword"])
+        self.assertEqual(sorted(row[1] for row in rows), ["pi", "the"])
+
+    def test_matches_use_word_positions(self):
+        self.assertEqual(self.db_manager.find_full_matches("the"), ["the"])
+        self.assertIn("the", self.db_manager.find_partial_matches("th"))
+        self.assertTrue(all(row[1].startswith("th") for row in self.db_manager.find_prefix_matches("th")))
+
+    def test_infix_and_character_matches(self):
+        conn = sqlite3.connect(self.db_path)
+        words = [row[0] for row in conn.execute("SELECT word FROM word_positions ORDER BY rowid")]
+        expected = {
+            text: [word for word in words if text.lower() in word.lower()]
+            for text in ["t", "TH", "ther", "qzx"]
+        }
+        characters = [word for word in words if "z" in word and "q" in word]
+        self.assertFalse(self.db_manager.has_trigrams())
+        for text, matches in expected.items():
+            self.assertEqual(self.db_manager.find_partial_matches(text), matches, text)
+        self.assertEqual(self.db_manager.find_character_matches("qz"), characters)
+
+        # The same answers from the word_trigrams index once the file is migrated
+        migrate(conn)
+        conn.close()
+        self.assertTrue(self.db_manager.has_trigrams())
+        for text, matches in expected.items():
+            self.assertEqual(self.db_manager.find_partial_matches(text), matches, text)
+        self.assertEqual(self.db_manager.find_character_matches(["z", "q"]), characters)
+
+    def test_infix_matches_are_literal(self):
+        conn = sqlite3.connect(self.db_path)
+        # Plain inserts, so the file stays unmigrated until the loop below
+        conn.executemany(
+            "INSERT INTO word_positions (word, base32_representation, position, found_length, is_exact_match) "
+            "VALUES (?, 'X', 1, 1, 0)",
+            [("50%_off",), ('say "hi"',)],
+        )
+        conn.commit()
+        words = [row[0] for row in conn.execute("SELECT word FROM word_positions ORDER BY rowid")]
+        queries = ["%", "_", "t%e", "%_o", "0%_OFF", '"hi"', "the"]
+        expected = {text: [word for word in words if text.lower() in word.lower()] for text in queries}
+        self.assertEqual(expected["%"], ["50%_off"])
+        self.assertEqual(expected["t%e"], [])
+        # CharacterIndex before the migration, word_trigrams after it
+        for migrated in (False, True):
+            if migrated:
+                migrate(conn)
+            self.assertEqual(self.db_manager.has_trigrams(), migrated)
+            for text, matches in expected.items():
+                self.assertEqual(self.db_manager.find_partial_matches(text), matches, (text, migrated))
+        conn.close()
+
+    def test_connections_are_reused(self):
+        with self.db_manager.connection() as first:
+            pass
+        with self.db_manager.connection() as second:
+            self.assertIs(first, second)
+
+    def test_connections_are_read_only(self):
+        with self.db_manager.connection() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM word_positions")
+
+    def test_concurrent_readers(self):
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(50):
+                    self.assertTrue(self.db_manager.search_word("the"))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(self.db_manager._pool.qsize(), 2)
+
+    def test_reopens_when_file_changes(self):
+        version = self.db_manager.version
+        self.assertEqual(self.db_manager.search_word("zzyzx"), [])
+        conn = sqlite3.connect(self.db_path)
+        bulk_upsert_word_positions(conn, [("zzyzx", "ZZYZX", 12345, 5, 1)])
+        conn.close()
+        self.assertNotEqual(self.db_manager.version, version)
+        self.assertEqual(self.db_manager.search_word("zzyzx")[1:], ("zzyzx", "ZZYZX", 12345, 5, 1))
+
+    def test_search_request_borrows_connection(self):
+        self.assertEqual(
+            process_search_request("hello world", self.db_path, db_manager=self.db_manager),
+            process_search_request("hello world", self.db_path),
+        )
+        self.assertIs(get_db_manager(self.db_path), get_db_manager(self.db_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import random
+import re
+import unittest
+
+from src import decipher as decipher_module
+from src.decipher import (
+    MAX_ENCODABLE_LENGTH,
+    CipherError,
+    iter_compact_segments,
+    iter_segments,
+    join_segments,
+    parse_input_string,
+    validate_input_string,
+)
+from src.index_to_cipher import index_to_cipher, index_to_compact_cipher
+
+# The regex validate_input_string used before the tokenizer
+LEGACY_PATTERN = r"^(\[[0-9]+-[0-9]+\]|\[\[([0-9]+-[0-9]+)(\]\[[0-9]+-[0-9]+)*\]\])+$"
+
+
+class TestCipherTokenizer(unittest.TestCase):
+
+    def test_segments_and_groups(self):
+        self.assertEqual(
+            parse_input_string("[1060582-5][[2353302-5][5-1]][479-2][[933-2][114-1]]"),
+            [
+                (1060582, 5, None),
+                (2353302, 5, 0),
+                (5, 1, 0),
+                (479, 2, None),
+                (933, 2, 1),
+                (114, 1, 1),
+            ],
+        )
+
+    def test_is_a_generator(self):
+        segments = iter_segments("[1-2][3-4x")
+        self.assertEqual(next(segments), (1, 2, None))
+        with self.assertRaises(CipherError):
+            next(segments)
+
+    def test_matches_legacy_validation(self):
+        rng = random.Random(7)
+        for _ in range(3000):
+            text = "".join(rng.choice("[[]]-0129") for _ in range(rng.randrange(0, 16)))
+            self.assertEqual(
+                validate_input_string(text), bool(re.fullmatch(LEGACY_PATTERN, text)), text
+            )
+
+    def test_limits(self):
+        with self.assertRaises(CipherError):
+            parse_input_string("[1-2]" * (decipher_module.MAX_SEGMENTS + 1))
+        with self.assertRaises(CipherError):
+            parse_input_string(f"[1-{decipher_module.MAX_READ_LENGTH + 1}]")
+        with self.assertRaises(CipherError):
+            parse_input_string("[" * (decipher_module.MAX_CIPHER_LENGTH + 1))
+        self.assertFalse(validate_input_string("[1-2][3-1]]"))
+
+    def test_join_segments(self):
+        segments = [(0, 5, None), (0, 5, 0), (0, 1, 0), (0, 2, None), (0, 2, 1), (0, 1, 1)]
+        words = ["HELLO", "WORLD", "!", "PI", "IR", "R"]
+        self.assertEqual(join_segments(segments, words), ["HELLO", "WORLD!", "PI", "IRR"])
+
+
+class TestCompactCipher(unittest.TestCase):
+
+    def random_index_data(self, rng, words):
+        def row():
+            length = rng.randrange(1, 8)
+            return (None, "w", "W", rng.randrange(0, 10**9), length, 1)
+
+        return [
+            row() if rng.random() < 0.6 else [row() for _ in range(rng.randrange(1, 5))]
+            for _ in range(words)
+        ]
+
+    def test_round_trip(self):
+        rng = random.Random(17)
+        for _ in range(200):
+            index_data = self.random_index_data(rng, rng.randrange(1, 30))
+            self.assertEqual(
+                list(iter_compact_segments(index_to_compact_cipher(index_data))),
+                list(iter_segments(index_to_cipher(index_data))),
+            )
+
+    def test_smaller_than_text(self):
+        index_data = self.random_index_data(random.Random(3), 500)
+        self.assertLess(len(index_to_compact_cipher(index_data)), len(index_to_cipher(index_data)))
+
+    def test_worst_case_search_input_parses(self):
+        # Two-character words split into one-character segments at 12-digit positions
+        position = 10**12 - 1
+        index_data = [
+            [(None, "x", "X", position, 1, 1), (None, "y", "Y", position, 1, 1)]
+            for _ in range(MAX_ENCODABLE_LENGTH // 2)
+        ]
+        self.assertEqual(len(parse_input_string(index_to_cipher(index_data))), MAX_ENCODABLE_LENGTH)
+        self.assertEqual(len(parse_input_string(index_to_compact_cipher(index_data), "compact")), MAX_ENCODABLE_LENGTH)
+
+    def test_parse_by_format(self):
+        index_data = [(None, "pi", "PI", 933, 2, 1), [(None, "i", "I", 7, 1, 1), (None, "r", "R", 0, 2, 1)]]
+        self.assertEqual(
+            parse_input_string(index_to_compact_cipher(index_data), "compact"),
+            [(933, 2, None), (7, 1, 0), (0, 2, 0)],
+        )
+        with self.assertRaises(CipherError):
+            parse_input_string("[1-2]", "binary")
+
+    def test_malformed(self):
+        for cipher in ["", "[1-2]", "gA", "A", "_w"]:
+            with self.assertRaises(CipherError, msg=cipher):
+                parse_input_string(cipher, "compact")
+
+
+if __name__ == "__main__":
+    unittest.main()
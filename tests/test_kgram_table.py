@@ -0,0 +1,62 @@
+import os
+import random
+import tempfile
+import unittest
+
+from src.search_service import resolve_word
+from src.utils.base32_converter import ascii_to_base32
+from src.utils.kgram_table import KGramTable, build_kgram_table, load_kgram_table, save_kgram_table
+from src.utils.pi_digits import PiDigits
+from src.utils.word_trie import WordTrie
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+
+
+class TestKGramTable(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(23)
+        self.text = "".join(rng.choice(ALPHABET) for _ in range(50000))
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.text_path = os.path.join(self.tmpdir.name, "pi.txt")
+        with open(self.text_path, "w") as file:
+            file.write(self.text)
+        self.pi_digits = PiDigits(self.text_path)
+        # Small chunks so grams straddling chunk boundaries are exercised
+        self.table = KGramTable(build_kgram_table(self.pi_digits, max_k=3, chunk_size=997))
+
+    def tearDown(self):
+        self.pi_digits.close()
+        self.tmpdir.cleanup()
+
+    def test_first_occurrences(self):
+        self.assertEqual(self.table.max_k, 3)
+        rng = random.Random(4)
+        grams = [a + b for a in ALPHABET for b in ALPHABET]
+        grams += ["".join(rng.choice(ALPHABET) for _ in range(3)) for _ in range(2000)]
+        for gram in list(ALPHABET) + grams:
+            self.assertEqual(self.table.find(gram), self.text.find(gram), gram)
+
+    def test_out_of_range(self):
+        self.assertEqual(self.table.find(""), -1)
+        self.assertEqual(self.table.find("ABCD"), -1)
+        self.assertEqual(self.table.find("a"), -1)
+
+    def test_save_and_load(self):
+        path = os.path.join(self.tmpdir.name, "pi.kgrams.npy")
+        save_kgram_table(self.table.table, path)
+        loaded = load_kgram_table(path)
+        self.assertEqual(loaded.find("Q7"), self.text.find("Q7"))
+        self.assertIsNone(load_kgram_table(os.path.join(self.tmpdir.name, "missing.npy")))
+
+    def test_segments_from_table_alone(self):
+        word = "kgram table!"
+        segments = resolve_word(word, WordTrie(), kgram_table=self.table)
+        self.assertEqual("".join(row[1] for row in segments), word)
+        for row in segments:
+            self.assertLessEqual(row[4], 3)
+            self.assertEqual(self.text[row[3] : row[3] + row[4]], ascii_to_base32(row[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
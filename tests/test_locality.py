@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import unittest
+
+from src.database.schema import COLUMNS, bulk_replace_word_occurrences
+from src.database.word_file import WordFile, build_word_file
+from src.database.word_index import WordIndex
+from src.locality import cluster_positions
+from src.search_service import process_batch_search_request, process_search_request
+from tests.helpers import DatabaseCopyTestCase
+
+
+def row(word, position):
+    return (None, word, word.upper(), position, len(word), 1)
+
+
+class TestClusterPositions(unittest.TestCase):
+
+    def test_moves_segments_onto_shared_page(self):
+        matches = [row("hello", 1060582), [row("wor", 900001), row("ld", 5)], row("pi", 933)]
+        occurrences = {"hello": [1060582, 9000], "wor": [900001, 8200], "pi": [933, 12000]}
+        result = cluster_positions(matches, occurrences, page_size=4096)
+        # "ld" only occurs at 5, so page 0 is read anyway and "pi" stays there;
+        # "hello" and "wor" then share page 2
+        self.assertEqual(result, [row("hello", 9000), [row("wor", 8200), row("ld", 5)], row("pi", 933)])
+
+    def test_partial_rows_keep_their_position(self):
+        partial = (None, "hellx", "HELLX", 50000, 4, 0)
+        self.assertEqual(cluster_positions([partial], {"hellx": [1]}), [partial])
+
+    def test_nothing_to_choose(self):
+        matches = [row("the", 28542)]
+        self.assertIs(cluster_positions(matches, {}), matches)
+
+
+class TestLocalitySearch(DatabaseCopyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        conn = sqlite3.connect(self.db_path)
+        bulk_replace_word_occurrences(conn, [("hello", [1060582, 2354000]), ("world", [2353302])])
+        conn.close()
+
+    def test_hello_moves_next_to_world(self):
+        result = process_search_request("hello world", db_manager=self.db_manager)
+        self.assertEqual([match[3] for match in result], [2354000, 2353302])
+        plain = process_search_request("hello world", db_manager=self.db_manager, locality=False)
+        self.assertEqual([match[3] for match in plain], [1060582, 2353302])
+
+    def test_same_results_everywhere(self):
+        word_index = WordIndex(self.db_path)
+        inputs = ["hello world", "world hello the"]
+        expected = [process_search_request(text, db_manager=self.db_manager) for text in inputs]
+        self.assertEqual([process_search_request(text, word_index=word_index) for text in inputs], expected)
+        self.assertEqual(process_batch_search_request(inputs, db_manager=self.db_manager), expected)
+        self.assertEqual(process_batch_search_request(inputs, word_index=word_index), expected)
+
+    def test_word_file_keeps_occurrences(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(f"SELECT {COLUMNS} FROM word_positions").fetchall()
+        conn.close()
+        path = os.path.join(self.tmpdir.name, "pi_words.mph")
+        build_word_file(rows, path, {"hello": [1060582, 2354000], "world": [2353302]})
+        word_file = WordFile(path)
+        inputs = ["hello world", "world hello the"]
+        expected = [process_search_request(text, db_manager=self.db_manager) for text in inputs]
+        self.assertEqual([process_search_request(text, word_file=word_file) for text in inputs], expected)
+        self.assertEqual(process_batch_search_request(inputs, word_file=word_file), expected)
+        self.assertEqual(word_file.search_occurrences(["hello", "notaword"]), {"hello": [1060582, 2354000]})
+        word_file.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from src import metrics
+from src.app import app
+from src.database.db_manager import DBManager
+from src.metrics import Registry, profiled, request_scope, span
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_render(self):
+        registry = Registry()
+        counter = registry.counter("things_total", "Things.", ("kind",))
+        histogram = registry.histogram("wait_seconds", "Waits.", buckets=(0.1, 1.0))
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(7)
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE things_total counter", lines)
+        self.assertIn('things_total{kind="a"} 3', lines)
+        self.assertIn('wait_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('wait_seconds_bucket{le="1.0"} 2', lines)
+        self.assertIn('wait_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn("wait_seconds_count 3", lines)
+        self.assertIn("wait_seconds_sum 7.55", lines)
+
+    def test_span_and_sql_counts(self):
+        before = metrics.STAGE_SECONDS.count("test.stage")
+        with span("test.stage"):
+            pass
+        self.assertEqual(metrics.STAGE_SECONDS.count("test.stage"), before + 1)
+
+        manager = DBManager("database/pi_words.db")
+        with request_scope() as stats:
+            manager.search_word("the")
+            manager.search_words(["pi", "of"])
+        manager.close()
+        self.assertEqual(stats.sql_queries, 2)
+
+    def test_profiled_dumps_sampled_calls(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch.object(metrics, "PROFILE_DIR", tmpdir):
+                with profiled("never", rate=0):
+                    sum(range(100))
+                with profiled("always", rate=1):
+                    sum(range(100))
+            files = os.listdir(tmpdir)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].startswith("always-"))
+
+    def test_endpoint(self):
+        with TestClient(app) as client:
+            self.assertEqual(client.post("/search", json={"input_string": "hello xylophonic"}).status_code, 200)
+            client.get("/no/such/path")
+            response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        text = response.text
+        self.assertIn('pi_search_request_duration_seconds_count{method="POST",path="/search",status="200"}', text)
+        self.assertIn('path="other",status="404"', text)
+        self.assertIn('pi_search_sql_queries_per_request_count{path="/search"}', text)
+        self.assertIn('pi_search_stage_duration_seconds_count{stage="search.lookup"}', text)
+        self.assertIn('pi_search_word_resolutions_total{via="segments"}', text)
+        self.assertIn('pi_search_cache_misses_total{cache="phrase"}', text)
+
+    def test_streamed_batch_is_measured_to_the_last_chunk(self):
+        path = ("/search/batch",)
+        before = metrics.REQUEST_QUERIES.count(*path), metrics.REQUEST_QUERIES.total(*path)
+        statements = metrics.SQL_QUERIES.value()
+        with TestClient(app) as client:
+            response = client.post(
+                "/search/batch", json={"input_strings": ["zebra quokka", "streamed"], "stream": True}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.text.splitlines()), 2)
+        self.assertEqual(metrics.REQUEST_QUERIES.count(*path), before[0] + 1)
+        # The lookups run while the body streams, after the handler returned
+        queries = metrics.REQUEST_QUERIES.total(*path) - before[1]
+        self.assertGreater(queries, 0)
+        self.assertEqual(queries, metrics.SQL_QUERIES.value() - statements)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import random
+import tempfile
+import unittest
+
+from src.utils.packed_digits import PackedPiDigits, pack_base32_file
+from src.utils.pi_digits import open_pi_digits
+
+
+class TestPackedDigits(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(5)
+        # Deliberately not a multiple of 8 symbols, with '=' padding at the end
+        self.text = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567") for _ in range(1003))
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.text_path = os.path.join(self.tmpdir.name, "pi.txt")
+        self.packed_path = os.path.join(self.tmpdir.name, "pi.b32p")
+        with open(self.text_path, "w") as file:
+            file.write(self.text + "=====")
+        self.count = pack_base32_file(self.text_path, self.packed_path, chunk_size=64)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_packed_size(self):
+        self.assertEqual(self.count, len(self.text))
+        self.assertLess(os.path.getsize(self.packed_path), len(self.text) * 5 // 8 + 32)
+
+    def test_random_access_reads(self):
+        packed = PackedPiDigits(self.packed_path)
+        self.assertEqual(len(packed), len(self.text))
+        for start, count in [(0, 1), (0, 8), (3, 11), (7, 2), (995, 8), (1000, 10), (2000, 1)]:
+            self.assertEqual(packed.read(start, count), self.text[start : start + count])
+        packed.close()
+
+    def test_find(self):
+        packed = PackedPiDigits(self.packed_path)
+        for start in (0, 8, 250, 997):
+            pattern = self.text[start : start + 5]
+            self.assertEqual(packed.find(pattern), self.text.find(pattern))
+        self.assertEqual(packed.find("!!"), -1)
+        packed.close()
+
+    def test_open_pi_digits_detects_format(self):
+        self.assertIsInstance(open_pi_digits(self.packed_path), PackedPiDigits)
+        self.assertNotIsInstance(open_pi_digits(self.text_path), PackedPiDigits)
+
+
+if __name__ == "__main__":
+    unittest.main()
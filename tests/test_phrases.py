@@ -0,0 +1,74 @@
+import sqlite3
+import unittest
+
+from src.database.schema import bulk_upsert_word_positions
+from src.database.word_index import WordIndex
+from src.search_service import (
+    cover_words,
+    phrase_candidates,
+    process_batch_search_request,
+    process_search_request,
+)
+from tests.helpers import DatabaseCopyTestCase
+
+ROW_OF = (1, "of", "OF", 10, 2, 1)
+ROW_THE = (2, "the", "THE", 20, 3, 1)
+ROW_OF_THE = (3, "of the", "OF7THE", 30, 6, 1)
+
+
+class TestCoverWords(unittest.TestCase):
+
+    def test_candidates(self):
+        self.assertEqual(
+            phrase_candidates(["a", "b", "c", "d"]),
+            {"a b", "b c", "c d", "a b c", "b c d"},
+        )
+
+    def test_phrase_saves_segments(self):
+        words = ["top", "of", "the"]
+        matches = [[ROW_OF, ROW_THE], ROW_OF, ROW_THE]
+        self.assertEqual(
+            cover_words(words, matches, {"of the": ROW_OF_THE}),
+            [[ROW_OF, ROW_THE], ROW_OF_THE],
+        )
+        self.assertEqual(cover_words(words, matches, {}), matches)
+
+    def test_phrase_covers_unresolvable_word(self):
+        error = ValueError("cannot encode")
+        self.assertEqual(cover_words(["of", "the"], [ROW_OF, error], {"of the": ROW_OF_THE}), [ROW_OF_THE])
+        with self.assertRaises(ValueError):
+            cover_words(["of", "the"], [ROW_OF, error], {})
+
+
+class TestPhraseSearch(DatabaseCopyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        conn = sqlite3.connect(self.db_path)
+        bulk_upsert_word_positions(
+            conn, [("of the", "OF7THE", 123456, 6, 1), ("in a b", "IN7A7B", 654321, 4, 0)]
+        )
+        conn.close()
+
+    def test_phrase_collapses_to_one_segment(self):
+        result = process_search_request("Top of the pi", db_manager=self.db_manager)
+        self.assertEqual(result[1][1:], ("of the", "OF7THE", 123456, 6, 1))
+        self.assertEqual(len(result), 3)
+
+    def test_partial_phrase_is_ignored(self):
+        result = process_search_request("in a b", db_manager=self.db_manager)
+        self.assertEqual(len(result), 3)
+
+    def test_same_results_everywhere(self):
+        word_index = WordIndex(self.db_path)
+        inputs = ["top of the pi", "in a b", "of the of the"]
+        expected = [process_search_request(text, db_manager=self.db_manager) for text in inputs]
+        self.assertEqual(
+            [process_search_request(text, word_index=word_index) for text in inputs], expected
+        )
+        self.assertEqual(process_batch_search_request(inputs, db_manager=self.db_manager), expected)
+        self.assertEqual(process_batch_search_request(inputs, word_index=word_index), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
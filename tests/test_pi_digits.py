@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from src.utils.pi_digits import PiDigits
+
+
+class TestPiDigits(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dotted_path = os.path.join(self.tmpdir.name, "dotted.txt")
+        self.plain_path = os.path.join(self.tmpdir.name, "plain.txt")
+        with open(self.dotted_path, "w") as file:
+            file.write("3.14159265358979")
+        with open(self.plain_path, "w") as file:
+            file.write("AMA4QC7ZAQIA")
+        self.digits = "314159265358979"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_decimal_point_is_skipped(self):
+        pi_digits = PiDigits(self.dotted_path)
+        self.assertEqual(len(pi_digits), len(self.digits))
+        for start in range(len(self.digits)):
+            for count in range(len(self.digits) - start + 2):
+                self.assertEqual(
+                    pi_digits.read(start, count), self.digits[start : start + count]
+                )
+
+    def test_find_matches_stripped_string(self):
+        pi_digits = PiDigits(self.dotted_path)
+        for sub in ["31", "3", "14", "159", "979", "9", "X"]:
+            for start in range(4):
+                self.assertEqual(pi_digits.find(sub, start), self.digits.find(sub, start))
+
+    def test_slices_are_views(self):
+        pi_digits = PiDigits(self.plain_path)
+        view = pi_digits[1:4]
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(view.tobytes(), b"MA4")
+        self.assertEqual(pi_digits[0], "A")
+        view.release()
+
+    def test_iter_chunks_overlap(self):
+        pi_digits = PiDigits(self.plain_path)
+        chunks = [(position, bytes(chunk)) for position, chunk in pi_digits.iter_chunks(5, 2)]
+        self.assertEqual(chunks, [(0, b"AMA4QC7"), (5, b"C7ZAQIA")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import random
+import tempfile
+import unittest
+
+from src.decipher import decipher, decipher_many, get_characters_from_pi
+from src.utils.packed_digits import pack_base32_file
+from src.utils.pi_digits import open_pi_digits
+from src.utils.read_planner import plan_reads
+
+
+class TestReadPlanner(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.text = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567") for _ in range(20000))
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.text_path = os.path.join(self.tmpdir.name, "pi.txt")
+        self.packed_path = os.path.join(self.tmpdir.name, "pi.b32p")
+        with open(self.text_path, "w") as file:
+            file.write(self.text)
+        pack_base32_file(self.text_path, self.packed_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_plan_merges_nearby_ranges(self):
+        ranges = [(5000, 3), (10, 5), (12, 10), (100, 2), (19000, 4)]
+        self.assertEqual(
+            plan_reads(ranges, max_gap=100),
+            [(10, 102, [1, 2, 3]), (5000, 5003, [0]), (19000, 19004, [4])],
+        )
+        self.assertEqual(len(plan_reads(ranges, max_gap=0)), 4)
+
+    def test_read_many_matches_read(self):
+        rng = random.Random(3)
+        ranges = [(rng.randrange(-5, 20050), rng.randrange(0, 12)) for _ in range(500)]
+        for path in (self.text_path, self.packed_path):
+            pi_digits = open_pi_digits(path)
+            self.assertEqual(
+                pi_digits.read_many(ranges), [pi_digits.read(i, n) for i, n in ranges]
+            )
+            pi_digits.close()
+
+    def test_iter_chunks_match_text(self):
+        for path in (self.text_path, self.packed_path):
+            pi_digits = open_pi_digits(path)
+            chunks = [(position, bytes(chunk).decode()) for position, chunk in pi_digits.iter_chunks(3000, 7, 50, 19990)]
+            self.assertEqual([position for position, _ in chunks], list(range(50, 19990, 3000)))
+            for position, chunk in chunks:
+                self.assertEqual(chunk, self.text[position : min(position + 3007, 19990)])
+            pi_digits.close()
+
+    def test_translate_table(self):
+        position = self.text.find("7")
+        self.assertEqual(get_characters_from_pi(self.text_path, [(position, 1)]), [" "])
+
+    def test_decipher_many(self):
+        ciphers = ["[0-5][[100-2][7-1]]", "[19990-10]", "[[3-1][4-1]][50-3]"]
+        self.assertEqual(
+            decipher_many(ciphers, self.text_path),
+            [decipher(cipher, self.text_path) for cipher in ciphers],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
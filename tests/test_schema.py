@@ -0,0 +1,91 @@
+import sqlite3
+import unittest
+
+from src.database.schema import (
+    SCHEMA_VERSION,
+    SEARCH_INFIX_SQL,
+    bulk_replace_word_occurrences,
+    bulk_upsert_word_positions,
+    ensure_word_positions,
+    full_table_scans,
+    infix_phrase,
+    migrate,
+    schema_version,
+)
+
+
+class TestSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def rows(self):
+        return self.conn.execute(
+            "SELECT word, base32_representation, position, found_length, is_exact_match "
+            "FROM word_positions ORDER BY word"
+        ).fetchall()
+
+    def test_bulk_upsert_never_duplicates(self):
+        rows = [("the", "THE", 28542, 3, 1), ("of", "OF", 200, 2, 1)]
+        self.assertEqual(bulk_upsert_word_positions(self.conn, rows, batch_size=1), 2)
+        bulk_upsert_word_positions(self.conn, [("the", "THE", 7, 2, 0)])
+        self.assertEqual(self.rows(), [("of", "OF", 200, 2, 1), ("the", "THE", 7, 2, 0)])
+
+    def create_legacy_table(self):
+        # Layout of the shipped pi_words.db: no primary key and no constraints
+        self.conn.execute(
+            "CREATE TABLE word_positions(id INT, word TEXT, base32_representation TEXT, "
+            "position INT, found_length INT, is_exact_match NUM)"
+        )
+        self.conn.executemany(
+            "INSERT INTO word_positions VALUES (?, ?, ?, ?, ?, ?)",
+            [(1, "a", "A", 0, 1, 1), (2, "a", "A", 5, 1, 1), (None, "!", "2", 5, 1, 1), (3, "i", "I", 7, 1, 1)],
+        )
+
+    def test_legacy_table_is_deduplicated(self):
+        self.create_legacy_table()
+        ensure_word_positions(self.conn)
+        # The first "a" row is kept, the duplicate dropped
+        self.assertEqual(self.rows(), [("!", "2", 5, 1, 1), ("a", "A", 0, 1, 1), ("i", "I", 7, 1, 1)])
+        bulk_upsert_word_positions(self.conn, [("a", "A", 3, 1, 1)])
+        self.assertEqual(self.rows(), [("!", "2", 5, 1, 1), ("a", "A", 3, 1, 1), ("i", "I", 7, 1, 1)])
+
+    def test_migration_adds_keys_and_indexes(self):
+        self.create_legacy_table()
+        self.assertEqual(full_table_scans(self.conn), ["search_word", "search_prefix"])
+        self.assertEqual(migrate(self.conn), (0, SCHEMA_VERSION))
+        self.assertEqual(schema_version(self.conn), SCHEMA_VERSION)
+        self.assertEqual(full_table_scans(self.conn), [])
+        ids = self.conn.execute("SELECT id, word FROM word_positions ORDER BY id").fetchall()
+        self.assertEqual(ids, [(1, "a"), (3, "i"), (4, "!")])
+        # Running it again is a no-op
+        self.assertEqual(migrate(self.conn), (SCHEMA_VERSION, SCHEMA_VERSION))
+
+    def test_word_trigrams_follow_writes(self):
+        self.create_legacy_table()
+        migrate(self.conn)
+
+        def infix(text):
+            return [row[0] for row in self.conn.execute(SEARCH_INFIX_SQL, (infix_phrase(text),))]
+
+        bulk_upsert_word_positions(self.conn, [("other", "OTHER", 9, 5, 1), ("there", "THERE", 3, 5, 1)])
+        self.assertEqual(infix("the"), ["other", "there"])
+        self.conn.execute("UPDATE word_positions SET word = 'thorn' WHERE word = 'there'")
+        self.conn.execute("DELETE FROM word_positions WHERE word = 'other'")
+        self.assertEqual(infix("the"), [])
+        self.assertEqual(infix("HOR"), ["thorn"])
+
+    def test_word_occurrences_are_replaced(self):
+        self.assertEqual(bulk_replace_word_occurrences(self.conn, [("the", [5, 9]), ("of", [1])]), 3)
+        bulk_replace_word_occurrences(self.conn, [("the", [2, 5, 7])])
+        self.assertEqual(
+            self.conn.execute("SELECT word, position FROM word_occurrences ORDER BY word, position").fetchall(),
+            [("of", 1), ("the", 2), ("the", 5), ("the", 7)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import random
+import tempfile
+import unittest
+
+from src.utils.suffix_array import SuffixArrayIndex, build_suffix_array, save_suffix_array
+
+
+class TestSuffixArray(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.text = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567") for _ in range(5000))
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.text_path = os.path.join(self.tmpdir.name, "pi.txt")
+        self.sa_path = os.path.join(self.tmpdir.name, "pi.sa.npy")
+        with open(self.text_path, "w") as file:
+            file.write(self.text)
+        save_suffix_array(build_suffix_array(self.text.encode()), self.sa_path)
+        self.index = SuffixArrayIndex(self.text_path, self.sa_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_suffix_array_is_sorted(self):
+        sa = build_suffix_array(b"BANANA")
+        self.assertEqual(list(sa), [5, 3, 1, 0, 4, 2])
+
+    def test_find_matches_str_find(self):
+        for start in (0, 17, 999, 4990):
+            pattern = self.text[start : start + 4]
+            self.assertEqual(self.index.find(pattern), self.text.find(pattern))
+        self.assertEqual(self.index.find("A"), self.text.find("A"))
+
+    def test_find_missing(self):
+        self.assertEqual(self.index.find("HELLOWORLD"), -1)
+        self.assertEqual(self.index.find(""), -1)
+
+    def test_longest_prefix(self):
+        pattern = self.text[100:106] + "!!"
+        position, length = self.index.longest_prefix(pattern)
+        self.assertEqual(length, 6)
+        self.assertEqual(position, self.text.find(pattern[:6]))
+        self.assertEqual(self.index.longest_prefix("!"), (-1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.database.db_manager import DBManager
+from src.database.schema import COLUMNS
+from src.database.word_file import WordFile, build_word_file, open_word_file
+from src.search_service import process_batch_search_request, process_search_request
+
+
+class TestWordFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "pi_words.mph")
+        conn = sqlite3.connect("database/pi_words.db")
+        self.rows = conn.execute(f"SELECT {COLUMNS} FROM word_positions").fetchall()
+        conn.close()
+        self.assertEqual(build_word_file(self.rows, self.path), len(self.rows))
+        self.word_file = WordFile(self.path)
+
+    def tearDown(self):
+        self.word_file.close()
+        self.tmpdir.cleanup()
+
+    def test_every_row_round_trips(self):
+        self.assertEqual(len(self.word_file), len(self.rows))
+        for row in self.rows:
+            self.assertEqual(self.word_file.search_word(row[1]), row)
+
+    def test_missing_words(self):
+        self.assertEqual(self.word_file.search_word("notaword"), [])
+        self.assertEqual(self.word_file.search_word(""), [])
+        rows = self.word_file.search_words(["the", "notaword", "pi"])
+        self.assertEqual([row[1] for row in rows], ["the", "pi"])
+
+    def test_small_and_invalid_files(self):
+        empty = os.path.join(self.tmpdir.name, "empty.mph")
+        build_word_file([], empty)
+        self.assertEqual(WordFile(empty).search_word("the"), [])
+        with self.assertRaises(ValueError):
+            build_word_file([(1, "a", "A", 0, 1, 1), (2, "a", "A", 5, 1, 1)], empty)
+        self.assertIsNone(open_word_file(os.path.join(self.tmpdir.name, "missing.mph")))
+        with self.assertRaises(ValueError):
+            WordFile("database/pi_words.db")
+
+    def test_reloads_new_export(self):
+        word_file = WordFile(self.path, check_interval=0)
+        version = word_file.version
+        old = word_file.snapshot()
+        row = (None, "notaword", "NOTAWORD", 42, 8, 1)
+        build_word_file(self.rows + [row], self.path)
+        os.utime(self.path, ns=(version[0] + 10**9, version[0] + 10**9))
+        self.assertNotEqual(word_file.version, version)
+        self.assertEqual(word_file.search_word("notaword"), row)
+        # Requests still holding the old snapshot keep reading it
+        self.assertEqual(old.search_word("notaword"), [])
+        word_file.close()
+
+    def test_same_results_as_database(self):
+        db_manager = DBManager("database/pi_words.db")
+        inputs = ["hello world", "Hello I am PI", "xylophonic zebra!"]
+        for text in inputs:
+            self.assertEqual(
+                process_search_request(text, word_file=self.word_file, locality=False),
+                process_search_request(text, db_manager=db_manager, locality=False),
+            )
+        self.assertEqual(
+            process_batch_search_request(inputs, word_file=self.word_file, locality=False),
+            process_batch_search_request(inputs, db_manager=db_manager, locality=False),
+        )
+        db_manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import sqlite3
+import unittest
+
+from src.database.schema import bulk_upsert_word_positions
+from src.database.word_index import WordIndex
+from src.search_service import process_search_request
+from tests.helpers import DatabaseCopyTestCase
+
+
+class TestWordIndex(DatabaseCopyTestCase):
+
+    def test_lookup(self):
+        word_index = WordIndex(self.db_path)
+        self.assertEqual(len(word_index), 20006)
+        self.assertEqual(word_index.search_word("the")[1:], ("the", "THE", 28542, 3, 1))
+        self.assertEqual(word_index.search_word("notaword"), [])
+
+    def test_same_results_as_database(self):
+        word_index = WordIndex(self.db_path)
+        for text in ["hello world", "Information is key!", "the pi zzyzx"]:
+            self.assertEqual(
+                process_search_request(text, self.db_path, word_index=word_index),
+                process_search_request(text, self.db_path),
+            )
+
+    def test_reloads_when_file_changes(self):
+        word_index = WordIndex(self.db_path, check_interval=0)
+        conn = sqlite3.connect(self.db_path)
+        bulk_upsert_word_positions(conn, [("zzyzx", "ZZYZX", 12345, 5, 1)])
+        conn.close()
+        self.assertEqual(word_index.search_word("zzyzx")[3], 12345)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from src.utils.word_trie import WordTrie, segment
+
+
+def row(word, position, found_length=None, exact=1):
+    found_length = len(word) if found_length is None else found_length
+    return (None, word, word.upper(), position, found_length, exact)
+
+
+class TestWordTrie(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [
+            row("a", 0), row("b", 40), row("c", 19), row("ab", 5), row("abc", 900),
+            row("bca", 77), row("information", 75923610, 5, 0),
+        ]
+        self.trie = WordTrie(self.rows)
+
+    def test_partial_rows_are_keyed_by_found_prefix(self):
+        self.assertEqual(self.trie.get("infor")[3], 75923610)
+        self.assertIsNone(self.trie.get("information"))
+
+    def test_prefixes_single_walk(self):
+        self.assertEqual([end for end, _ in self.trie.prefixes("abca")], [1, 2, 3])
+        self.assertEqual(self.trie.longest_prefix("abca")[0], 3)
+        self.assertEqual(self.trie.longest_prefix("zz"), (0, None))
+
+    def test_exact_rows_win(self):
+        self.trie.insert("ab", row("abz", 1, 2, 0))
+        self.assertEqual(self.trie.get("ab")[3], 5)
+
+    def test_segment_uses_fewest_segments(self):
+        # Greedy longest-prefix gives ab + c + d; the DP finds a + bcd
+        trie = WordTrie([row("a", 0), row("ab", 5), row("bcd", 9), row("c", 19), row("d", 3)])
+        self.assertEqual([r[1] for r in segment("abcd", trie)], ["a", "bcd"])
+        self.assertEqual([r[1] for r in segment("abcabc", self.trie)], ["abc", "abc"])
+
+    def test_segment_impossible(self):
+        self.assertIsNone(segment("abx", self.trie))
+        overlay = WordTrie([row("x", 3)])
+        self.assertEqual([r[1] for r in segment("abx", self.trie, overlay)], ["ab", "x"])
+
+
+if __name__ == "__main__":
+    unittest.main()